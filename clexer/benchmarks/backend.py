@@ -0,0 +1,55 @@
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.corpus import program
+from src.backend import emit_many
+from src.cache import ObjectCache
+from src.cparser import CParser
+from src.folding import fold
+from src.ir import IR
+
+"""
+    Native code generation of many modules with emit_many:
+        serial  every module emitted in this process
+        pool    the modules fanned out over --jobs worker processes
+        cached  every module found in a warm ObjectCache, no code generation at all
+    Run from the clexer directory:
+        python -m benchmarks.backend --modules 32 --statements 500 --jobs 4
+"""
+
+def main():
+    arguments = argparse.ArgumentParser(description='Parallel and cached native code generation')
+    arguments.add_argument('--modules', type=int, default=32)
+    arguments.add_argument('--statements', type=int, default=500)
+    arguments.add_argument('--jobs', type=int, default=os.cpu_count())
+    arguments.add_argument('--format', choices=('obj', 'asm'), default='obj')
+    options = arguments.parse_args()
+
+    c_parser = CParser()
+    c_parser.build()
+    irs = []
+    for seed in range(options.modules):
+        visitor = IR()
+        fold(c_parser.parse(program(options.statements, seed))).accept(visitor)
+        irs.append(str(visitor.module))
+    print(f'{options.modules} modules of {options.statements} statements, {os.cpu_count()} CPUs')
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ObjectCache(directory)
+        runs = [
+            ('serial', lambda: emit_many(irs, options.format, jobs=1)),
+            (f'pool of {options.jobs}', lambda: emit_many(irs, options.format, jobs=options.jobs)),
+            ('cold cache', lambda: emit_many(irs, options.format, jobs=options.jobs, cache=cache)),
+            ('warm cache', lambda: emit_many(irs, options.format, jobs=options.jobs, cache=cache)),
+        ]
+        for name, run in runs:
+            start = time.perf_counter()
+            codes = run()
+            elapsed = time.perf_counter() - start
+            print(f'    {name}: {elapsed * 1000:.1f} ms, {sum(map(len, codes)) / 1024:.0f} KiB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+import argparse
+import os
+import tempfile
+import time
+
+from src.compiler import Compiler
+
+"""
+    Wall time of Compiler.compile_many() over many small units for several worker counts.
+    Run from the clexer directory:
+        python -m benchmarks.batch --files 2000 --jobs 1 2 4 8
+"""
+
+UNIT = '''int main () {{
+    int total = {0};
+    total = total * 2 + {0};
+    while (total < 1000) {{ total = total + {0}; }}
+}}
+'''
+
+
+def main():
+    arguments = argparse.ArgumentParser(description='Batch compilation scaling')
+    arguments.add_argument('--files', type=int, default=2000)
+    arguments.add_argument('--jobs', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1])
+    options = arguments.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for index in range(options.files):
+            path = os.path.join(directory, f'unit{index}.c')
+            with open(path, 'w') as source:
+                source.write(UNIT.format(index + 1))
+            paths.append(path)
+
+        baseline = None
+        for jobs in sorted(set(options.jobs)):
+            start = time.perf_counter()
+            results = Compiler().compile_many(paths, jobs=jobs)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            failed = sum(1 for result in results if not result.ok)
+            print(f'jobs={jobs}: {elapsed:.2f} s, {len(paths) / elapsed:,.0f} files/s, '
+                  f'speedup {baseline / elapsed:.2f}x, failed {failed}')
+
+
+if __name__ == '__main__':
+    main()
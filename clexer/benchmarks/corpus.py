@@ -0,0 +1,202 @@
+import argparse
+import random
+
+from src.clexer import CLexer
+
+"""
+    Seeded generator of synthetic C sources for the benchmarks.
+    program() writes a valid program that goes through every production of CParser and
+    every visit method of IR: declarations with and without a value, assignments, blocks,
+    empty statements, if, if else, while and for statements, the boolean, relational and
+    arithmetic operators, and int (decimal, octal, hexadecimal, binary) and float literals in
+    all their forms, suffixes included. Every variable is declared once, before it is used
+    and only used in its scope, so the IR is valid.
+    unit() writes a translation unit of many such functions, main last.
+    lexer_corpus() adds what only the lexer accepts: strings, every reserved word, the
+    remaining operators, tabs and carriage returns, unterminated strings and illegal
+    characters. The same seed and size always give the same text.
+        python -m benchmarks.corpus --statements 20 --seed 1
+"""
+
+REL_OPS = ['<', '<=', '>', '>=']
+EQU_OPS = ['==', '!=']
+ADD_OPS = ['+', '-']
+MUL_OPS = ['*', '/', '%']
+INT_SUFFIXES = ['', '', '', 'u', 'L', 'UL', 'ull', 'LLU', 'i64']
+FLOAT_SUFFIXES = ['', '', '', 'f', 'F', 'L']
+
+EXTRAS = [
+    '"a string"', '"escaped \\" quote and \\\\ backslash"', '"unterminated\n', '& ! ~ | ^ ,', '0x1F 0XaB', '\tsizeof _Alignof ;\r', '@', '$',
+]
+
+
+class Generator:
+    def __init__(self, seed=0, depth=2) -> None:
+        self.rng = random.Random(seed)
+        self.depth = depth # Deepest nesting of blocks and control statements
+        self.variables = {'int': [], 'float': []}
+        self.count = 0
+
+    def program(self, statements) -> str:
+        self.count = 0
+        return self.function('main', statements)
+
+    def unit(self, functions, statements) -> str:
+        """functions functions of statements statements each, main is the last one"""
+        self.count = 0
+        names = [f'function_{index}' for index in range(functions - 1)] + ['main']
+        return ''.join(self.function(name, statements) for name in names)
+
+    def function(self, name, statements) -> str:
+        self.variables = {'int': [], 'float': []}
+
+        # Both types are declared up front so expressions always have variables to use
+        lines = [self.declaration('int', True), self.declaration('float', True)]
+        lines += [self.declaration() for _ in range(max(statements // 10, 1))]
+        lines += [self.statement(0) for _ in range(statements)]
+        return f'int {name} () {{\n' + '\n'.join('    ' + line for line in lines) + '\n}\n'
+
+    def statement(self, depth) -> str:
+        kinds = ['assignment'] * 6 + ['declaration'] * 2 + [';']
+        if depth < self.depth:
+            kinds += ['block', 'if', 'if else', 'while', 'for']
+        kind = self.rng.choice(kinds)
+
+        if kind == 'assignment':
+            return self.assignment() + ';'
+        if kind == 'declaration':
+            return self.declaration()
+        if kind == ';':
+            return ';'
+        if kind == 'block':
+            return self.block(depth + 1)
+
+        # A control statement takes the rest of its list as its body, the outer block ends it
+        scope = self.scope()
+        if kind == 'if':
+            inner = f'if ({self.expression()}) {self.block(depth + 1)}'
+        elif kind == 'if else':
+            inner = f'if ({self.expression()}) {self.block(depth + 1)} else {self.block(depth + 1)}'
+        elif kind == 'while':
+            inner = f'while ({self.expression()}) {self.block(depth + 1)}'
+        else:
+            counter = self.name('int')
+            header = f'int {counter} = {self.literal("int")}; {counter} < {self.literal("int")}; {counter} = {counter} + 1'
+            self.variables['int'].append(counter)
+            inner = f'for ({header}) {self.block(depth + 1)}'
+        self.leave(scope)
+        return '{ ' + inner + ' }'
+
+    def block(self, depth) -> str:
+        scope = self.scope()
+        statements = [self.statement(depth) for _ in range(self.rng.randint(1, 3))]
+        self.leave(scope)
+        return '{\n' + '\n'.join('    ' * (depth + 1) + statement for statement in statements) + '\n' + '    ' * depth + '}'
+
+    def scope(self) -> dict:
+        """Number of variables of every type in scope, leave() forgets the ones declared after"""
+        return {type: len(names) for type, names in self.variables.items()}
+
+    def leave(self, scope) -> None:
+        for type, count in scope.items():
+            del self.variables[type][count:]
+
+    def declaration(self, type=None, initialized=None) -> str:
+        type = type or self.rng.choice(['int', 'float'])
+        if initialized is None:
+            initialized = self.rng.random() < 0.7
+        name = self.name(type)
+
+        text = f'{type} {name} = {self.equality()};' if initialized else f'{type} {name};'
+        self.variables[type].append(name) # Declared after its value, which can not use it
+        return text
+
+    def assignment(self) -> str:
+        type = self.rng.choice(['int', 'float'])
+        return f'{self.rng.choice(self.variables[type])} = {self.equality()}'
+
+    def name(self, type) -> str:
+        self.count += 1
+        return f'{"value" if type == "int" else "ratio"}_{self.count}'
+
+    # Expressions follow the grammar: || over && over == and != over relations over + and - over * / %
+    def expression(self) -> str:
+        return ' || '.join(self.conjunction() for _ in range(self.rng.choice([1, 1, 2])))
+
+    def conjunction(self) -> str:
+        return ' && '.join(self.equality() for _ in range(self.rng.choice([1, 1, 2])))
+
+    def equality(self) -> str:
+        if self.rng.random() < 0.2:
+            return f'{self.relation()} {self.rng.choice(EQU_OPS)} {self.relation()}'
+        return self.relation()
+
+    def relation(self) -> str:
+        if self.rng.random() < 0.3:
+            return f'{self.addition()} {self.rng.choice(REL_OPS)} {self.addition()}'
+        return self.addition()
+
+    def addition(self) -> str:
+        terms = [self.term() for _ in range(self.rng.randint(1, 3))]
+        return ''.join(f' {self.rng.choice(ADD_OPS)} {term}' if index else term for index, term in enumerate(terms))
+
+    def term(self) -> str:
+        factors = [self.primary() for _ in range(self.rng.choice([1, 1, 2]))]
+        return ''.join(f' {self.rng.choice(MUL_OPS)} {factor}' if index else factor for index, factor in enumerate(factors))
+
+    def primary(self) -> str:
+        choice = self.rng.random()
+        variables = self.variables['int' if choice < 0.25 else 'float']
+        if choice < 0.5 and variables:
+            return self.rng.choice(variables)
+        return self.literal('int' if choice < 0.75 else 'float')
+
+    def literal(self, type) -> str:
+        value = self.rng.randint(1, 999)
+        if type == 'int':
+            digits = self.rng.choice([str(value), f'0{value:o}', f'0x{value:x}', f'0X{value:X}', f'0b{value:b}'])
+            return digits + self.rng.choice(INT_SUFFIXES)
+
+        suffix = self.rng.choice(FLOAT_SUFFIXES)
+        exponent = self.rng.choice(['e', 'E']) + self.rng.choice(['', '+', '-']) + str(self.rng.randint(0, 3))
+        return self.rng.choice([f'{value}.{value % 100}', f'.{value}', f'{value}.', f'{value}{exponent}', f'{value}.{value % 10}{exponent}', f'.{value}{exponent}']) + suffix
+
+    def lexer_corpus(self, statements) -> str:
+        """A program with lines only the lexer accepts mixed in, it does not parse"""
+        lines = self.program(statements).split('\n')
+        words = list(CLexer.reserved)
+        extras = [' '.join(self.rng.sample(words, 4)) for _ in range(len(lines) // 4)]
+        extras += [self.rng.choice(EXTRAS) for _ in range(len(lines) // 4)]
+        for extra in extras:
+            lines.insert(self.rng.randrange(len(lines) + 1), extra)
+        return '\n'.join(lines)
+
+
+def program(statements, seed=0) -> str:
+    return Generator(seed).program(statements)
+
+
+def unit(functions, statements, seed=0) -> str:
+    return Generator(seed).unit(functions, statements)
+
+
+def lexer_corpus(statements, seed=0) -> str:
+    return Generator(seed).lexer_corpus(statements)
+
+
+def main():
+    arguments = argparse.ArgumentParser(description='Print a synthetic C program')
+    arguments.add_argument('--statements', type=int, default=20)
+    arguments.add_argument('--seed', type=int, default=0)
+    arguments.add_argument('--functions', type=int, default=1, help='functions of the unit, each of --statements statements')
+    arguments.add_argument('--lexer', action='store_true', help='include what only the lexer accepts')
+    options = arguments.parse_args()
+
+    if options.lexer:
+        print(lexer_corpus(options.statements, options.seed), end='')
+    else:
+        print(unit(options.functions, options.statements, options.seed), end='')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+import argparse
+import random
+import time
+
+from src.clexer import CLexer
+
+"""
+    Tokens per second of the 'ply' and 'scanner' lexer engines on the same input.
+    Run from the clexer directory:
+        python -m benchmarks.engines --tokens 500000
+"""
+
+FRAGMENTS = [
+    'int', 'float', 'while', 'for', 'if', 'else', 'counter', 'x', 'value_1', 'total',
+    '(', ')', '{', '}', ';', '=', '+', '-', '*', '/', '<', '<=', '>=', '==', '!=', '&&', '||',
+    '0', '42', '0755', '3.25', '.5', '1e-3', '"a string literal"',
+]
+
+
+def source(tokens, seed=0) -> str:
+    generator = random.Random(seed)
+    return ' '.join(generator.choice(FRAGMENTS) for _ in range(tokens))
+
+
+def main():
+    arguments = argparse.ArgumentParser(description='Lexer engine throughput')
+    arguments.add_argument('--tokens', type=int, default=500000)
+    options = arguments.parse_args()
+
+    text = source(options.tokens)
+    for engine in CLexer.engines:
+        c_lexer = CLexer()
+        c_lexer.build(engine=engine)
+        c_lexer.lexer.input(text)
+        start = time.perf_counter()
+        count = sum(1 for _ in c_lexer.lexer)
+        elapsed = time.perf_counter() - start
+        print(f'{engine}: {count} tokens in {elapsed:.3f} s, {count / elapsed:,.0f} tokens/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import random
+import time
+
+from src.cparser import CParser
+from src.incremental import IncrementalParser
+
+"""
+    Latency of an edit applied with IncrementalParser versus parsing the whole text again.
+    Run from the clexer directory:
+        python -m benchmarks.incremental --lines 2000 --edits 200
+"""
+
+LINES = [
+    'value_{0} = value_{0} + {0};',
+    '{{ if (value_{0} < {0}) {{ value_{0} = value_{0} * 2; }} else {{ value_{0} = 0; }} }}',
+    '{{ while (value_{0} > 0) {{ value_{0} = value_{0} - 1; }} }}',
+    'ratio = ratio * 1.5 + {0};',
+]
+
+
+def source(lines) -> str:
+    declarations = [f'int value_{line} = {line};' for line in range(lines)] + ['float ratio = 0.5;']
+    statements = [LINES[line % len(LINES)].format(line) for line in range(lines)]
+    return 'int main () {\n' + '\n'.join(declarations + statements) + '\n}\n'
+
+
+def edit(text, rng) -> tuple:
+    """A keystroke on the statements: a digit typed into a literal, or a statement inserted"""
+    body = text.index('ratio = ratio')
+    offset = text.index(';', rng.randrange(body, len(text) - 10)) + 1
+    kind = rng.randrange(3)
+    if kind == 0:
+        return offset - 1, 0, '7'
+    if kind == 1:
+        return offset, 0, ' ratio = 2;'
+    return offset, 0, ' ;'
+
+
+def main():
+    arguments = argparse.ArgumentParser(description='Incremental reparse latency')
+    arguments.add_argument('--lines', type=int, default=2000)
+    arguments.add_argument('--edits', type=int, default=200)
+    arguments.add_argument('--seed', type=int, default=0)
+    options = arguments.parse_args()
+
+    text = source(options.lines)
+    parser = CParser()
+    parser.build()
+    incremental = IncrementalParser(parser)
+
+    start = time.perf_counter()
+    incremental.parse(text)
+    full = time.perf_counter() - start
+
+    rng = random.Random(options.seed)
+    latencies = []
+    for _ in range(options.edits):
+        offset, deleted, inserted = edit(incremental.text, rng)
+        start = time.perf_counter()
+        incremental.edit(offset, deleted, inserted)
+        latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    print(f'{options.lines} lines, {len(incremental.tokens)} tokens, last edit: {incremental.mode}')
+    print(f'full parse: {full * 1000:.1f}ms')
+    print(f'edit: median {latencies[len(latencies) // 2] * 1000:.2f}ms, '
+          f'p95 {latencies[int(len(latencies) * 0.95)] * 1000:.2f}ms, max {latencies[-1] * 1000:.2f}ms '
+          f'({full / latencies[len(latencies) // 2]:.0f}x faster than a full parse)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+import argparse
+import gc
+import pickle
+import tracemalloc
+
+from benchmarks.corpus import program
+from benchmarks.positions import best
+from src.clexer import CLexer
+from src.cparser import CParser
+from src.interning import ConstantPool, SymbolTable
+from src.literals import float_value, int_value
+
+"""
+    Interned identifiers and constants against a fresh string and value for every token,
+    on a synthetic program that repeats a few names and constants many times:
+        parse   CParser.parse() of the program, for every engine and value policy
+        memory  bytes held by the AST, with and without the interning tables of the parser,
+                traced with tracemalloc
+        pickle  size of the pickled AST, as the compile cache stores it
+    Run from the clexer directory:
+        python -m benchmarks.interning --statements 5000
+"""
+
+class PlainSymbols(SymbolTable):
+    def __init__(self) -> None:
+        super().__init__()
+        self.intern = str
+
+
+class PlainConstants(ConstantPool):
+    def int_value(self, text) -> int:
+        return int_value(text)
+
+    def float_value(self, text) -> float:
+        return float_value(text)
+
+    def int_values(self, texts) -> list:
+        return [int_value(text) for text in texts]
+
+    def float_values(self, texts) -> list:
+        return [float_value(text) for text in texts]
+
+
+def parser(engine, values, interned) -> CParser:
+    c_parser = CParser()
+    c_parser.build(engine=engine, values=values)
+    if not interned:
+        c_parser.symbols = c_parser.c_lexer.symbols = PlainSymbols()
+        c_parser.constants = c_parser.c_lexer.constants = PlainConstants()
+    return c_parser
+
+
+def footprint(c_parser, text) -> tuple:
+    """(bytes held by the AST and the tables of the parser, bytes held by the AST alone, bytes of its pickle)"""
+    gc.collect()
+    tracemalloc.start()
+    ast = c_parser.parse(text)
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0]
+    c_parser.symbols.clear()
+    c_parser.constants.clear()
+    alone = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return held, alone, len(pickle.dumps(ast, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def main():
+    arguments = argparse.ArgumentParser(description='Interned identifiers and constants')
+    arguments.add_argument('--statements', type=int, default=5000)
+    arguments.add_argument('--repeat', type=int, default=3)
+    options = arguments.parse_args()
+
+    text = program(options.statements)
+    for engine in CLexer.engines:
+        for values in CLexer.value_policies:
+            interned, plain = parser(engine, values, True), parser(engine, values, False)
+            with_time, without_time = best([lambda: interned.parse(text), lambda: plain.parse(text)], options.repeat)
+            print(f'{engine} {values}: parse interned {with_time * 1000:.1f} ms, plain {without_time * 1000:.1f} ms ({(with_time / without_time - 1) * 100:+.1f}% time)')
+
+    interned, plain = footprint(parser('ply', 'eager', True), text), footprint(parser('ply', 'eager', False), text)
+    for name, with_size, without_size in zip(('memory with the tables', 'memory of the AST', 'pickle'), interned, plain):
+        print(f'    {name}: interned {with_size / 1e6:.2f} MB, plain {without_size / 1e6:.2f} MB ({(with_size / without_size - 1) * 100:+.1f}%)')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+import argparse
+import random
+
+from benchmarks.positions import best
+from src.clexer import CLexer
+from src.keywords import DIALECTS, RESERVED, keywords
+
+"""
+    Keyword classification of identifier heavy code.
+    The identifiers of the source are classified once by every strategy:
+        dict     one lookup in the dict of the dialect, what the lexer does
+        buckets  a lookup keyed on length and first character, then one in the few words left
+        trie     a character trie of the keywords
+    Then the source is lexed with every engine and dialect, in tokens per second.
+    Run from the clexer directory:
+        python -m benchmarks.keywords --tokens 200000
+"""
+
+NAMES = ['i', 'j', 'x', 'count', 'total', 'value_1', 'a1b', 'buffer_size', 'next', 'result', '_tmp', 'Node2d', 'iffy', 'format']
+
+
+def source(tokens, seed=0) -> str:
+    """Identifiers and keywords of every dialect, a third of them keywords, some statements between them"""
+    generator = random.Random(seed)
+    words = list(RESERVED)
+    parts = []
+    for index in range(tokens):
+        parts.append(generator.choice(words) if index % 3 == 0 else generator.choice(NAMES))
+        if index % 8 == 7:
+            parts.append(';\n')
+    return ' '.join(parts)
+
+
+def buckets(table) -> dict:
+    grouped = {}
+    for word, type in table.items():
+        grouped.setdefault((len(word), word[0]), {})[word] = type
+    return grouped
+
+
+def trie(table) -> dict:
+    root = {}
+    for word, type in table.items():
+        node = root
+        for char in word:
+            node = node.setdefault(char, {})
+        node[None] = type
+    return root
+
+
+def classifiers(table) -> dict:
+    grouped = buckets(table)
+    root = trie(table)
+
+    def by_dict(words):
+        get = table.get
+        return [get(word, 'IDENTIFIER') for word in words]
+
+    def by_buckets(words):
+        get = grouped.get
+        types = []
+        for word in words:
+            bucket = get((len(word), word[0]))
+            types.append(bucket.get(word, 'IDENTIFIER') if bucket else 'IDENTIFIER')
+        return types
+
+    def by_trie(words):
+        types = []
+        for word in words:
+            node = root
+            for char in word:
+                node = node.get(char)
+                if node is None:
+                    break
+            types.append(node.get(None, 'IDENTIFIER') if node is not None else 'IDENTIFIER')
+        return types
+
+    return {'dict': by_dict, 'buckets': by_buckets, 'trie': by_trie}
+
+
+def main():
+    arguments = argparse.ArgumentParser(description='Keyword classification and identifier heavy lexing')
+    arguments.add_argument('--tokens', type=int, default=200000)
+    arguments.add_argument('--repeat', type=int, default=5)
+    options = arguments.parse_args()
+
+    text = source(options.tokens)
+    words = [word for word in text.split() if word != ';']
+
+    table = keywords()
+    strategies = classifiers(table)
+    expected = strategies['dict'](words)
+    for name, classify in strategies.items():
+        if classify(words) != expected:
+            raise AssertionError(f'{name} does not classify like the dict')
+        seconds, = best([lambda: classify(words)], options.repeat)
+        print(f'classify {name}: {len(words)} identifiers in {seconds * 1000:.1f} ms, {len(words) / seconds:,.0f}/s')
+
+    for engine in CLexer.engines:
+        for dialect in DIALECTS:
+            c_lexer = CLexer()
+            c_lexer.build(engine=engine, dialect=dialect)
+
+            def lex():
+                c_lexer.input(text)
+                return sum(1 for _ in c_lexer)
+
+            count = lex()
+            seconds, = best([lex], options.repeat)
+            print(f'lex {engine} {dialect}: {count} tokens in {seconds * 1000:.1f} ms, {count / seconds:,.0f} tokens/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+import argparse
+import random
+
+from benchmarks.positions import best
+from src import literals
+from src.clexer import CLexer
+from src.literals import float_value, float_values, int_value, int_values
+
+"""
+    Eager against deferred conversion of numeric literals, on a generated constant table:
+    rows of comma separated integers in every base and with suffixes, and some floats.
+        convert  the literals alone, one at a time and as a batch (NumPy when installed)
+        lex      the table through token(), batch() and tokenize_buffer() with both policies
+    Run from the clexer directory:
+        python -m benchmarks.literals --values 200000
+"""
+
+def table(count, seed=0) -> str:
+    generator = random.Random(seed)
+    values = []
+    for _ in range(count):
+        value = generator.randint(0, 1 << 31)
+        if generator.random() < 0.1:
+            values.append(f'{value / 1000:.3f}f')
+        else:
+            values.append(generator.choice([str(value), f'0x{value:X}', f'0b{value:b}', f'0{value:o}']) + generator.choice(['', 'u', 'UL']))
+    rows = [', '.join(values[start:start + 16]) for start in range(0, count, 16)]
+    return 'int table = {\n' + ',\n'.join(rows) + '\n};\n'
+
+
+def main():
+    arguments = argparse.ArgumentParser(description='Eager and deferred numeric literal conversion')
+    arguments.add_argument('--values', type=int, default=200000)
+    arguments.add_argument('--repeat', type=int, default=5)
+    options = arguments.parse_args()
+
+    text = table(options.values)
+    lexers = {}
+    for values in CLexer.value_policies:
+        lexers[values] = CLexer()
+        lexers[values].build(values=values)
+
+    buffer = lexers['eager'].tokenize_buffer(text)
+    ints = [buffer.text(index) for index in range(len(buffer)) if buffer.type(index) == 'INT']
+    floats = [buffer.text(index) for index in range(len(buffer)) if buffer.type(index) == 'FLOAT']
+    print(f'{len(ints)} integers and {len(floats)} floats, NumPy {"installed" if literals.numpy else "missing"}')
+
+    for name, texts, scalar, batch in (('int', ints, int_value, int_values), ('float', floats, float_value, float_values)):
+        one, many = best([lambda: [scalar(text) for text in texts], lambda: batch(texts)], options.repeat)
+        print(f'    convert {name}: one at a time {one * 1000:.1f} ms, batch {many * 1000:.1f} ms ({(many / one - 1) * 100:+.1f}% time)')
+
+    def through_token(c_lexer):
+        c_lexer.input(text)
+        return list(c_lexer)
+
+    def through_batch(c_lexer):
+        c_lexer.input(text)
+        return c_lexer.batch()
+
+    def through_buffer(c_lexer):
+        # Every value is read, as a parse would
+        buffer = c_lexer.tokenize_buffer(text)
+        return [buffer.value(index) for index in range(len(buffer))]
+
+    for name, run in (('token', through_token), ('batch', through_batch), ('tokenize_buffer', through_buffer)):
+        eager, deferred = best([lambda: run(lexers['eager']), lambda: run(lexers['deferred'])], options.repeat)
+        print(f'    lex {name}: eager {eager * 1000:.1f} ms, deferred {deferred * 1000:.1f} ms ({(deferred / eager - 1) * 100:+.1f}% time)')
+
+
+if __name__ == '__main__':
+    main()
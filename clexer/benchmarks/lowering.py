@@ -0,0 +1,50 @@
+import argparse
+import os
+
+from benchmarks.corpus import unit
+from benchmarks.positions import best
+from src.cparser import CParser
+from src.folding import fold
+from src.lowering import lower
+
+"""
+    Lowering of one translation unit of many functions with lower():
+        serial  every function lowered by one IR visitor in this process
+        pool    the functions spread over 1, 2, 4, ... up to --jobs worker processes, the
+                speedup should follow the number of CPUs until the workers run out of them
+    Every run gives the same module, which is checked.
+    Run from the clexer directory:
+        python -m benchmarks.lowering --functions 64 --statements 200 --jobs 4
+"""
+
+def main():
+    arguments = argparse.ArgumentParser(description='Parallel lowering of the functions of a unit')
+    arguments.add_argument('--functions', type=int, default=64)
+    arguments.add_argument('--statements', type=int, default=200, help='statements of every function')
+    arguments.add_argument('--jobs', type=int, default=os.cpu_count())
+    arguments.add_argument('--repeat', type=int, default=3)
+    options = arguments.parse_args()
+
+    c_parser = CParser()
+    c_parser.build()
+    ast = fold(c_parser.parse(unit(options.functions, options.statements)))
+    print(f'{options.functions} functions of {options.statements} statements, {os.cpu_count()} CPUs')
+
+    serial = lower(ast)
+    jobs = [1]
+    while jobs[-1] * 2 <= options.jobs:
+        jobs.append(jobs[-1] * 2)
+    if jobs[-1] != options.jobs:
+        jobs.append(options.jobs)
+    for count in jobs[1:]:
+        if lower(ast, count) != serial:
+            raise AssertionError(f'The module lowered by {count} processes differs from the serial one')
+
+    times = best([lambda count=count: lower(ast, count) for count in jobs], options.repeat)
+    for count, seconds in zip(jobs, times):
+        name = 'serial' if count == 1 else f'pool of {count}'
+        print(f'    {name}: {seconds * 1000:.1f} ms ({times[0] / seconds:.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import random
+import time
+
+from src.clexer import CLexer
+from src.positions import LineIndex
+
+"""
+    Cost of giving every token its line and column. PLY's lexer object is timed bare and
+    wrapped by CLexer.token, which looks positions up in a LineIndex. The scanner always sets
+    them, its share of the time spent on the LineIndex is shown instead. The scanner is the
+    default engine, so only a lexer built with engine='ply' pays for the wrapper.
+    Run from the clexer directory:
+        python -m benchmarks.positions --lines 100000
+"""
+
+LINES = [
+    'int counter_{0} = {0};',
+    'float ratio_{0} = {0}.25e-1 * counter_{0};',
+    '',
+    '    counter_{0} = counter_{0} + 1;',
+    'while (counter_{0} <= 100 && ratio_{0} != 0) {{ counter_{0} = counter_{0} * 2; }}',
+]
+
+
+def source(lines) -> str:
+    return '\n'.join(LINES[line % len(LINES)].format(line) for line in range(lines)) + '\n'
+
+
+def best(runs, repeat) -> list:
+    """Shortest time of every run, the runs take turns so they see the same machine load"""
+    times = [[] for _ in runs]
+    for _ in range(repeat):
+        for run, samples in zip(runs, times):
+            start = time.perf_counter()
+            run()
+            samples.append(time.perf_counter() - start)
+    return [min(samples) for samples in times]
+
+
+def main():
+    arguments = argparse.ArgumentParser(description='Line and column tracking overhead')
+    arguments.add_argument('--lines', type=int, default=100000)
+    arguments.add_argument('--repeat', type=int, default=5)
+    options = arguments.parse_args()
+
+    text = source(options.lines)
+    print(f'{options.lines} lines, {len(text) / (1 << 20):.1f} MB of source')
+
+    build, = best([lambda: LineIndex(text)], options.repeat)
+    print(f'LineIndex: built in {build * 1000:.1f} ms')
+
+    index = LineIndex(text)
+    offsets = [random.randrange(len(text)) for _ in range(100000)]
+    query, = best([lambda: [index.position(offset) for offset in offsets]], options.repeat)
+    print(f'LineIndex.position: {query / len(offsets) * 1e9:.0f} ns per query')
+
+    c_lexer = CLexer()
+    c_lexer.build(engine='ply')
+
+    def bare():
+        c_lexer.lexer.input(text)
+        return sum(1 for _ in c_lexer.lexer)
+
+    def positioned():
+        c_lexer.input(text)
+        return sum(1 for _ in c_lexer)
+
+    count = bare()
+    without, with_positions = best([bare, positioned], options.repeat)
+    print(f'ply: {count} tokens, {count / without:,.0f} tokens/s bare, {count / with_positions:,.0f} tokens/s '
+          f'with positions ({(with_positions / without - 1) * 100:+.1f}% time)')
+
+    c_lexer.build(engine='scanner')
+    elapsed, = best([positioned], options.repeat)
+    print(f'scanner: {count / elapsed:,.0f} tokens/s with positions, {build / elapsed * 100:.1f}% of the time on the LineIndex')
+
+
+if __name__ == '__main__':
+    main()
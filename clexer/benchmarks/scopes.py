@@ -0,0 +1,110 @@
+import argparse
+
+from benchmarks.positions import best
+from src.cparser import CParser
+from src.folding import fold
+from src.ir import IR
+from src.scopes import Scopes, SemanticError
+
+"""
+    Scopes, the versioned map of src.scopes, against the two usual symbol tables on code
+    nested --depth levels deep:
+        chain   a stack of dicts, one per scope, a lookup searches them from the innermost
+        copy    a dict copied on every scope entry, a lookup is one dict access
+    Every level declares a variable and shadows x, then reads the outermost variable, x and
+    the variable of the level above. The chain pays for the depth on every lookup and the
+    copy on every entry, so both are quadratic in the depth while Scopes stays linear.
+        compile  fold and IR of a program of that many nested blocks, with the Scopes of the
+                 passes, the time per level should not grow with the depth
+    Run from the clexer directory:
+        python -m benchmarks.scopes --depth 1000 4000 16000
+"""
+
+class ChainScopes:
+    def __init__(self) -> None:
+        self.scopes = []
+
+    def enter(self, kind='block') -> None:
+        self.scopes.append({})
+
+    def leave(self) -> None:
+        self.scopes.pop()
+
+    def declare(self, name, type, storage='auto') -> tuple:
+        if name in self.scopes[-1]:
+            raise SemanticError(f"Variable '{name}' is already declared")
+        self.scopes[-1][name] = symbol = (name, type, storage)
+        return symbol
+
+    def lookup(self, name):
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return None
+
+
+class CopyScopes:
+    def __init__(self) -> None:
+        self.scopes = [] # (symbols of the scope, symbols declared in it)
+
+    def enter(self, kind='block') -> None:
+        self.scopes.append((dict(self.scopes[-1][0]) if self.scopes else {}, set()))
+
+    def leave(self) -> None:
+        self.scopes.pop()
+
+    def declare(self, name, type, storage='auto') -> tuple:
+        symbols, declared = self.scopes[-1]
+        if name in declared:
+            raise SemanticError(f"Variable '{name}' is already declared")
+        declared.add(name)
+        symbols[name] = symbol = (name, type, storage)
+        return symbol
+
+    def lookup(self, name):
+        return self.scopes[-1][0].get(name)
+
+
+def nested(table, depth) -> None:
+    table.enter('function')
+    table.declare('outer', 'int')
+    table.declare('x', 'int')
+    for level in range(depth):
+        table.enter()
+        table.declare(f'v{level}', 'int')
+        table.declare('x', 'float')
+        table.lookup('outer')
+        table.lookup('x')
+        table.lookup(f'v{level - 1}')
+    for level in range(depth + 1):
+        table.leave()
+
+
+def source(depth) -> str:
+    return 'int main () { int x = 0; ' + '{ int x = 1; float y = x + 2; x = x * 3; ' * depth + '}' * depth + ' x = x + 1; }'
+
+
+def compile_ast(ast) -> None:
+    fold(ast).accept(IR())
+
+
+def main():
+    arguments = argparse.ArgumentParser(description='Scoped symbol tables on deeply nested code')
+    arguments.add_argument('--depth', type=int, nargs='+', default=[1000, 4000, 16000])
+    arguments.add_argument('--repeat', type=int, default=3)
+    options = arguments.parse_args()
+
+    c_parser = CParser()
+    c_parser.build()
+    for depth in options.depth:
+        times = best([lambda table=table: nested(table(), depth) for table in (Scopes, ChainScopes, CopyScopes)], options.repeat)
+        print(f'depth {depth}: ' + ', '.join(f'{name} {seconds * 1000:.1f} ms' for name, seconds in zip(('scopes', 'chain', 'copy'), times)))
+
+        text = source(depth)
+        asts = [c_parser.parse(text) for _ in range(options.repeat)]
+        seconds, = best([lambda: compile_ast(asts.pop())], options.repeat)
+        print(f'    compile: {seconds * 1000:.1f} ms, {seconds / depth * 1e6:.1f} us per level')
+
+
+if __name__ == '__main__':
+    main()
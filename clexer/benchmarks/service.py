@@ -0,0 +1,56 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks.corpus import program
+from src.service import MODES, CompileService, ServiceClient
+
+"""
+    Throughput and latency of the compile service under concurrent clients, for thread
+    and process workers. Every client sends its requests one after the other over its own
+    Unix socket connection, the latencies are the ones the service reports in stats.
+    Run from the clexer directory:
+        python -m benchmarks.service --workers 4 --clients 16 --requests 20
+"""
+
+async def load(mode, options) -> None:
+    sources = [program(options.statements, seed) for seed in range(options.clients)]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'service.sock')
+        async with CompileService(options.workers, mode, max_pending=options.clients) as service:
+            await service.serve_unix(path)
+            clients = [await ServiceClient.connect_unix(path) for _ in range(options.clients)]
+
+            async def run(client, source):
+                for _ in range(options.requests):
+                    await client.compile(source)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(run(client, source) for client, source in zip(clients, sources)))
+            elapsed = time.perf_counter() - start
+
+            stats = service.stats()
+            for client in clients:
+                await client.close()
+
+    latency = ', '.join(f'{name} {value:.1f}' for name, value in stats['latency_ms'].items())
+    print(f'{mode}: {stats["served"]} requests in {elapsed:.2f} s, {stats["served"] / elapsed:.1f} requests/s, latency ms {latency}')
+
+
+def main():
+    arguments = argparse.ArgumentParser(description='Compile service throughput and latency')
+    arguments.add_argument('--workers', type=int, default=4)
+    arguments.add_argument('--clients', type=int, default=16)
+    arguments.add_argument('--requests', type=int, default=20, help='requests per client')
+    arguments.add_argument('--statements', type=int, default=100, help='statements of every program')
+    arguments.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    options = arguments.parse_args()
+
+    for mode in options.modes:
+        asyncio.run(load(mode, options))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import argparse
+
+from benchmarks.corpus import program
+from benchmarks.positions import best
+from src.cparser import CParser
+from src.folding import fold
+from src.ir import IR, MemoryIR
+from src.optimizer import count_instructions, optimize
+
+import llvmlite.binding as llvm
+
+"""
+    IR in SSA form against the stack slots IR used to give every variable (MemoryIR), which
+    left mem2reg to build the SSA form, on programs of benchmarks.corpus:
+        instructions  of the module as lowered, and after the O2 pipeline
+        lower         building the module from the folded AST
+        O2            parsing, verifying and optimizing the textual IR
+    Run from the clexer directory:
+        python -m benchmarks.ssa --statements 200 2000
+"""
+
+def lower(visitor, ast) -> str:
+    ast.accept(visitor)
+    return str(visitor.module)
+
+
+def main():
+    arguments = argparse.ArgumentParser(description='SSA lowering against stack slots and mem2reg')
+    arguments.add_argument('--statements', type=int, nargs='+', default=[200, 2000])
+    arguments.add_argument('--repeat', type=int, default=5)
+    options = arguments.parse_args()
+
+    c_parser = CParser()
+    c_parser.build()
+    for statements in options.statements:
+        ast = fold(c_parser.parse(program(statements)))
+        modules = {name: lower(visitor(), ast) for name, visitor in (('ssa', IR), ('memory', MemoryIR))}
+        print(f'{statements} statements')
+        for name, module in modules.items():
+            optimized = optimize(module, 2)
+            print(f'    {name}: {count_instructions(llvm.parse_assembly(module))} instructions, {optimized.after} after O2')
+
+        ssa, memory = best([lambda: lower(IR(), ast), lambda: lower(MemoryIR(), ast)], options.repeat)
+        print(f'    lower: ssa {ssa * 1000:.1f} ms, memory {memory * 1000:.1f} ms ({(ssa / memory - 1) * 100:+.1f}% time)')
+        ssa, memory = best([lambda: optimize(modules['ssa'], 2), lambda: optimize(modules['memory'], 2)], options.repeat)
+        print(f'    O2: ssa {ssa * 1000:.1f} ms, memory {memory * 1000:.1f} ms ({(ssa / memory - 1) * 100:+.1f}% time)')
+
+
+if __name__ == '__main__':
+    main()
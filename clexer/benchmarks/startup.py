@@ -0,0 +1,59 @@
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+
+"""
+    Startup benchmark: cold and warm Compiler.build_parser() with the table cache.
+    Every sample is a fresh interpreter, so import time is part of the measure.
+    Run from the clexer directory:
+        python -m benchmarks.startup --runs 10
+"""
+
+PROGRAM = '''
+import time
+start = time.perf_counter()
+from src.compiler import Compiler
+imported = time.perf_counter()
+compiler = Compiler(cache_dir={cache_dir!r})
+compiler.build_parser()
+print(imported - start, time.perf_counter() - imported)
+'''
+
+
+def sample(cache_dir) -> tuple:
+    output = subprocess.run(
+        [sys.executable, '-c', PROGRAM.format(cache_dir=cache_dir)],
+        check=True, capture_output=True, text=True,
+    )
+    imported, built = output.stdout.split()[-2:]
+    return float(imported), float(built)
+
+
+def main():
+    arguments = argparse.ArgumentParser(description='Cold and warm parser startup time')
+    arguments.add_argument('--runs', type=int, default=10)
+    options = arguments.parse_args()
+
+    cold = []
+    for _ in range(options.runs):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cold.append(sample(cache_dir))
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        sample(cache_dir)
+        warm = [sample(cache_dir) for _ in range(options.runs)]
+
+    for name, samples in (('cold', cold), ('warm', warm)):
+        imported = statistics.median(imported for imported, _ in samples)
+        built = statistics.median(built for _, built in samples)
+        print(f'{name}: import {imported * 1000:.1f} ms, build_parser {built * 1000:.2f} ms')
+
+    cold_build = statistics.median(built for _, built in cold)
+    warm_build = statistics.median(built for _, built in warm)
+    print(f'build_parser speedup: {cold_build / warm_build:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
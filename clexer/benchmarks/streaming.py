@@ -0,0 +1,57 @@
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from src.clexer import CLexer
+
+"""
+    Peak Python memory of lexing a file as one string versus tokenize_file().
+    Run from the clexer directory:
+        python -m benchmarks.streaming --megabytes 1 4 16
+"""
+
+LINE = 'float value_1 = 3.25 * counter + 42; x = "a string literal";\n'
+
+
+def measure(run) -> tuple:
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = run()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, elapsed, peak
+
+
+def main():
+    arguments = argparse.ArgumentParser(description='Streaming tokenizer memory use')
+    arguments.add_argument('--megabytes', type=int, nargs='+', default=[1, 4, 16])
+    arguments.add_argument('--chunk-size', type=int, default=1 << 16)
+    options = arguments.parse_args()
+
+    c_lexer = CLexer()
+    c_lexer.build()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for megabytes in options.megabytes:
+            path = os.path.join(directory, f'{megabytes}.c')
+            with open(path, 'w') as source:
+                source.write(LINE * (megabytes * (1 << 20) // len(LINE)))
+
+            def whole():
+                with open(path) as source:
+                    c_lexer.lexer.input(source.read())
+                return sum(1 for _ in c_lexer.lexer)
+
+            def streamed():
+                return sum(1 for _ in c_lexer.tokenize_file(path, options.chunk_size))
+
+            for name, run in (('string', whole), ('stream', streamed)):
+                count, elapsed, peak = measure(run)
+                print(f'{megabytes:>4} MB {name}: {count} tokens, {elapsed:.2f} s, peak {peak / (1 << 20):.2f} MB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from benchmarks.corpus import lexer_corpus, program
+from src.clexer import CLexer
+from src.cparser import CParser
+from src.ir import IR
+
+"""
+    Throughput, latency and peak memory of every stage on the synthetic corpus of
+    benchmarks.corpus, for several program sizes and lexer engines:
+        lex    tokens of lexer_corpus(), which also has what only the lexer accepts
+        parse  CParser.parse() of program(), lexing included
+        ir     IR built from the AST of that parse
+    Times are the best of --repeat runs. Peak memory comes from one more run under
+    tracemalloc, so the tracing does not slow the timed runs down.
+    --json writes the results, --compare reads a file written by an earlier run and flags
+    every stage that got slower or bigger than --threshold allows, the exit status is 1
+    when there is any.
+    Run from the clexer directory:
+        python -m benchmarks.suite --sizes 100 1000 --json base.json
+        python -m benchmarks.suite --sizes 100 1000 --compare base.json
+"""
+
+def best(run, repeat) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def peak(run) -> int:
+    """Bytes allocated at most while run() runs"""
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def record(size, stage, engine, tokens, run, repeat) -> dict:
+    seconds = best(run, repeat)
+    return {
+        'size': size,
+        'stage': stage,
+        'engine': engine,
+        'tokens': tokens,
+        'seconds': seconds,
+        'tokens_per_second': tokens / seconds if tokens else None,
+        'peak_bytes': peak(run),
+    }
+
+
+def measure(size, seed=0, engines=CLexer.engines, repeat=5) -> list:
+    """One result per stage and engine for a program of size statements, the IR once"""
+    text = program(size, seed)
+    lexer_text = lexer_corpus(size, seed)
+    results = []
+    ast = None
+
+    for engine in engines:
+        c_parser = CParser()
+        c_parser.build(engine=engine)
+        c_lexer = c_parser.c_lexer
+
+        def lex():
+            c_lexer.input(lexer_text)
+            return sum(1 for _ in c_lexer)
+
+        def parse():
+            return c_parser.parse(text)
+
+        c_lexer.input(text)
+        tokens = sum(1 for _ in c_lexer)
+        ast = parse()
+        if ast is None or c_parser.diagnostics.count:
+            raise RuntimeError(f'The corpus of size {size} and seed {seed} does not parse: {list(c_parser.diagnostics)}')
+
+        results.append(record(size, 'lex', engine, lex(), lex, repeat))
+        results.append(record(size, 'parse', engine, tokens, parse, repeat))
+
+    # The AST is the same whatever the engine
+    if ast is not None:
+        results.append(record(size, 'ir', None, None, lambda: ast.accept(IR()), repeat))
+    return results
+
+
+def key(result) -> tuple:
+    return result['size'], result['stage'], result['engine']
+
+
+def compare(baseline, results, threshold=0.1) -> list:
+    """Messages for every result slower or bigger than its baseline by more than threshold"""
+    previous = {key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+
+        stage = ' '.join(filter(None, (result['stage'], result['engine'])))
+        for field, unit in (('seconds', 'time'), ('peak_bytes', 'peak memory')):
+            if old[field] and result[field] > old[field] * (1 + threshold):
+                change = (result[field] / old[field] - 1) * 100
+                regressions.append(f'{stage} size {result["size"]}: {unit} {change:+.1f}%')
+    return regressions
+
+
+def main():
+    arguments = argparse.ArgumentParser(description='Lexer, parser and IR benchmark suite')
+    arguments.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000], help='statements per program')
+    arguments.add_argument('--seed', type=int, default=0)
+    arguments.add_argument('--engines', nargs='+', choices=CLexer.engines, default=list(CLexer.engines))
+    arguments.add_argument('--repeat', type=int, default=5)
+    arguments.add_argument('--json', metavar='PATH', help='write the results to PATH')
+    arguments.add_argument('--compare', metavar='PATH', help='flag regressions against the results in PATH')
+    arguments.add_argument('--threshold', type=float, default=0.1, help='allowed slowdown, 0.1 is 10%%')
+    options = arguments.parse_args()
+
+    results = []
+    for size in options.sizes:
+        for result in measure(size, options.seed, options.engines, options.repeat):
+            rate = f'{result["tokens_per_second"]:>12,.0f} tokens/s' if result['tokens'] else ' ' * 21
+            print(f'{result["size"]:>6} {result["stage"]:<5} {result["engine"] or "":<7} {result["seconds"] * 1000:>9.2f} ms '
+                  f'{rate} {result["peak_bytes"] / (1 << 20):>8.2f} MB peak')
+            results.append(result)
+
+    if options.json:
+        with open(options.json, 'w') as output:
+            json.dump({
+                'seed': options.seed,
+                'repeat': options.repeat,
+                'python': platform.python_version(),
+                'results': results,
+            }, output, indent=2)
+
+    if options.compare:
+        with open(options.compare) as baseline:
+            regressions = compare(json.load(baseline)['results'], results, options.threshold)
+        for regression in regressions:
+            print(f'regression: {regression}')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.corpus import program
+from benchmarks.positions import best
+from src.clexer import CLexer
+from src.cparser import CParser
+
+"""
+    Cost of a parser for another thread and throughput of parsing from several threads.
+        build    a new CParser built from the cached tables, as every thread did before
+        clone    a clone of a built CParser, sharing its tables
+        threads  the same programs parsed by 1 to --threads threads, one clone each
+    Threads scale only as far as the GIL lets them, all the way on a free-threaded build.
+    Run from the clexer directory:
+        python -m benchmarks.threads --threads 4 --programs 64
+"""
+
+def main():
+    arguments = argparse.ArgumentParser(description='Parser clones and parsing from several threads')
+    arguments.add_argument('--threads', type=int, default=4)
+    arguments.add_argument('--programs', type=int, default=64)
+    arguments.add_argument('--statements', type=int, default=100)
+    arguments.add_argument('--repeat', type=int, default=5)
+    options = arguments.parse_args()
+
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f'Python {sys.version.split()[0]}, GIL {"enabled" if gil else "disabled"}')
+    sources = [program(options.statements, seed) for seed in range(options.programs)]
+
+    for engine in CLexer.engines:
+        c_parser = CParser()
+        c_parser.build(engine=engine)
+
+        def build():
+            CParser().build(engine=engine)
+
+        built, cloned = best([build, c_parser.clone], options.repeat)
+        print(f'{engine}: build {built * 1e6:.0f} us, clone {cloned * 1e6:.0f} us')
+
+        single = None
+        for threads in range(1, options.threads + 1):
+            parsers = [c_parser.clone() for _ in range(threads)]
+
+            def work(index):
+                parser = parsers[index]
+                for source in sources[index::threads]:
+                    parser.parse(source)
+
+            with ThreadPoolExecutor(threads) as executor:
+                def parse_all():
+                    list(executor.map(work, range(threads)))
+                elapsed, = best([parse_all], options.repeat)
+            single = single or elapsed
+            print(f'    {threads} threads: {options.programs / elapsed:.0f} programs/s ({single / elapsed:.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
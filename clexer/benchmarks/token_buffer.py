@@ -0,0 +1,67 @@
+import argparse
+import gc
+import time
+import tracemalloc
+
+from src.clexer import CLexer
+
+"""
+    Memory use and tokens per second of a list of LexToken objects versus a TokenBuffer.
+    Run from the clexer directory:
+        python -m benchmarks.token_buffer --lines 100000
+"""
+
+LINES = [
+    'int counter_{0} = {0};',
+    'float ratio_{0} = {0}.25e-1 * counter_{0};',
+    'counter_{0} = counter_{0} + 1;',
+    'while (counter_{0} <= 100 && ratio_{0} != 0) {{ counter_{0} = counter_{0} * 2; }}',
+    'x = "message number {0}";',
+]
+
+
+def source(lines) -> str:
+    return '\n'.join(LINES[line % len(LINES)].format(line) for line in range(lines)) + '\n'
+
+
+def measure(build) -> tuple:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    tokens = build()
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(tokens), elapsed, retained, peak
+
+
+def main():
+    arguments = argparse.ArgumentParser(description='TokenBuffer memory and throughput')
+    arguments.add_argument('--lines', type=int, default=100000)
+    options = arguments.parse_args()
+
+    text = source(options.lines)
+    c_lexer = CLexer()
+    c_lexer.build()
+
+    def token_list():
+        c_lexer.lexer.input(text)
+        return list(c_lexer.lexer)
+
+    def token_buffer():
+        return c_lexer.tokenize_buffer(text)
+
+    print(f'{options.lines} lines, {len(text) / (1 << 20):.1f} MB of source')
+    for name, build in (('LexToken list', token_list), ('TokenBuffer', token_buffer)):
+        count, elapsed, retained, peak = measure(build)
+        print(f'{name}: {count} tokens, {count / elapsed:,.0f} tokens/s, '
+              f'retained {retained / (1 << 20):.1f} MB, peak {peak / (1 << 20):.1f} MB')
+
+        # Time alone, tracemalloc slows allocation heavy code down
+        start = time.perf_counter()
+        build()
+        print(f'{"":>{len(name)}}  without tracing: {count / (time.perf_counter() - start):,.0f} tokens/s')
+
+
+if __name__ == '__main__':
+    main()
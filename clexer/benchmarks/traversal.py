@@ -0,0 +1,92 @@
+import argparse
+import sys
+
+from benchmarks.corpus import program
+from benchmarks.positions import best
+from src.cparser import CParser
+from src.folding import ConstantFolder
+from src.ir import IR, ASTNode, run, walk
+
+"""
+    Cost of visiting the AST with the explicit stack of run() and walk() against plain
+    recursion, on a synthetic program and on a deep chain of else if statements.
+    The recursive driver runs the same generator visit methods with a Python call for
+    every child, the way accept() used to dispatch, so only the dispatch differs.
+    Run from the clexer directory:
+        python -m benchmarks.traversal --statements 5000 --depth 20000
+"""
+
+def recursive(visitor, item) -> None:
+    if isinstance(item, list):
+        for child in item:
+            if isinstance(child, list): # A block, like run() does
+                visit(visitor, visitor.visit_block(child))
+            else:
+                recursive(visitor, child)
+    elif isinstance(item, ASTNode):
+        visit(visitor, item.accept(visitor))
+
+
+def visit(visitor, children) -> None:
+    if children is not None:
+        for child in children:
+            recursive(visitor, child)
+
+
+def recursive_walk(item, enter) -> None:
+    if isinstance(item, list):
+        for child in item:
+            recursive_walk(child, enter)
+    elif isinstance(item, ASTNode):
+        enter(item)
+        for name in item.children:
+            recursive_walk(getattr(item, name), enter)
+
+
+class RecursiveIR(IR):
+    def visit_function(self, node) -> None:
+        self.begin_function(node)
+        recursive(self, node.declarations)
+        recursive(self, node.statements)
+        self.end_function()
+
+
+def stages(ast) -> list:
+    """(name, iterative, recursive) of every traversal of ast"""
+    return [
+        ('walk', lambda: walk(ast, id), lambda: recursive_walk(ast, id)),
+        ('fold', lambda: run(ConstantFolder(), ast), lambda: recursive(ConstantFolder(), ast)),
+        ('ir', lambda: ast.accept(IR()), lambda: ast.accept(RecursiveIR())),
+    ]
+
+
+def main():
+    arguments = argparse.ArgumentParser(description='Explicit stack against recursive AST traversal')
+    arguments.add_argument('--statements', type=int, default=5000)
+    arguments.add_argument('--depth', type=int, default=20000, help='else if statements of the deep program')
+    arguments.add_argument('--repeat', type=int, default=5)
+    options = arguments.parse_args()
+
+    c_parser = CParser()
+    c_parser.build()
+    programs = [
+        (f'{options.statements} statements', program(options.statements)),
+        (f'{options.depth} nested else if', 'int main () { int x = 1; ' + 'if (x < 2) { x = 1; } else ' * options.depth + 'x = 2; }'),
+    ]
+
+    for title, text in programs:
+        ast = c_parser.parse(text)
+        print(title)
+        for name, iterative, recursive_run in stages(ast):
+            # Folding changes the tree in place, it is folded again every run but only the first run changes it
+            try:
+                iterative_time, recursive_time = best([iterative, recursive_run], options.repeat)
+                comparison = f'recursive {recursive_time * 1000:.1f} ms ({(iterative_time / recursive_time - 1) * 100:+.1f}% time)'
+            except RecursionError:
+                iterative_time, = best([iterative], options.repeat)
+                comparison = f'recursive fails past a depth of {sys.getrecursionlimit()}'
+            print(f'    {name}: explicit stack {iterative_time * 1000:.1f} ms, {comparison}')
+
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,9 @@ setup(
     install_requires=[
         'ply',
     ],
+    extras_require={
+        'numpy': ['numpy'], # Batch conversion of integer literals
+    },
     author=['Oscar Ramirez', 'Ruben Vazquez', 'Iker Guerrero'],
     author_email=['oscardiaz.dev@gmail.com', 'developerrv1024@gmail.com', 'ikerguerrero@yahoo.com'],
     description='Python based lexicographic c analyzer',
@@ -0,0 +1,92 @@
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+import llvmlite.binding as llvm
+
+from src.optimizer import target_machine
+
+"""
+    Native code generation: object files and assembly from the IR, and shared libraries
+    linked from the objects.
+        - emit turns one module, the ir.Module built by the IR visitor or its text, into the
+          bytes of an object file ('obj') or assembly text ('asm') for the host, through the
+          target machine of the thread. The code is position independent with the default
+          code model, so the objects can be linked into a shared library.
+        - emit_many emits many modules, fanning the ones that are not cached out over a
+          pool of worker processes. With an ObjectCache, modules whose IR was emitted before
+          skip code generation entirely.
+        - link_shared links objects into a shared library with the first linker found on
+          the PATH, cc, gcc, clang or ld, unless one is given.
+"""
+
+FORMATS = {'obj': '.o', 'asm': '.s'}
+LINKERS = ('cc', 'gcc', 'clang', 'ld')
+
+
+class BackendError(Exception):
+    pass
+
+
+def target() -> str:
+    """Everything besides the IR the code depends on, part of the key of every cached object"""
+    return f'{llvm.get_default_triple()}-llvm{".".join(map(str, llvm.llvm_version_info))}-pic-default'
+
+
+def emit(ir, format='obj') -> bytes:
+    if format not in FORMATS:
+        raise ValueError(f'Unknown output format {format!r}')
+
+    module = llvm.parse_assembly(str(ir), llvm.create_context())
+    module.verify()
+    machine = target_machine('pic', 'default')
+    module.triple = machine.triple
+    module.data_layout = str(machine.target_data)
+
+    if format == 'obj':
+        return machine.emit_object(module)
+    return machine.emit_assembly(module).encode('utf-8')
+
+
+def emit_many(irs, format='obj', jobs=None, cache=None) -> list:
+    """The code of every module of irs, in their order"""
+    irs = [str(ir) for ir in irs]
+    codes = [cache.lookup(ir, target(), format) if cache is not None else None for ir in irs]
+    missing = [index for index, code in enumerate(codes) if code is None]
+
+    jobs = min(jobs or os.cpu_count() or 1, max(len(missing), 1))
+    if jobs == 1:
+        emitted = [emit(irs[index], format) for index in missing]
+    else:
+        with ProcessPoolExecutor(jobs) as executor:
+            emitted = list(executor.map(emit, [irs[index] for index in missing], [format] * len(missing)))
+
+    for index, code in zip(missing, emitted):
+        codes[index] = code
+        if cache is not None:
+            cache.save(irs[index], target(), format, code)
+    return codes
+
+
+def find_linker():
+    for name in LINKERS:
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+
+def link_shared(paths, output, linker=None) -> str:
+    """Links the object files of paths into the shared library output, which is returned"""
+    linker = linker or find_linker()
+    if linker is None:
+        raise BackendError(f'No linker found, looked for {", ".join(LINKERS)}')
+
+    try:
+        process = subprocess.run([linker, '-shared', '-o', output, *paths], capture_output=True, text=True)
+    except OSError as exception:
+        raise BackendError(f'{linker}: {exception}') from exception
+    if process.returncode:
+        raise BackendError(f'{linker} failed with status {process.returncode}: {process.stderr.strip()}')
+    return output
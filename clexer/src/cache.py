@@ -0,0 +1,156 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+from src.tables import DEFAULT_CACHE_DIR
+
+"""
+    Content addressed on-disk cache.
+    ContentCache stores byte blobs under the hash of whatever produced them:
+        - Entries are written to a temporary file and moved in place atomically, so
+          several processes can share one directory without locks and a reader never
+          sees a partial entry.
+        - Reading an entry refreshes its modification time, and when the directory grows
+          past max_bytes the least recently used entries are removed.
+    CompilationCache keeps the AST, the IR and its instruction counts of a source on top of it, so unchanged
+    sources skip lexing, parsing and lowering.
+    ObjectCache keeps the native code emitted for an IR, so unchanged modules skip code generation.
+    Both can share one ContentCache (store), their keys never collide and a single bound and
+    LRU then cover all the entries of the directory.
+"""
+
+class ContentCache:
+    def __init__(self, directory=None, max_bytes=256 << 20):
+        self.directory = directory or os.path.join(DEFAULT_CACHE_DIR, 'objects')
+        self.max_bytes = max_bytes
+        self._size = None # Estimate of the directory size, refreshed on every eviction
+
+    @staticmethod
+    def key(*parts) -> str:
+        digest = hashlib.sha256()
+        for part in parts:
+            if isinstance(part, str):
+                part = part.encode('utf-8')
+            elif not isinstance(part, (bytes, bytearray)):
+                part = repr(part).encode('utf-8')
+            digest.update(len(part).to_bytes(8, 'little'))
+            digest.update(part)
+
+        return digest.hexdigest()
+
+    def path(self, key) -> str:
+        return os.path.join(self.directory, key[:2], key[2:])
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as entry:
+                data = entry.read()
+            os.utime(path)
+        except OSError:
+            return None
+
+        return data
+
+    def put(self, key, data) -> None:
+        path = self.path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, staging = tempfile.mkstemp(prefix='.staging-', dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as entry:
+                entry.write(data)
+            os.replace(staging, path)
+        except OSError:
+            return # The cache is an optimization, a failed write is not an error
+
+        if self._size is None:
+            self._size = self.size()
+        else:
+            self._size += len(data)
+
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def entries(self) -> list:
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.startswith('.staging-'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue # Removed by another process
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        return entries
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache is below 90% of max_bytes"""
+        entries = sorted(self.entries())
+        size = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 9 // 10
+
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            size -= entry_size
+
+        self._size = size
+
+    def clear(self) -> None:
+        for _, _, path in self.entries():
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        self._size = 0
+
+
+class CompilationCache:
+    def __init__(self, directory=None, max_bytes=256 << 20, store=None):
+        self.store = store if store is not None else ContentCache(directory, max_bytes)
+
+    def key(self, t_string, version) -> str:
+        return self.store.key('compilation', version, t_string)
+
+    def lookup(self, t_string, version):
+        data = self.store.get(self.key(t_string, version))
+        if data is None:
+            return None
+
+        try:
+            return pickle.loads(data)
+        except Exception:
+            return None # Damaged entry, compile again and overwrite it
+
+    def save(self, t_string, version, ast, ir, instructions=None) -> None:
+        try:
+            data = pickle.dumps((ast, ir, instructions), protocol=pickle.HIGHEST_PROTOCOL)
+        except RecursionError:
+            return # Too deep to serialize, it is compiled every time
+
+        self.store.put(self.key(t_string, version), data)
+
+
+class ObjectCache:
+    def __init__(self, directory=None, max_bytes=256 << 20, store=None):
+        self.store = store if store is not None else ContentCache(directory, max_bytes)
+
+    def key(self, ir, target, format) -> str:
+        return self.store.key('object', target, format, ir)
+
+    def lookup(self, ir, target, format):
+        return self.store.get(self.key(ir, target, format))
+
+    def save(self, ir, target, format, code) -> None:
+        self.store.put(self.key(ir, target, format), code)
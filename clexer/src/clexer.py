@@ -1,6 +1,17 @@
-import ply.lex as lex
+import codecs
+import mmap
+from array import array
+
 from ply.lex import TOKEN
 
+from src.diagnostics import Diagnostics
+from src.keywords import DEFAULT_DIALECT, RESERVED, keywords
+from src.interning import ConstantPool, SymbolTable
+from src.literals import BATCH_CONVERTERS, convert, float_value, int_value
+from src.positions import LineIndex
+from src.scanner import Scanner
+from src.tables import TableCache
+
 """
     FRONT-END: Syntactical Analysis
     Clexer is a class that produces a lexer capable of analysing the C source language.
@@ -11,13 +22,40 @@ from ply.lex import TOKEN
             - Binary
         - Floats
         - Literals
-        - Reserverd words
+        - Reserverd words, of the C dialect selected at build time (see src.keywords)
         - Strings
+    The lexer can be built with one of two engines that produce the same tokens:
+        - 'ply': PLY's combined master regex
+        - 'scanner': Scanner, which dispatches on the first character of every token, the
+          default: it is the faster one and the only one that locates tokens as it lexes them
+    Large sources can be tokenized from a file object, a memory map or a path without
+    reading them into a single string (tokenize_stream and tokenize_file).
+    tokenize_buffer returns a TokenBuffer, a compact token stream for large inputs.
+    Tokens read through input and token (and the streams) carry their line and column,
+    looked up in a LineIndex of the input instead of counting newlines as they are lexed.
+    The scanner does it on its own, PLY's lexer is wrapped, which costs a third of its speed.
+    A CLexer is not shared between threads: every thread lexes with its own clone().
+    Identifiers and the values of numeric literals are interned in the symbols and constants
+    of the lexer (see src.interning), equal tokens share one string or one value.
+    Illegal characters and unterminated strings are reported to the diagnostics collector.
 """
 
+DEFAULT_ENGINE = 'scanner'
+
 class CLexer():
     def __init__(self):
         self.lexer = None
+        self.diagnostics = Diagnostics()
+        self.index = None # LineIndex of the current input
+        self.base = 0 # Offset of the current input in the whole source, for streams
+        self.lineno = 1 # Line of the last token, it starts at line_start and the next one at next_line
+        self.line_start = 0
+        self.next_line = 0
+        self.keywords = keywords() # Token type of every keyword of the dialect built
+        self.deferred = False # Numeric values are converted in batches, see value_policies
+        self.next_token = None # Next located token, before its value is converted
+        self.symbols = SymbolTable() # Identifiers and numeric literals are interned, see src.interning
+        self.constants = ConstantPool()
 
     states = (
         ('string', 'exclusive'),
@@ -37,22 +75,28 @@ class CLexer():
     integer_suffix_4 = rf'{long_suffix}({unsigned_suffix}?)'
     integer_suffix_5 = rf'{long_long_suffix}({unsigned_suffix}?)'
     integer_suffix_6 = rf'{bit_integer_suffix_64}'
-    integer_suffix = rf'(({integer_suffix_1})|({integer_suffix_2})|({integer_suffix_3})|({integer_suffix_4})|({integer_suffix_5})|({integer_suffix_6}))'
+    # The longest suffixes are tried first, so 10ULL is not cut after 10UL
+    integer_suffix = rf'(({integer_suffix_2})|({integer_suffix_3})|({integer_suffix_1})|({integer_suffix_5})|({integer_suffix_4})|({integer_suffix_6}))'
 
     # Types
     hexadecimal_digit =  rf'[0-9a-fA-F]'
     octal_digit = rf'[0-7]'
     hexadecimal_prefix = rf'(0x|0X)'
+    binary_digit = rf'[01]'
+    binary_prefix = rf'(0b|0B)'
 
     # Constants
-    decimal_constant = rf'[0-9]+'
+    decimal_constant = rf'([1-9][0-9]*)'
     hexadecimal_constant = rf'({hexadecimal_prefix}{hexadecimal_digit}+)'
-    octal_constant = rf'(0{octal_digit}+)'
+    binary_constant = rf'({binary_prefix}{binary_digit}+)'
+    octal_constant = rf'(0{octal_digit}*)' # 0 itself is an octal constant
 
     integer_constant_1 = rf'{decimal_constant}({integer_suffix}?)'
     integer_constant_2 = rf'{octal_constant}({integer_suffix}?)'
     integer_constant_3 = rf'{hexadecimal_constant}({integer_suffix}?)'
-    integer_constant = rf'(({integer_constant_1})|({integer_constant_2})|({integer_constant_3}))'
+    integer_constant_4 = rf'{binary_constant}({integer_suffix}?)'
+    # The prefixed constants go before the octal one, which would take their 0
+    integer_constant = rf'(({integer_constant_3})|({integer_constant_4})|({integer_constant_2})|({integer_constant_1}))'
 
     # [Operators]
     t_ALIGNMENT = r'_Alignof'
@@ -75,79 +119,11 @@ class CLexer():
     # [Keywords]
     digit = rf'[0-9]'
     nondigit = rf'[_a-zA-Z]'
-    identifier = rf'({nondigit}+{digit}*)'
+    identifier = rf'({nondigit}[_a-zA-Z0-9]*)'
 
     #--------- [KEYWORDS RULES] ----------
-    reserved = {
-        'auto'     : 'AUTO',
-        'break'    : 'BREAK',
-        'case'     : 'CASE',
-        'char'     : 'CHAR',
-        'const'    : 'CONST',
-        'continue' : 'CONTINUE',
-        'default'  : 'DEFAULT',
-        'do'       : 'DO',
-        'double'   : 'DOUBLE',
-        'else'     : 'ELSE',
-        'enum'     : 'ENUM',
-        'extern'   : 'EXTERN',
-        'float'    : 'FLOAT_KEYWORD',
-        'for'      : 'FOR',
-        'goto'     : 'GOTO',
-        'if'       : 'IF',
-        'inline'   : 'INLINE',
-        'int'      : 'INT_KEYWORD',
-        'long'     : 'LONG',
-        'register' : 'REGISTER',
-        'restrict' : 'RESTRICT',
-        'return'   : 'RETURN',
-        'short'    : 'SHORT',
-        'signed'   : 'SIGNED',
-        'sizeof'   : 'SIZEOF',
-        'static'   : 'STATIC',
-        'struct'   : 'STRUCT',
-        'switch'   : 'SWITCH',
-        'typedef'  : 'TYPEDEF',
-        'typeof'   : 'TYPEOF',
-        'typeof_unqual' : 'TYPEOF_UNQUAL',
-        'union'    : 'UNION',
-        'unsigned' : 'UNSIGNED',
-        'void'     : 'VOID',
-        'volatile' : 'VOLATILE',
-        'while'    : 'WHILE',
-        '_Alignas'        : '_ALIGNAS',
-        '_Alignof'        : '_ALIGNOF',
-        '_Atomic'         : '_ATOMIC',
-        '_Bool'           : '_BOOL',
-        '_Complex'        : '_COMPLEX',
-        '_Generic'        : '_GENERIC',
-        '_Noreturn'       : '_NORETURN',
-        '_Static_assert'  : '_STATIC_ASSERT',
-        '_Thread_local'   : '_THREAD_LOCAL',
-        '__asm'           : '__ASM',
-        '__based'         : '__BASED',
-        '__cdecl'         : '__CDECL',
-        '__declspec'      : '__DECLSPEC',
-        '__except'        : '__EXCEPT',
-        '__fastcall'      : '__FASTCALL',
-        '__finally'       : '__FINALLY',
-        '__inline'        : '__INLINE',
-        '__int16'         : '__INT16',
-        '__int32'         : '__INT32',
-        '__int64'         : '__INT64',
-        '__int8'          : '__INT8',
-        '__leave'         : '__LEAVE',
-        '__restrict'      : '__RESTRICT',
-        '__stdcall'       : '__STDCALL',
-        '__try'           : '__TRY',
-        '__typeof__'      : '__TYPEOF__',
-        '__typeof_unqual__' : '__TYPEOF_UNQUAL__',
-        'dllexport'       : 'DLLEXPORT',
-        'dllimport'       : 'DLLIMPORT',
-        'naked'           : 'NAKED',
-        'static_assert'   : 'STATIC_ASSERT',
-        'thread'          : 'THREAD'
-    }
+    # Reserved words of every dialect, only the ones of the dialect built are keywords
+    reserved = RESERVED
 
     # Tokens definition
     literals = ['*', '+', '-', '%', '/', '&', '!', '~', '|', '^', '=', ',', '(', ')', '{', '}', ';', '<', '>']
@@ -162,35 +138,33 @@ class CLexer():
 
     @TOKEN(identifier)
     def t_IDENTIFIER(self, t):
-        if  t.value in self.reserved:
-            t.type = self.reserved.get(t.value, 'KEYWORD') 
-        else:
-            t.type = 'IDENTIFIER'
+        t.type = self.keywords.get(t.value, 'IDENTIFIER')
+        if t.type == 'IDENTIFIER':
+            t.value = self.symbols.intern(t.value)
         return t
 
+    # With the deferred value policy the text is kept, it is converted later with the other literals
     @TOKEN(floating_point_constant)
     def t_FLOAT(self, t):
-        t.value = float(t.value)
+        if not self.deferred:
+            t.value = self.constants.float_value(t.value)
         return t
 
     @TOKEN(integer_constant)
     def t_INT(self, t):
-        if len(t.value) > 1 and t.value[0] == '0':
-            if t.value[1] in ('x', 'X'):
-                t.value = int(t.value, 16)
-            else:
-                t.value = int(t.value, 8)
-        else:
-            t.value = int(t.value)
-            
+        if not self.deferred:
+            t.value = self.constants.int_value(t.value)
         return t
 
+    int_value = staticmethod(int_value)
+    float_value = staticmethod(float_value)
+
     # Ignored characters
-    t_ignore = ' \t'
+    t_ignore = ' \t\r\n'
 
     # Error handling rule
     def t_error(self, t):
-        print("Illegal character '%s'" % t.value[0])
+        self.error(t.lexer, t.lexpos, "Illegal character '%s'" % t.value[0])
         t.lexer.skip(1)
     
     # Strings
@@ -204,24 +178,312 @@ class CLexer():
 
     def t_string_ending_quote(self, t):
         r'\"'
-        t.value = t.lexer.lexdata[t.lexer.str_start:t.lexer.lexpos + 1]
+        t.value = t.lexer.lexdata[t.lexer.str_start:t.lexer.lexpos]
+        t.lexpos = t.lexer.str_start
         t.type = "STRING"
         t.lexer.begin('INITIAL')
         return t
 
-    @TOKEN(s_char)
-    def t_string_s_char(self, t):
-        pass
+    def t_string_newline(self, t):
+        r'\n'
+        # A string literal can not span lines, it is left unterminated
+        self.error(t.lexer, t.lexer.str_start, 'Unterminated string')
+        t.lexer.begin('INITIAL')
 
+    # The sequence rule goes first so a run of characters is consumed in one match
     @TOKEN(s_char_sequence)
     def t_string_s_char_sequence(self, t):
         pass
 
+    @TOKEN(s_char)
+    def t_string_s_char(self, t):
+        pass
+
     t_string_ignore = ' \t'
 
     def t_string_error(self, t):
-        print("Illegal character '%s'" % t.value[0])
+        self.error(t.lexer, t.lexpos, "Illegal character '%s'" % t.value[0])
         t.lexer.skip(1)
 
-    def build(self):
-        self.lexer = lex.lex(module=self)
\ No newline at end of file
+    engines = ('ply', 'scanner')
+
+    # How the values of INT and FLOAT tokens are made from their text:
+    #   'eager'     by the rule of the token, as it is lexed
+    #   'deferred'  in one batch per type, for every line batch of a stream, for a TokenBuffer
+    #               and for batch(); token() still converts its token on its own
+    value_policies = ('eager', 'deferred')
+
+    def build(self, cache_dir=None, engine=DEFAULT_ENGINE, dialect=DEFAULT_DIALECT, values='eager'):
+        if engine not in self.engines:
+            raise ValueError(f'Unknown lexer engine {engine!r}, expected one of {self.engines}')
+        if values not in self.value_policies:
+            raise ValueError(f'Unknown value policy {values!r}, expected one of {self.value_policies}')
+
+        self.keywords = keywords(dialect)
+        self.deferred = values == 'deferred'
+        self._attach(Scanner(self) if engine == 'scanner' else TableCache(cache_dir).lexer(self))
+
+    def clone(self):
+        """
+            A built lexer with its own input and state. The master regexes or the dispatch
+            tables and the keywords are shared with this one, they are never changed, so a
+            clone costs microseconds and each thread can lex with its own.
+        """
+        if not self.lexer:
+            raise Exception('Analizador no construido')
+
+        c_lexer = CLexer()
+        c_lexer.keywords = self.keywords
+        c_lexer.deferred = self.deferred
+        # The rules of the clone call the methods of the new CLexer, its diagnostics and interning tables included
+        c_lexer._attach(self.lexer.clone(c_lexer))
+        return c_lexer
+
+    def _attach(self, lexer):
+        self.lexer = lexer
+        self.lexer.lexstatestack = []
+        self.lexer.begin('INITIAL')
+        vars(self).pop('token', None)
+        if isinstance(lexer, Scanner):
+            self.next_token = lexer.token # The scanner sets the positions itself
+        else:
+            self.next_token = self.located_token
+
+        if not self.deferred:
+            self.token = self.next_token # There is nothing left to convert
+
+    # Positions
+    def input(self, text, line=1):
+        """Start lexing text, line is the number of its first line"""
+        if not self.lexer:
+            raise Exception('Analizador no construido')
+
+        self.base = 0
+        if isinstance(self.lexer, Scanner):
+            self.lexer.input(text, line)
+            self.index = self.lexer.index
+            return
+
+        self.index = LineIndex(text, line)
+        self.lineno = line
+        self.line_start = self.next_line = 0
+        self.lexer.input(text)
+        self.lexer.lineno = line
+
+    def token(self):
+        """Next token with its lineno, column and value set, None at the end of the input"""
+        tok = self.next_token()
+        if tok is not None and tok.type in self.constants.converters:
+            tok.value = self.constants.converters[tok.type](tok.value)
+        return tok
+
+    def batch(self) -> list:
+        """The tokens left in the input, with the deferred policy their values are converted in one batch per type"""
+        if not self.deferred:
+            return list(self)
+
+        tokens = list(iter(self.next_token, None))
+        convert(tokens, self.constants.batch_converters)
+        return tokens
+
+    def located_token(self):
+        """Next token of PLY's lexer with its lineno and column set"""
+        tok = self.lexer.token()
+        if tok is None:
+            return None
+
+        lexpos = tok.lexpos
+        if not self.line_start <= lexpos < self.next_line:
+            # The token is on another line, only then the index is searched
+            self.lineno, self.line_start, self.next_line = self.index.line_bounds(lexpos)
+            self.lexer.lineno = self.lineno
+
+        tok.lineno = self.lineno
+        tok.column = lexpos - self.line_start + 1
+        return tok
+
+    def __iter__(self):
+        return iter(self.token, None)
+
+    def error(self, lexer, lexpos, message):
+        line, column = self.line_index(lexer).position(lexpos)
+        self.diagnostics.report('lexical', message, self.base + lexpos, line, column)
+
+    def line_index(self, lexer) -> LineIndex:
+        """LineIndex of the input of lexer, made again only when it was not given through input"""
+        for index in (getattr(lexer, 'index', None), self.index):
+            if index is not None and index.text is lexer.lexdata:
+                return index
+        return LineIndex(lexer.lexdata)
+
+    # Streaming
+    # No token can contain a newline and a newline always ends the string state, so the input
+    # is lexed in batches of whole lines: a token never straddles two batches and the memory
+    # used is bounded by the chunk size plus the longest line, whatever the size of the input.
+    def tokenize_stream(self, stream, chunk_size=1 << 16, encoding='utf-8'):
+        if not self.lexer:
+            raise Exception('Analizador no construido')
+
+        self.lexer.begin('INITIAL')
+        decoder = None
+        base = 0
+        line = 1
+        pending = []
+
+        while True:
+            data = stream.read(chunk_size)
+            finished = not data
+            if isinstance(data, (bytes, bytearray)):
+                # Binary files and memory maps are decoded incrementally, so a multibyte
+                # character split between two reads is kept whole
+                if decoder is None:
+                    decoder = codecs.getincrementaldecoder(encoding)()
+                chunk = decoder.decode(data, final=finished)
+            else:
+                chunk = data
+
+            newline = chunk.rfind('\n')
+            if not finished and newline < 0:
+                pending.append(chunk)
+                continue
+
+            if finished:
+                pending.append(chunk)
+                chunk = ''
+            else:
+                pending.append(chunk[:newline + 1])
+                chunk = chunk[newline + 1:]
+
+            text = ''.join(pending)
+            pending = [chunk]
+            if text:
+                # Batches are whole lines, positions in a batch are positions in the stream
+                self.input(text, line)
+                self.base = base
+                for token in self.batch() if self.deferred else self:
+                    token.lexpos += base
+                    yield token
+                base += len(text)
+                line += len(self.index) - 1
+
+            if finished:
+                return
+
+    def tokenize_file(self, path, chunk_size=1 << 16, encoding='utf-8'):
+        with open(path, 'rb') as source:
+            try:
+                stream = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError: # Empty files can not be mapped
+                return
+
+            with stream:
+                yield from self.tokenize_stream(stream, chunk_size, encoding)
+
+    def token_names(self) -> list:
+        return list(self.literals) + list(self.tokens)
+
+    def tokenize_buffer(self, data):
+        if not self.lexer:
+            raise Exception('Analizador no construido')
+
+        self.input(data)
+        converters = {**self.constants.converters, 'IDENTIFIER': self.symbols.intern}
+        buffer = TokenBuffer(data, self.token_names(), converters, self.index, self.constants.batch_converters)
+        codes = buffer.codes
+        kinds = buffer.kinds.append
+        starts = buffer.starts.append
+        ends = buffer.ends.append
+
+        lexer = self.lexer
+        token = lexer.token
+        while True:
+            tok = token()
+            if tok is None:
+                break
+            kinds(codes[tok.type])
+            starts(tok.lexpos)
+            ends(lexer.lexpos)
+
+        if self.deferred:
+            buffer.convert()
+        return buffer
+
+
+class Token:
+    """Token with the attributes yacc reads, without the per instance __dict__ of LexToken"""
+    __slots__ = ('type', 'value', 'lineno', 'lexpos', 'column', 'lexer') # yacc sets lexer on the token of an error
+
+    def __init__(self, type, value, lineno, lexpos, column):
+        self.type = type
+        self.value = value
+        self.lineno = lineno
+        self.lexpos = lexpos
+        self.column = column
+
+    def __str__(self):
+        return 'Token(%s,%r,%d,%d)' % (self.type, self.value, self.lineno, self.lexpos)
+
+    def __repr__(self):
+        return str(self)
+
+
+class TokenBuffer:
+    """
+        Token stream stored as parallel arrays: a small integer code for the kind of every
+        token and its start and end offsets in the source. Values and positions are made from
+        the source text only when they are requested.
+    """
+    def __init__(self, source, names, converters, index=None, batch_converters=BATCH_CONVERTERS):
+        self.source = source
+        self.names = names
+        self.codes = {name: code for code, name in enumerate(names)}
+        self.converters = converters
+        self.batch_converters = batch_converters
+        self.values = {} # Value by index of the tokens converted up front
+        self.index = index if index is not None else LineIndex(source)
+        self.kinds = array('B' if len(names) <= 256 else 'H')
+        self.starts = array('q')
+        self.ends = array('q')
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def type(self, index) -> str:
+        return self.names[self.kinds[index]]
+
+    def text(self, index) -> str:
+        return self.source[self.starts[index]:self.ends[index]]
+
+    def value(self, index):
+        if index in self.values:
+            return self.values[index]
+        text = self.text(index)
+        convert = self.converters.get(self.names[self.kinds[index]])
+        return convert(text) if convert else text
+
+    def convert(self) -> None:
+        """Converts the values of every INT and FLOAT token now, in one batch per type"""
+        for name, values in self.batch_converters.items():
+            if name not in self.codes:
+                continue
+            code = self.codes[name]
+            indices = [index for index, kind in enumerate(self.kinds) if kind == code]
+            self.values.update(zip(indices, values([self.text(index) for index in indices])))
+
+    def position(self, index) -> tuple:
+        """(line, column) of the token"""
+        return self.index.position(self.starts[index])
+
+    def __getitem__(self, index):
+        lexpos = self.starts[index]
+        lineno, column = self.index.position(lexpos)
+        return Token(self.type(index), self.value(index), lineno, lexpos, column)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def tokenfunc(self):
+        """Token function for yacc, tokens are made one at a time as the parser asks for them"""
+        tokens = iter(self)
+        return lambda: next(tokens, None)
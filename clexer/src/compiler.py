@@ -1,13 +1,261 @@
+import copy
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from src.backend import FORMATS, emit, target
+from src.clexer import DEFAULT_ENGINE
 from src.cparser import CParser
+from src.folding import fold
+from src.instrumentation import Recorder, measure
+from src.lowering import lower
+from src.keywords import DEFAULT_DIALECT
+from src.optimizer import optimize
+from src.scopes import SemanticError
+from src.tables import grammar_hash
+
+# Bump when the AST or the IR produced for the same source changes, it invalidates cached results
+COMPILER_VERSION = 8
+
+class CompileResult:
+    def __init__(self, path=None, ir=None, ast=None, diagnostics=None, timings=None, instructions=None, stages=None, native=None) -> None:
+        self.path = path
+        self.ir = ir
+        self.ast = ast
+        self.native = native # Object file or assembly bytes, only when the Compiler emits them
+        self.diagnostics = diagnostics if diagnostics is not None else []
+        self.timings = timings if timings is not None else {}
+        self.instructions = instructions # (before, after) the LLVM passes, None at O0
+        self.stages = stages if stages is not None else [] # Stage of every step, kept only when instrumented
+
+    @property
+    def ok(self) -> bool:
+        return self.ir is not None and not self.diagnostics
 
 class Compiler:
-    def __init__(self) -> None:
+    def __init__(self, cache_dir=None, engine=DEFAULT_ENGINE, cache=None, opt_level=0, fold=True, instruments=None, dialect=DEFAULT_DIALECT,
+                 emit=None, objects=None, lower_jobs=1) -> None:
+        if emit is not None and emit not in FORMATS:
+            raise ValueError(f'Unknown output format {emit!r}')
+
         self.parser = CParser()
+        self.cache_dir = cache_dir
+        self.engine = engine
+        self.dialect = dialect
+        self.cache = cache
+        self.opt_level = opt_level
+        self.fold = fold
+        self.version = None
+        # Called around every stage, see src.instrumentation. With instruments the source is
+        # lexed into a TokenBuffer before parsing, so lex and parse are timed apart
+        self.instruments = list(instruments or [])
+        # Native code of every compiled unit, 'obj' or 'asm' (see src.backend), cached in objects by IR
+        self.emit = emit
+        self.objects = objects
+        # Processes the functions of a unit are lowered by, see src.lowering. The workers of
+        # compile_many lower their units alone
+        self.lower_jobs = lower_jobs
 
     def build_parser(self) -> None:
-        self.parser.build()
+        self.parser.build(self.cache_dir, self.engine, self.dialect)
+        self.version = f'{COMPILER_VERSION}-{grammar_hash(self.parser.c_lexer, "t_")}-{grammar_hash(self.parser, "p_")}-{self.dialect}-O{self.opt_level}{"" if self.fold else "-nofold"}'
+
+    def clone(self) -> 'Compiler':
+        """A Compiler with the same options and a clone of the built parser, for another thread"""
+        compiler = copy.copy(self)
+        compiler.parser = self.parser.clone()
+        compiler.instruments = list(self.instruments)
+        return compiler
 
     def get_AST(self, t_string) -> None:
         ast = self.parser.parse(t_string)
-        
-        return ast
\ No newline at end of file
+
+        return ast
+
+    def compile(self, t_string, path=None) -> CompileResult:
+        if self.cache is None:
+            return self.codegen(self._compile(t_string, path))
+
+        with self.stage('cache', path) as stage:
+            cached = self.cache.lookup(t_string, self.version)
+        if cached is not None:
+            ast, ir, instructions = cached
+            result = CompileResult(path, ir, ast, timings={'cache': stage.seconds}, instructions=instructions)
+            self.record(result, stage)
+            return self.codegen(result)
+
+        result = self._compile(t_string, path)
+        if result.ok:
+            self.cache.save(t_string, self.version, result.ast, result.ir, result.instructions)
+        return self.codegen(result)
+
+    def codegen(self, result) -> CompileResult:
+        """Emits the native code of a compiled unit, unchanged IR is taken from the object cache"""
+        if self.emit is None or not result.ok:
+            return result
+
+        with self.stage('codegen', result.path) as stage:
+            try:
+                native = self.objects.lookup(result.ir, target(), self.emit) if self.objects is not None else None
+                if native is None:
+                    native = emit(result.ir, self.emit)
+                    if self.objects is not None:
+                        self.objects.save(result.ir, target(), self.emit, native)
+                result.native = native
+            except Exception as exception:
+                result.diagnostics.append(f'codegen: {exception!r}')
+                stage.failed = True
+        self.record(result, stage)
+        return result
+
+    def stage(self, name, path=None):
+        return measure(self.instruments, name, path)
+
+    def record(self, result, stage) -> None:
+        result.timings[stage.name] = stage.seconds
+        if self.instruments:
+            result.stages.append(stage)
+
+    def _compile(self, t_string, path) -> CompileResult:
+        result = CompileResult(path)
+
+        buffer = None
+        if self.instruments:
+            with self.stage('lex', path) as stage:
+                try:
+                    buffer = self.parser.tokenize(t_string)
+                    stage.tokens = len(buffer)
+                except Exception as exception:
+                    result.diagnostics.append(f'lex: {exception!r}')
+                    stage.failed = True
+            self.record(result, stage)
+            if buffer is None:
+                return result
+
+        with self.stage('parse', path) as stage:
+            try:
+                result.ast = self.get_AST(t_string) if buffer is None else self.parser.parse_tokens(buffer)
+            except Exception as exception:
+                result.diagnostics.append(f'parse: {exception!r}')
+                stage.failed = True
+            stage.tree = result.ast
+        self.record(result, stage)
+
+        diagnostics = self.parser.diagnostics
+        result.diagnostics.extend(f'parse: {diagnostic}' for diagnostic in diagnostics)
+        if diagnostics.dropped:
+            result.diagnostics.append(f'parse: {diagnostics.dropped} more errors')
+
+        if result.ast is None or result.diagnostics:
+            # A tree recovered from errors is not compiled
+            if not result.diagnostics:
+                result.diagnostics.append('parse: syntax error')
+            return result
+
+        if self.fold:
+            with self.stage('fold', path) as stage:
+                try:
+                    result.ast = fold(result.ast)
+                except SemanticError as error:
+                    result.diagnostics.append(f'fold: {error.diagnostic}')
+                    stage.failed = True
+                except Exception as exception:
+                    result.diagnostics.append(f'fold: {exception!r}')
+                    stage.failed = True
+                stage.tree = result.ast
+            self.record(result, stage)
+            if stage.failed:
+                return result
+
+        with self.stage('ir', path) as stage:
+            try:
+                result.ir = lower(result.ast, self.lower_jobs)
+            except SemanticError as error:
+                result.diagnostics.append(f'ir: {error.diagnostic}')
+                stage.failed = True
+            except Exception as exception:
+                result.diagnostics.append(f'ir: {exception!r}')
+                stage.failed = True
+            stage.tree = result.ast
+        self.record(result, stage)
+
+        if result.ir is None or not self.opt_level:
+            return result
+
+        with self.stage('llvm', path) as stage:
+            try:
+                optimized = optimize(result.ir, self.opt_level)
+                result.ir = optimized.ir
+                result.instructions = stage.instructions = (optimized.before, optimized.after)
+            except Exception as exception:
+                result.ir = None
+                result.diagnostics.append(f'llvm: {exception!r}')
+                stage.failed = True
+        self.record(result, stage)
+
+        return result
+
+    def compile_file(self, path) -> CompileResult:
+        with self.stage('read', path) as stage:
+            try:
+                with open(path) as source:
+                    t_string = source.read()
+            except OSError as exception:
+                error = exception
+                stage.failed = True
+        if stage.failed:
+            return CompileResult(path, diagnostics=[f'read: {error}'])
+
+        result = self.compile(t_string, path)
+        result.timings = {'read': stage.seconds, **result.timings}
+        if self.instruments:
+            result.stages.insert(0, stage)
+        return result
+
+    def compile_many(self, paths, jobs=None, keep_ast=False) -> list:
+        """
+            Compile many files, fanning them out over a pool of worker processes.
+            Every worker builds its parser once and reuses it for all of its files, and
+            emits the native code of its files too when the Compiler emits any.
+            The results are returned in the order of paths.
+            The instruments of a pool see the stages of the workers only when each file
+            comes back: finish() is called for them then, and start() is not.
+        """
+        paths = list(paths)
+        jobs = min(jobs or os.cpu_count() or 1, max(len(paths), 1))
+
+        if jobs == 1:
+            if not self.parser.parser:
+                self.build_parser()
+            return [_strip(self.compile_file(path), keep_ast) for path in paths]
+
+        # Several files per task keep the inter process traffic low for small units
+        chunksize = max(1, len(paths) // (jobs * 4))
+        instrumented = bool(self.instruments)
+        memory = any(instrument.memory for instrument in self.instruments)
+        with ProcessPoolExecutor(jobs, initializer=_start_worker, initargs=(self.cache_dir, self.engine, self.cache, self.opt_level, self.fold, instrumented, memory, self.dialect,
+                                                                            self.emit, self.objects)) as executor:
+            results = list(executor.map(_compile_in_worker, paths, [keep_ast] * len(paths), chunksize=chunksize))
+
+        for result in results:
+            for stage in result.stages:
+                for instrument in self.instruments:
+                    instrument.finish(stage)
+        return results
+
+
+# Compiler owned by each worker process of compile_many
+_worker = None
+
+def _start_worker(cache_dir, engine, cache, opt_level, fold, instrumented, memory, dialect, emit, objects) -> None:
+    global _worker
+    # The stages are kept on the results, the instruments of the parent get them
+    _worker = Compiler(cache_dir, engine, cache, opt_level, fold, [Recorder(memory)] if instrumented else None, dialect, emit, objects)
+    _worker.build_parser()
+
+def _compile_in_worker(path, keep_ast) -> CompileResult:
+    return _strip(_worker.compile_file(path), keep_ast)
+
+def _strip(result, keep_ast) -> CompileResult:
+    if not keep_ast:
+        result.ast = None
+    return result
@@ -1,36 +1,63 @@
-import ply.yacc as yacc
-from src.clexer import CLexer
-from src.ir import Literal, BinaryOp, RelationalOp, WhileStatement, Declaration, Assignment, Program, IfStatement, IfElseStatement, ForStatement
+import copy
+
+from src.clexer import DEFAULT_ENGINE, CLexer
+from src.diagnostics import Diagnostics
+from src.keywords import DEFAULT_DIALECT
+from src.tables import TableCache
+from src.ir import Literal, BinaryOp, BooleanOp, RelationalOp, WhileStatement, Declaration, Assignment, Program, Function, IfStatement, IfElseStatement, ForStatement
+
+def located(node, symbol):
+    """node with the line and column of symbol, a token or a node that starts where it does"""
+    node.lineno = symbol.lineno
+    node.column = symbol.column
+    return node
 
 class CParser:
     def __init__(self):
         self.parser = None
+        self.c_lexer = None
+        self.errors = 0 # Syntax errors seen by this parser
+        self.diagnostics = Diagnostics() # Errors of the last parse, shared with the lexer
+        self.symbols = None # Interning tables of the lexer, the AST of the last parse refers to them
+        self.constants = None
 
-    c_lexer = CLexer()
-    c_lexer.build()
-
-    tokens = c_lexer.tokens
+    tokens = CLexer.tokens
 
     def p_program(self, p):
         """
-        PROGRAM : INT_KEYWORD IDENTIFIER '(' ')' '{' DECLARATIONS STATEMENTS '}'
+        PROGRAM : FUNCTIONS
+        """
+        p[0] = located(Program(p[1]), p[1][0])
+
+
+    def p_functions(self, p):
+        """
+        FUNCTIONS : FUNCTIONS FUNCTION
+                  | FUNCTION
         """
         if len(p) > 2:
-            p[0] = Program(p[6], p[7])
+            p[0] = p[1]
+            p[0].append(p[2])
         else:
-            p[0] = Program(p[6], [])
+            p[0] = [p[1]]
+
+
+    def p_function(self, p):
+        """
+        FUNCTION : INT_KEYWORD IDENTIFIER '(' ')' '{' DECLARATIONS STATEMENTS '}'
+        """
+        p[0] = located(Function(p[2], p[6], p[7]), p.slice[1])
 
 
     def p_declarations(self, p):
         """
-        DECLARATIONS : DECLARATION DECLARATIONS 
+        DECLARATIONS : DECLARATIONS DECLARATION
                      | EMPTY
         """
+        # Left recursive, so every item is appended to the list of the ones before it
         if len(p) > 2:
-            if p[2]:
-                p[0] = [p[1]] + p[2]
-            else:
-                p[0] = [p[1]]
+            p[0] = p[1] if p[1] else []
+            p[0].append(p[2])
         else:
             p[0] = p[1]
 
@@ -42,11 +69,9 @@ class CParser:
         """
 
         if len(p) > 4:
-            print(list(p))
-            p[0] = Declaration(p[1], p[2], p[4])
+            p[0] = located(Declaration(p[1], p[2], p[4]), p.slice[1])
         else:
-            print('none', list(p))
-            p[0] = Declaration(p[1], p[2], None)
+            p[0] = located(Declaration(p[1], p[2], None), p.slice[1])
 
 
     def p_type(self, p):
@@ -55,18 +80,17 @@ class CParser:
              | FLOAT_KEYWORD
         """
         p[0] = p[1]
+        located(p.slice[0], p.slice[1]) # The declaration starts at its type
 
 
     def p_statements(sefl, p):
         """
-        STATEMENTS : STATEMENT STATEMENTS 
+        STATEMENTS : STATEMENTS STATEMENT
                    | EMPTY
         """
         if len(p) > 2:
-            if p[2]:
-                p[0] = [p[1]] + p[2]
-            else:
-                p[0] = [p[1]]
+            p[0] = p[1] if p[1] else []
+            p[0].append(p[2])
         else:
             p[0] = p[1]
 
@@ -85,6 +109,14 @@ class CParser:
         p[0] = p[1]
 
 
+    def p_statement_error(self, p):
+        """
+        STATEMENT : error ';'
+        """
+        # The statement is skipped up to its ';' and parsing goes on, so one run reports many errors
+        p[0] = None
+
+
     def p_block(self, p):
         """
         BLOCK : '{' STATEMENTS '}'
@@ -96,43 +128,42 @@ class CParser:
         """
         FOR_ASSIGNMENT : IDENTIFIER '=' EQUALITY
         """
-        p[0] = Assignment(p[1], p[3])
+        p[0] = located(Assignment(p[1], p[3]), p.slice[1])
 
 
     def p_assignment(self, p):
         """
         ASSIGNMENT : IDENTIFIER '=' EQUALITY ';'
         """
-        p[0] = Assignment(p[1], p[3])
+        p[0] = located(Assignment(p[1], p[3]), p.slice[1])
 
 
     def p_if_else_statement(self, p):
         """
         IF_ELSE_STATEMENT : IF '(' EXPRESSION ')' STATEMENTS ELSE STATEMENTS
         """
-        p[0] = IfElseStatement(p[3], p[5], p[7])
+        p[0] = located(IfElseStatement(p[3], p[5], p[7]), p.slice[1])
 
 
     def p_if_statement(self, p):
         """
         IF_STATEMENT : IF '(' EXPRESSION ')' STATEMENTS
         """
-        p[0] = IfStatement(p[3], p[5])
+        p[0] = located(IfStatement(p[3], p[5]), p.slice[1])
 
 
     def p_for_statement(self, p):
         """
         FOR_STATEMENT : FOR '(' DECLARATION EXPRESSION ';' FOR_ASSIGNMENT ')' STATEMENTS
         """
-        print('reaching for')
-        p[0] = ForStatement(p[3], p[4], [6], p[8])
+        p[0] = located(ForStatement(p[3], p[4], p[6], p[8]), p.slice[1])
 
 
     def p_while_statement(self, p):
         """
         WHILE_STATEMENT : WHILE '(' EXPRESSION ')' STATEMENTS
         """
-        p[0] = WhileStatement(p[3], p[5])
+        p[0] = located(WhileStatement(p[3], p[5]), p.slice[1])
 
 
     def p_expression(self, p):
@@ -140,7 +171,10 @@ class CParser:
         EXPRESSION : EXPRESSION OR CONJUNCTION 
                    | CONJUNCTION
         """
-        p[0] = p[1]
+        if len(p) > 2:
+            p[0] = located(BooleanOp(p[2], p[1], p[3]), p[1])
+        else:
+            p[0] = p[1]
 
 
     def p_conjunction(self, p):
@@ -148,7 +182,10 @@ class CParser:
         CONJUNCTION : CONJUNCTION AND EQUALITY 
                     | EQUALITY
         """
-        p[0] = p[1]
+        if len(p) > 2:
+            p[0] = located(BooleanOp(p[2], p[1], p[3]), p[1])
+        else:
+            p[0] = p[1]
 
 
     def p_equality(self, p):
@@ -157,7 +194,7 @@ class CParser:
                  | RELATION
         """
         if len(p) > 2:
-            p[0] = RelationalOp(p[2], p[1], p[3])
+            p[0] = located(RelationalOp(p[2], p[1], p[3]), p[1])
         else:
             p[0] = p[1]
 
@@ -176,7 +213,7 @@ class CParser:
                  | ADDITION
         """
         if len(p) > 2:
-            p[0] = RelationalOp(p[2], p[1], p[3])
+            p[0] = located(RelationalOp(p[2], p[1], p[3]), p[1])
         else:
             p[0] = p[1]
 
@@ -197,7 +234,7 @@ class CParser:
                  | TERM
         """
         if len(p) > 2:
-            p[0] = BinaryOp(p[2], p[1], p[3])
+            p[0] = located(BinaryOp(p[2], p[1], p[3]), p[1])
         else:
             p[0] = p[1]
 
@@ -216,7 +253,7 @@ class CParser:
              | FACTOR
         """
         if len(p) > 2:
-            p[0] = BinaryOp(p[2], p[1], p[3])
+            p[0] = located(BinaryOp(p[2], p[1], p[3]), p[1])
         else:
             p[0] = p[1]
 
@@ -249,6 +286,7 @@ class CParser:
             p[0] = Literal(p[1], 'FLOAT')
         else:
             p[0] = Literal(p[1], 'ID')
+        located(p[0], p.slice[1])
 
 
     def p_empty(self, p):
@@ -259,16 +297,96 @@ class CParser:
 
 
     def p_error(self, p):
-        print(f"¡Error de sintaxis en la entrada! {p}")
+        self.errors += 1
+        if p is None:
+            index = self.c_lexer.index
+            if index is None:
+                self.diagnostics.report('syntax', 'Error de sintaxis al final de la entrada')
+            else:
+                line, column = index.position(len(index.text))
+                self.diagnostics.report('syntax', 'Error de sintaxis al final de la entrada', self.c_lexer.base + len(index.text), line, column)
+        else:
+            self.diagnostics.report('syntax', f'Error de sintaxis en {p.value!r}', p.lexpos, p.lineno, getattr(p, 'column', None))
+
 
+    def build(self, cache_dir=None, engine=DEFAULT_ENGINE, dialect=DEFAULT_DIALECT, values='eager'):
+        self.c_lexer = CLexer()
+        self.c_lexer.diagnostics = self.diagnostics
+        self.c_lexer.build(cache_dir, engine, dialect, values)
+        self.symbols = self.c_lexer.symbols
+        self.constants = self.c_lexer.constants
+        self.parser = TableCache(cache_dir).parser(self)
+
+    def clone(self):
+        """
+            A built parser with its own lexer, diagnostics and parse stacks, for another thread.
+            The LALR tables and the productions are shared with this one, only the callables
+            of the productions are bound again to the methods of the clone.
+        """
+        if not self.parser:
+            raise Exception('Analizador no construido')
 
-    def build(self):
-        self.parser = yacc.yacc(module=self)
+        c_parser = CParser()
+        c_parser.c_lexer = self.c_lexer.clone()
+        c_parser.c_lexer.diagnostics = c_parser.diagnostics
+        c_parser.symbols = c_parser.c_lexer.symbols
+        c_parser.constants = c_parser.c_lexer.constants
+        c_parser.parser = copy.copy(self.parser)
+        c_parser.parser.productions = []
+        methods = {}
+        for production in self.parser.productions:
+            production = copy.copy(production)
+            if production.func:
+                production.callable = methods.setdefault(production.func, getattr(c_parser, production.func))
+            c_parser.parser.productions.append(production)
+        c_parser.parser.errorfunc = c_parser.p_error
+        return c_parser
+
+    def clear(self) -> None:
+        """Forgets the diagnostics, names and constants of the last parse before the next one"""
+        self.diagnostics.clear()
+        self.symbols.clear()
+        self.constants.clear()
 
 
     def parse(self, t_string):
         if not self.parser:
             raise Exception('Analizador no construido')
 
-        self.c_lexer.lexer.input(t_string)
-        return self.parser.parse(t_string)
\ No newline at end of file
+        self.clear()
+        return self.parser.parse(t_string, lexer=self.c_lexer)
+
+
+    def parse_stream(self, stream, chunk_size=1 << 16):
+        if not self.parser:
+            raise Exception('Analizador no construido')
+
+        self.clear()
+        tokens = self.c_lexer.tokenize_stream(stream, chunk_size)
+        return self.parser.parse(lexer=self.c_lexer.lexer, tokenfunc=lambda: next(tokens, None))
+
+
+    def parse_file(self, path, chunk_size=1 << 16):
+        if not self.parser:
+            raise Exception('Analizador no construido')
+
+        self.clear()
+        tokens = self.c_lexer.tokenize_file(path, chunk_size)
+        return self.parser.parse(lexer=self.c_lexer.lexer, tokenfunc=lambda: next(tokens, None))
+
+
+    def tokenize(self, t_string):
+        """TokenBuffer of t_string for parse_tokens, its lexical errors start the diagnostics"""
+        if not self.parser:
+            raise Exception('Analizador no construido')
+
+        self.clear()
+        return self.c_lexer.tokenize_buffer(t_string)
+
+
+    def parse_tokens(self, buffer):
+        """Diagnostics are not cleared, they keep the lexical errors found while buffer was made"""
+        if not self.parser:
+            raise Exception('Analizador no construido')
+
+        return self.parser.parse(lexer=self.c_lexer.lexer, tokenfunc=buffer.tokenfunc())
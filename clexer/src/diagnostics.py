@@ -0,0 +1,63 @@
+"""
+    Errors found while lexing and parsing, collected instead of printed. Semantic errors
+    (see src.scopes) are reported as a Diagnostic too, with the position of their node.
+    A Diagnostics collector is shared by a CParser and its CLexer. The error rules only
+    append a Diagnostic to it, nothing is written anywhere, and the caller reads the
+    records once the input is done. Past the limit the records are only counted, so a
+    hopeless input costs neither memory nor time.
+"""
+
+class Diagnostic:
+    __slots__ = ('kind', 'message', 'offset', 'line', 'column')
+
+    def __init__(self, kind, message, offset=None, line=None, column=None) -> None:
+        self.kind = kind # 'lexical', 'syntax' or 'semantic'
+        self.message = message
+        self.offset = offset
+        self.line = line
+        self.column = column
+
+    def __eq__(self, other):
+        return isinstance(other, Diagnostic) and all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __str__(self):
+        if self.line is None:
+            return f'{self.kind}: {self.message}'
+        return f'{self.line}:{self.column}: {self.kind}: {self.message}'
+
+    def __repr__(self):
+        return f'Diagnostic({self.kind!r}, {self.message!r}, {self.offset!r}, {self.line!r}, {self.column!r})'
+
+
+class Diagnostics:
+    def __init__(self, limit=100, sink=None) -> None:
+        self.limit = limit # Records kept, None keeps all of them
+        self.sink = sink # Called with every kept record instead of storing it, like list.append or a logger
+        self.records = []
+        self.count = 0 # Records reported, kept or not
+
+    def report(self, kind, message, offset=None, line=None, column=None) -> None:
+        self.count += 1
+        if self.limit is not None and self.count > self.limit:
+            return
+
+        record = Diagnostic(kind, message, offset, line, column)
+        if self.sink is not None:
+            self.sink(record)
+        else:
+            self.records.append(record)
+
+    @property
+    def dropped(self) -> int:
+        """Records reported past the limit"""
+        return self.count - min(self.count, self.limit) if self.limit is not None else 0
+
+    def clear(self) -> None:
+        self.records = []
+        self.count = 0
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
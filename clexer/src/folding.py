@@ -0,0 +1,373 @@
+import ctypes
+import math
+
+from src.ir import (Visitor, ASTNode, Program, Function, ForStatement, IfStatement, IfElseStatement, WhileStatement,
+                    BooleanOp, RelationalOp, BinaryOp, Assignment, Declaration, Literal, run, walk)
+from src.scopes import Scopes
+
+"""
+    AST level optimization, run before the IR is generated.
+    ConstantFolder rewrites the tree in place with the semantics of the emitted IR:
+        - Operations on two literals are computed at compile time, int arithmetic
+          wraps around at 32 bits and float arithmetic is rounded to single precision.
+          Divisions by zero and overflowing floats are left for the backend.
+        - Identities like x + 0, x - 0, x * 1 and x / 1 are removed when they cannot
+          change the type or the value of x, and sums with several int constants are
+          combined, (x + 1) + 2 becomes x + 3.
+        - if, while and for statements with a constant condition are pruned. A branch
+          that always runs takes the place of the statement, as a block when it declares
+          variables, so they keep their scope.
+    Expressions have no side effects, so dropping one never changes the program.
+    The visit methods are generators driven by run(), so trees of any depth are folded.
+    Names are resolved through Scopes, like the IR visitor does, so the type of a variable
+    is the one of the declaration in scope.
+"""
+
+INT_MIN = -(1 << 31)
+INT_MAX = (1 << 31) - 1
+
+COMPARISONS = {
+    '<': lambda lhs, rhs: lhs < rhs,
+    '<=': lambda lhs, rhs: lhs <= rhs,
+    '>': lambda lhs, rhs: lhs > rhs,
+    '>=': lambda lhs, rhs: lhs >= rhs,
+    '==': lambda lhs, rhs: lhs == rhs,
+    '!=': lambda lhs, rhs: lhs != rhs,
+}
+
+
+def wrap(value) -> int:
+    return (value - INT_MIN) % (1 << 32) + INT_MIN
+
+def single(value) -> float:
+    return ctypes.c_float(value).value
+
+def is_int(node) -> bool:
+    return isinstance(node, Literal) and node.type == 'INT' and INT_MIN <= node.value <= INT_MAX
+
+def is_constant(node) -> bool:
+    return is_int(node) or isinstance(node, Literal) and node.type == 'FLOAT'
+
+
+def spliced(statements) -> list:
+    """Statements to put where a pruned statement was, a block of their own when they declare variables"""
+    if any(isinstance(statement, Declaration) for statement in statements):
+        return [statements]
+    return statements
+
+
+class ConstantFolder(Visitor):
+    def __init__(self):
+        self.scopes = Scopes()
+        self.stack = []
+        self.expression_types = {} # (node, type) of the folded BinaryOps by id, the node keeps the id in use
+
+    def fold(self, node):
+        run(self, node)
+        return self.stack.pop()
+
+    def folded(self, node):
+        yield node
+        return self.stack.pop()
+
+    def fold_statements(self, statements) -> list:
+        """Folded statements of a statement list or of a single statement, blocks stay blocks"""
+        folded = []
+        for statement in statements if isinstance(statements, list) else [statements]:
+            if isinstance(statement, list):
+                # A list in a statement list is a block, run() hands it to visit_block
+                block = yield from self.folded([statement])
+                if block:
+                    folded.append(block)
+            elif isinstance(statement, ASTNode):
+                result = yield from self.folded(statement)
+                if isinstance(result, list):
+                    folded.extend(result)
+                elif result is not None:
+                    folded.append(result)
+
+        return folded
+
+    def fold_body(self, statements) -> list:
+        """Folds a block, or the body of an if, else or loop, in a scope of its own"""
+        self.scopes.enter()
+        folded = yield from self.fold_statements(statements)
+        self.scopes.leave()
+        return folded
+
+    def visit_block(self, statements: list):
+        self.stack.append((yield from self.fold_body(statements)))
+
+    def visit_program(self, node: Program) -> None:
+        self.scopes.enter('file')
+        for function in node.functions:
+            self.scopes.declare(function.name, 'int()', 'extern', function)
+        functions = []
+        for function in node.functions:
+            functions.append((yield from self.folded(function)))
+        node.functions = functions
+        self.scopes.leave()
+        self.stack.append(node)
+
+    def visit_function(self, node: Function) -> None:
+        self.scopes.enter('function')
+        node.declarations = yield from self.fold_statements(node.declarations)
+        node.statements = yield from self.fold_statements(node.statements)
+        self.scopes.leave()
+        self.stack.append(node)
+
+    def visit_for_statement(self, node: ForStatement) -> None:
+        self.scopes.enter('for')
+        node.declaration = yield from self.folded(node.declaration)
+        node.expression = yield from self.folded(node.expression)
+
+        if self.truth(node.expression) is False:
+            # The declaration is only in scope in the statement, the body and the assignment never run
+            self.dead(node.statements)
+            self.dead(node.assignment)
+            self.scopes.leave()
+            self.stack.append([])
+            return
+
+        node.statements = yield from self.fold_body(node.statements)
+        node.assignment = yield from self.folded(node.assignment)
+        self.scopes.leave()
+        self.stack.append(node)
+
+    def visit_if_statement(self, node: IfStatement) -> None:
+        node.expression = yield from self.folded(node.expression)
+        truth = self.truth(node.expression)
+
+        if truth is None:
+            node.statements = yield from self.fold_body(node.statements)
+            self.stack.append(node)
+        elif truth:
+            self.stack.append(spliced((yield from self.fold_body(node.statements))))
+        else:
+            self.dead(node.statements)
+            self.stack.append([])
+
+    def visit_if_else_statement(self, node: IfElseStatement) -> None:
+        node.expression = yield from self.folded(node.expression)
+        truth = self.truth(node.expression)
+
+        if truth is None:
+            node.then_statements = yield from self.fold_body(node.then_statements)
+            node.otherwise_statements = yield from self.fold_body(node.otherwise_statements)
+            self.stack.append(node)
+        elif truth:
+            then_statements = yield from self.fold_body(node.then_statements)
+            self.dead(node.otherwise_statements)
+            self.stack.append(spliced(then_statements))
+        else:
+            self.dead(node.then_statements)
+            self.stack.append(spliced((yield from self.fold_body(node.otherwise_statements))))
+
+    def visit_while_statement(self, node: WhileStatement) -> None:
+        node.expression = yield from self.folded(node.expression)
+
+        if self.truth(node.expression) is False:
+            self.dead(node.statements)
+            self.stack.append([])
+            return
+
+        node.statements = yield from self.fold_body(node.statements)
+        self.stack.append(node)
+
+    def visit_boolean_op(self, node: BooleanOp) -> None:
+        lhs = yield from self.folded(node.lhs)
+        rhs = yield from self.folded(node.rhs)
+        lhs_truth, rhs_truth = self.truth(lhs), self.truth(rhs)
+        absorbing = node.op == '||' # x || 1 is always true, x && 0 always false
+
+        if lhs_truth is not None and rhs_truth is not None:
+            value = lhs_truth or rhs_truth if absorbing else lhs_truth and rhs_truth
+            self.stack.append(Literal(int(value), 'INT'))
+        elif lhs_truth is not None or rhs_truth is not None:
+            truth, other = (lhs_truth, rhs) if lhs_truth is not None else (rhs_truth, lhs)
+            if truth == absorbing:
+                self.check(other)
+                self.stack.append(Literal(int(absorbing), 'INT'))
+            else:
+                self.stack.append(self.condition(other))
+        else:
+            node.lhs, node.rhs = lhs, rhs
+            self.stack.append(node)
+
+    def visit_relational_op(self, node: RelationalOp) -> None:
+        node.lhs = yield from self.folded(node.lhs)
+        node.rhs = yield from self.folded(node.rhs)
+
+        if not (is_constant(node.lhs) and is_constant(node.rhs)):
+            self.stack.append(node)
+            return
+
+        lhs, rhs, _ = self.operands(node.lhs, node.rhs)
+        # Comparisons of floats are ordered, they are false when a side is NaN
+        value = COMPARISONS[node.op](lhs, rhs) and not (math.isnan(lhs) or math.isnan(rhs))
+        self.stack.append(Literal(int(value), 'INT'))
+
+    def visit_binary_op(self, node: BinaryOp) -> None:
+        node.lhs = yield from self.folded(node.lhs)
+        node.rhs = yield from self.folded(node.rhs)
+
+        if is_constant(node.lhs) and is_constant(node.rhs):
+            folded = self.compute(node.op, node.lhs, node.rhs)
+            self.stack.append(folded if folded is not None else node)
+        else:
+            self.stack.append(self.simplify(node))
+
+    def visit_assignment(self, node: Assignment) -> None:
+        node.value = yield from self.folded(node.value)
+        self.stack.append(node)
+
+    def visit_declaration(self, node: Declaration) -> None:
+        self.scopes.declare(node.id, node.type, node=node)
+        if node.value:
+            node.value = yield from self.folded(node.value)
+        self.stack.append(node)
+
+    def visit_literal(self, node: Literal) -> None:
+        self.stack.append(node)
+
+    def compute(self, op, lhs, rhs):
+        lhs, rhs, float_op = self.operands(lhs, rhs)
+
+        if float_op:
+            if op == '+':
+                value = lhs + rhs
+            elif op == '-':
+                value = lhs - rhs
+            elif op == '*':
+                value = lhs * rhs
+            elif rhs == 0:
+                return None
+            elif op == '/':
+                value = lhs / rhs
+            else:
+                value = math.fmod(lhs, rhs)
+
+            value = single(value)
+            return Literal(value, 'FLOAT') if math.isfinite(value) else None
+
+        if op == '+':
+            value = lhs + rhs
+        elif op == '-':
+            value = lhs - rhs
+        elif op == '*':
+            value = lhs * rhs
+        elif rhs == 0 or (lhs == INT_MIN and rhs == -1):
+            return None # Undefined behaviour, left as it is written
+        else:
+            # sdiv and srem truncate towards zero
+            quotient = abs(lhs) // abs(rhs) * (1 if (lhs < 0) == (rhs < 0) else -1)
+            value = quotient if op == '/' else lhs - rhs * quotient
+
+        return Literal(wrap(value), 'INT')
+
+    def operands(self, lhs, rhs) -> tuple:
+        if lhs.type == 'FLOAT' or rhs.type == 'FLOAT':
+            return single(lhs.value), single(rhs.value), True
+        return lhs.value, rhs.value, False
+
+    def simplify(self, node: BinaryOp):
+        lhs, rhs, op = node.lhs, node.rhs, node.op
+        node_type = self.type_of(node)
+
+        # Adding an int constant to a sum with an int constant, the wrap around makes it exact
+        if op in '+-' and is_int(rhs) and node_type == 'int' and isinstance(lhs, BinaryOp) and lhs.op in '+-' and is_int(lhs.rhs):
+            offset = lhs.rhs.value if lhs.op == '+' else -lhs.rhs.value
+            offset += rhs.value if op == '+' else -rhs.value
+            node = BinaryOp('+', lhs.lhs, Literal(wrap(offset), 'INT'))
+            lhs, rhs, op = node.lhs, node.rhs, node.op
+
+        # An identity can only go away when the constant does not turn an int into a float
+        if is_constant(rhs) and (rhs.type == 'INT' or self.type_of(lhs) == 'float'):
+            if op == '+' and rhs.value == 0 and self.type_of(lhs) == 'int': # -0.0 + 0 is 0.0
+                return lhs
+            if op == '-' and rhs.value == 0:
+                return lhs
+            if op in '*/' and rhs.value == 1:
+                return lhs
+        if is_constant(lhs) and (lhs.type == 'INT' or self.type_of(rhs) == 'float'):
+            if op == '+' and lhs.value == 0 and self.type_of(rhs) == 'int':
+                return rhs
+            if op == '*' and lhs.value == 1:
+                return rhs
+
+        return node
+
+    def type_of(self, node):
+        """'int' or 'float', None when it is not known"""
+        if isinstance(node, Literal):
+            if node.type == 'ID':
+                symbol = self.scopes.lookup(node.value)
+                return symbol.type if symbol is not None else None
+            return {'INT': 'int', 'FLOAT': 'float'}.get(node.type)
+        if isinstance(node, BinaryOp):
+            # The operands were folded first, their types are known and this does not recurse deeper
+            known = self.expression_types.get(id(node))
+            if known is not None and known[0] is node:
+                return known[1]
+            types = (self.type_of(node.lhs), self.type_of(node.rhs))
+            if 'float' in types:
+                node_type = 'float'
+            else:
+                node_type = 'int' if types == ('int', 'int') else None
+            self.expression_types[id(node)] = (node, node_type)
+            return node_type
+        if isinstance(node, (RelationalOp, BooleanOp)):
+            return 'int'
+
+        return None
+
+    def truth(self, node):
+        """Value of node as a condition, None when it is not a constant"""
+        if is_constant(node):
+            return single(node.value) != 0 if node.type == 'FLOAT' else node.value != 0
+
+        return None
+
+    def condition(self, node):
+        if isinstance(node, (RelationalOp, BooleanOp)):
+            return node
+        return RelationalOp('!=', node, Literal(0, 'INT'))
+
+    def dead(self, statements) -> None:
+        """Code that never runs is dropped, it is only checked for the names it misuses in its scopes, as the IR visitor would"""
+        enter, leave = self.scopes.enter, self.scopes.leave
+        pending = [leave, statements, enter]
+        while pending:
+            # Items are taken in the order they would run, the methods on the stack enter and leave the scopes
+            item = pending.pop()
+            if item is enter or item is leave:
+                item()
+            elif isinstance(item, list):
+                pending.extend((leave, *reversed(item), enter))
+            elif isinstance(item, Declaration):
+                self.scopes.declare(item.id, item.type, node=item)
+                if item.value:
+                    self.check(item.value)
+            elif isinstance(item, Assignment):
+                self.scopes.variable(item.id, item)
+                self.check(item.value)
+            elif isinstance(item, ForStatement):
+                pending.extend((leave, item.assignment, leave, item.statements, enter, item.expression, item.declaration, enter))
+            elif isinstance(item, IfElseStatement):
+                pending.extend((leave, item.otherwise_statements, enter, leave, item.then_statements, enter, item.expression))
+            elif isinstance(item, (IfStatement, WhileStatement)):
+                pending.extend((leave, item.statements, enter, item.expression))
+            elif isinstance(item, ASTNode):
+                self.check(item)
+
+    def check(self, expression) -> None:
+        """Dropped code still has to refer to declared variables only"""
+        def enter(node):
+            if isinstance(node, Literal) and node.type == 'ID':
+                self.scopes.variable(node.value, node)
+        walk(expression, enter)
+
+
+def fold(ast):
+    """Fold the constants of a program in place, it is returned for convenience"""
+    return ConstantFolder().fold(ast)
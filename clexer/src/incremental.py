@@ -0,0 +1,345 @@
+import bisect
+
+from ply.lex import LexToken
+
+from src.cparser import located
+from src.ir import ASTNode, Program, Function, Declaration, Assignment, IfStatement, IfElseStatement, WhileStatement, ForStatement
+
+"""
+    Incremental reparsing for editors.
+    IncrementalParser keeps the text, the tokens and the AST of the last parse. An edit
+    (offset, deleted length, inserted text) is applied in three steps:
+        - Only the damaged tokens are lexed again: lexing restarts a little before the
+          edit and stops as soon as a new token starts where an old one did after the
+          edit, from there on the old tokens are kept with their positions shifted.
+        - The statement lists are split into their items (declarations, assignments,
+          blocks and ';'). In this grammar an if, while or for statement takes every
+          statement after it as its body (an if else as its else body), so it is always
+          the last item of its list. An edit inside that body or inside a block is handled
+          in that statement list instead.
+        - The tokens and the nodes after the edit keep their objects, their offsets, lines
+          and columns are moved in place.
+        - The damaged items are parsed as a program of their own and put between the
+          untouched items, which are reused as they are.
+    The result is the AST a full parse of the new text produces, when that can not be
+    guaranteed (the unit has several functions, the edit touches the function itself or
+    the text does not parse) the whole text is parsed again. Reused subtrees are shared
+    between versions, so they must not be modified, fold a copy of the tree. Their positions always refer to the last text.
+"""
+
+# The longest a token regex looks past the end of its match, like 1.e+ before a digit
+LOOKAHEAD = 4
+
+# Statements that take the rest of their list as their body
+SWALLOWING = (IfStatement, IfElseStatement, WhileStatement, ForStatement)
+
+
+def _token(type, value) -> LexToken:
+    token = LexToken()
+    token.type = type
+    token.value = value
+    token.lineno = 1
+    token.lexpos = 0
+    token.column = 1
+    return token
+
+
+class IncrementalParser:
+    def __init__(self, parser) -> None:
+        self.parser = parser
+        self.text = ''
+        self.index = None # LineIndex of text
+        self.tokens = []
+        self.ast = None
+        self.valid = False # Whether the last text parsed without errors, only then its items can be reused
+        self.starts = None # First token of every item of the single function, computed on the first edit
+        self.mode = None # How the last result was produced: 'full', 'incremental' or 'unchanged'
+        self.reparsed = 0 # Tokens parsed again by the last edit
+
+    def parse(self, text):
+        self.parser.diagnostics.clear()
+        c_lexer = self.parser.c_lexer
+        c_lexer.lexer.begin('INITIAL')
+        c_lexer.input(text)
+
+        self.text = text
+        self.index = c_lexer.index
+        self.tokens = list(c_lexer)
+        self.ast, ok = self._parse(self.tokens)
+        self.valid = ok and not self.parser.diagnostics.count # Lexical errors too
+        self.starts = None
+        self.mode = 'full'
+        self.reparsed = len(self.tokens)
+
+        return self.ast
+
+    def edit(self, offset, deleted, inserted):
+        if not 0 <= offset <= offset + deleted <= len(self.text):
+            raise ValueError(f'Edit out of range: {offset}+{deleted} in {len(self.text)} characters')
+
+        text = self.text[:offset] + inserted + self.text[offset + deleted:]
+        if not self.valid:
+            return self.parse(text)
+
+        old = self.tokens
+        old_index = self.index
+        start, stop, fresh = self._relex(text, offset, deleted, len(inserted))
+        if self.parser.diagnostics.count:
+            return self.parse(text) # So that the errors of the whole text are reported
+        self.text = text
+        self.index = self.parser.c_lexer.index
+
+        # What follows the edit moves by as many lines as it adds, and on the line where the edit
+        # ends by as many columns as the text before it on that line changes
+        line, column = old_index.position(offset + deleted)
+        new_line, new_column = self.index.position(offset + len(inserted))
+        lines, columns = new_line - line, new_column - column
+        if lines or columns:
+            for token in old[stop:]:
+                if token.lineno == line:
+                    token.column += columns
+                elif not lines:
+                    break
+                token.lineno += lines
+            self._move([self.ast], line, column, lines, columns)
+
+        if start == stop and not fresh:
+            self.mode = 'unchanged'
+            self.reparsed = 0
+            return self.ast
+
+        # With a single function tokens 0-4 are 'int main ( ) {' and the last one closes it
+        end = len(old) - 1
+        reparsed = None
+        function = self.ast.functions[0] if len(self.ast.functions) == 1 else None
+        if function is not None and len(old) >= 6 and 5 <= start and stop <= end and old[end].type == '}':
+            self.tokens = old[:start] + fresh + old[stop:]
+            self.reparsed = 0
+            shift = len(fresh) - (stop - start)
+            items = (function.declarations or []) + (function.statements or [])
+            reparsed = self._reparse(items, self.starts, old, 5, end, start, stop, shift)
+
+        if reparsed is None:
+            return self.parse(text)
+
+        items, self.starts = reparsed
+        count = 0
+        while count < len(items) and isinstance(items[count], Declaration):
+            count += 1
+        function = located(Function(function.name, items[:count] or None, items[count:] or None), function)
+        self.ast = located(Program([function]), self.ast)
+        self.mode = 'incremental'
+        self.parser.diagnostics.clear() # Of the windows that did not parse
+
+        return self.ast
+
+    def _parse(self, tokens):
+        errors = self.parser.errors
+        tokens = iter(tokens)
+        ast = self.parser.parser.parse(lexer=self.parser.c_lexer.lexer, tokenfunc=lambda: next(tokens, None))
+
+        return ast, self.parser.errors == errors and ast is not None
+
+    def _relex(self, text, offset, deleted, inserted) -> tuple:
+        """Old tokens [start, stop) are replaced by the fresh ones, the ones after are shifted"""
+        old = self.tokens
+        delta = inserted - deleted
+
+        # A token is safe when the next one starts far enough before the edit
+        start = max(bisect.bisect_right(old, offset - LOOKAHEAD, key=lambda token: token.lexpos) - 1, 0)
+
+        c_lexer = self.parser.c_lexer
+        c_lexer.lexer.begin('INITIAL')
+        c_lexer.input(text)
+        c_lexer.lexer.lexpos = old[start].lexpos if start < len(old) else 0
+
+        fresh = []
+        stop = start
+        for token in c_lexer:
+            if token.lexpos >= offset + inserted:
+                # Past the edit the text is the same, a token starting where an old one did is followed by the same tokens
+                position = token.lexpos - delta
+                while stop < len(old) and old[stop].lexpos < position:
+                    stop += 1
+                if stop < len(old) and old[stop].lexpos == position:
+                    break
+            elif not fresh and stop < len(old) and (token.lexpos, token.type, token.value) == (old[stop].lexpos, old[stop].type, old[stop].value):
+                stop += 1 # Lexed again only for the lookahead, it is not damaged
+                start = stop
+                continue
+
+            fresh.append(token)
+        else:
+            stop = len(old)
+
+        for token in old[stop:]:
+            token.lexpos += delta
+
+        return start, stop, fresh
+
+    def _reparse(self, items, starts, tokens, start, end, damage_start, damage_stop, shift):
+        """
+            New items of a statement list that covered tokens[start:end] before the edit and the
+            new index of the first token of each one, None when the damage is not inside the list
+        """
+        if damage_start < start or damage_stop > end:
+            return None
+        if starts is None:
+            starts = self._segment(items, tokens, start, end)
+
+        # Every item ends with ';' or '}' or runs to the end of the list, so the items that hold no
+        # damaged token are complete on their own
+        first = bisect.bisect_right(starts, damage_start) - 1
+        if damage_start == damage_stop and (first < 0 or starts[first] == damage_start or damage_start == end):
+            # New tokens between two items, at the end of the list they go to the body of a last if, while or for
+            first = bisect.bisect_left(starts, damage_start)
+            last = first - 1
+            if first == len(items) and items and isinstance(items[-1], SWALLOWING):
+                first = last
+        else:
+            last = bisect.bisect_right(starts, damage_stop - 1) - 1
+
+        if items and first == last:
+            stop = starts[last + 1] if last + 1 < len(items) else end
+            nested = self._nested(items[last], tokens, starts[last], stop, damage_start, damage_stop, shift)
+            if nested is not None:
+                return items[:last] + list(nested) + items[last + 1:], starts[:last + 1] + [index + shift for index in starts[last + 1:]]
+
+        window_start = starts[first] if first < len(items) else end
+        window_stop = starts[last + 1] if last + 1 < len(items) else end
+        window = self._window(window_start, window_stop + shift)
+        if window_stop != end and (window is None or window and isinstance(window[-1], SWALLOWING)):
+            # The items that follow may complete it or become its body
+            window_stop = end
+            window = self._window(window_start, end + shift)
+        if window is None:
+            return None
+
+        window_starts = self._segment(window, self.tokens, window_start, window_stop + shift)
+        if window_stop == end:
+            return items[:first] + window, starts[:first] + window_starts
+        return items[:first] + window + items[last + 1:], starts[:first] + window_starts + [index + shift for index in starts[last + 1:]]
+
+    def _nested(self, node, tokens, first, stop, damage_start, damage_stop, shift):
+        """
+            A one item tuple with a copy of the block, if, if else, while or for statement in
+            tokens[first:stop] with the statement list holding the damage reparsed, None when
+            the damage is not inside one of its lists
+        """
+        if node is None or isinstance(node, list):
+            reparsed = self._reparse(node or [], None, tokens, first + 1, stop - 1, damage_start, damage_stop, shift)
+            return None if reparsed is None else (reparsed[0] or None,)
+
+        if not isinstance(node, SWALLOWING):
+            return None
+
+        body = self._header(tokens, first)
+        if isinstance(node, IfElseStatement):
+            body = self._end(node.then_statements, tokens, body) + 1 # After the else
+        if damage_start < body:
+            return None
+
+        statements = node.otherwise_statements if isinstance(node, IfElseStatement) else node.statements
+        reparsed = self._reparse(statements or [], None, tokens, body, stop, damage_start, damage_stop, shift)
+        if reparsed is None:
+            return None
+
+        statements = reparsed[0] or None
+        if isinstance(node, IfElseStatement):
+            return (located(IfElseStatement(node.expression, node.then_statements, statements), node),)
+        if isinstance(node, ForStatement):
+            return (located(ForStatement(node.declaration, node.expression, node.assignment, statements), node),)
+        return (located(type(node)(node.expression, statements), node),)
+
+    def _window(self, start, stop):
+        """Items of the new tokens[start:stop] parsed on their own"""
+        program = [_token('INT_KEYWORD', 'int'), _token('IDENTIFIER', 'main'), _token('(', '('), _token(')', ')'), _token('{', '{')]
+        window = self.tokens[start:stop]
+        ast, valid = self._parse(program + window + [_token('}', '}')])
+        if not valid or len(ast.functions) != 1:
+            return None
+
+        self.reparsed += len(window)
+        function, = ast.functions
+        return (function.declarations or []) + (function.statements or [])
+
+    def _segment(self, items, tokens, start, end) -> list:
+        """Index of the first token of every item of a statement list that covers tokens[start:end]"""
+        starts = []
+        index = start
+        for item in items:
+            starts.append(index)
+            index = self._skip(item, tokens, index, end)
+
+        return starts
+
+    def _end(self, items, tokens, index) -> int:
+        """Index after a statement list that starts at tokens[index] and is closed by an else"""
+        for item in items or []:
+            index = self._skip(item, tokens, index, None)
+
+        return index
+
+    def _skip(self, item, tokens, index, end) -> int:
+        """Index after the item that starts at tokens[index], end is where its list stops when it is known"""
+        if isinstance(item, (Declaration, Assignment)):
+            while tokens[index].type != ';':
+                index += 1
+            return index + 1
+
+        if isinstance(item, str): # ';'
+            return index + 1
+
+        if item is None or isinstance(item, list): # Block
+            depth = 0
+            while True:
+                kind = tokens[index].type
+                index += 1
+                if kind == '{':
+                    depth += 1
+                elif kind == '}':
+                    depth -= 1
+                    if not depth:
+                        return index
+
+        # if, if else, while and for take the rest of the list
+        if end is not None:
+            return end
+
+        index = self._header(tokens, index)
+        if isinstance(item, IfElseStatement):
+            index = self._end(item.then_statements, tokens, index) + 1
+            return self._end(item.otherwise_statements, tokens, index)
+        return self._end(item.statements, tokens, index)
+
+    def _move(self, items, line, column, lines, columns) -> bool:
+        """
+            Move the nodes of items that start at or after (line, column), the end of the edit.
+            True when one of them starts before it, then so do the items that come before.
+        """
+        for item in reversed(items):
+            if isinstance(item, list):
+                if self._move(item, line, column, lines, columns):
+                    return True
+            elif isinstance(item, ASTNode):
+                if not lines and item.lineno > line:
+                    continue # Neither the node nor its children are on the line of the edit
+                before = (item.lineno, item.column) < (line, column)
+                if not before:
+                    if item.lineno == line:
+                        item.column += columns
+                    item.lineno += lines
+                children = [value for value in item.fields().values() if isinstance(value, (list, ASTNode))]
+                self._move(children, line, column, lines, columns)
+                if before:
+                    return True
+
+        return False
+
+    @staticmethod
+    def _header(tokens, index) -> int:
+        """Index after the ')' that closes the header of an if, while or for statement"""
+        while tokens[index].type != ')':
+            index += 1
+
+        return index + 1
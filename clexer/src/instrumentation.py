@@ -0,0 +1,146 @@
+import contextlib
+import time
+import tracemalloc
+
+from src.ir import walk
+
+"""
+    Instrumentation of the stages of Compiler: lex, parse, fold, ir, llvm, codegen and cache.
+    Every Instrument given to a Compiler has start() called before a stage and finish()
+    after it, with the Stage of that run. A Stage carries the wall time and what went
+    through the stage: tokens of lex, AST nodes of parse, fold and ir, the instruction
+    counts of llvm. Nodes are counted only when an instrument reads them, after the timing;
+    read them in finish(), fold changes the tree of parse in place.
+    When any instrument sets memory, the stages run under tracemalloc and allocated is the
+    peak of the bytes allocated during the stage, at the cost of a much slower compilation.
+    Report is an instrument that adds up the stages of many compilations, print it to see
+    where the time goes.
+"""
+
+def count_nodes(tree) -> int:
+    count = 0
+    def enter(node):
+        nonlocal count
+        count += 1
+    walk(tree, enter)
+    return count
+
+
+class Stage:
+    def __init__(self, name, path=None) -> None:
+        self.name = name
+        self.path = path
+        self.seconds = None
+        self.allocated = None # Peak bytes allocated during the stage, None without memory tracing
+        self.tokens = None
+        self.instructions = None # (before, after) of llvm
+        self.failed = False
+        self.tree = None # AST the stage produced or lowered
+        self._nodes = None
+
+    @property
+    def nodes(self):
+        if self._nodes is None and self.tree is not None:
+            self._nodes = count_nodes(self.tree)
+        return self._nodes
+
+    def detach(self) -> None:
+        """Counts the nodes and drops the tree, before the stage is sent to another process"""
+        self._nodes = self.nodes
+        self.tree = None
+
+    def __repr__(self):
+        return f'Stage({self.name!r}, {self.path!r}, seconds={self.seconds!r}, tokens={self.tokens!r}, nodes={self.nodes!r})'
+
+
+class Instrument:
+    """Base of the instruments, the hooks do nothing"""
+    memory = False # Trace the allocations of every stage
+
+    def start(self, stage) -> None:
+        pass
+
+    def finish(self, stage) -> None:
+        pass
+
+
+class Recorder(Instrument):
+    """Counts the nodes of every stage as it finishes and drops the tree, so the stage can be sent to another process"""
+    def __init__(self, memory=False) -> None:
+        self.memory = memory
+
+    def finish(self, stage) -> None:
+        stage.detach()
+
+
+@contextlib.contextmanager
+def measure(instruments, name, path=None):
+    """Runs the body of the with statement as the stage name of every instrument"""
+    stage = Stage(name, path)
+    for instrument in instruments:
+        instrument.start(stage)
+
+    memory = any(instrument.memory for instrument in instruments)
+    if memory:
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+
+    start = time.perf_counter()
+    try:
+        yield stage
+    except BaseException:
+        stage.failed = True
+        raise
+    finally:
+        stage.seconds = time.perf_counter() - start
+        if memory:
+            stage.allocated = tracemalloc.get_traced_memory()[1] - base
+            if not tracing:
+                tracemalloc.stop()
+
+        for instrument in instruments:
+            instrument.finish(stage)
+
+
+class Totals:
+    def __init__(self) -> None:
+        self.runs = 0
+        self.failures = 0
+        self.seconds = 0.0
+        self.slowest = 0.0
+        self.tokens = 0
+        self.nodes = 0
+        self.allocated = None # Largest peak of a run
+
+    def add(self, stage) -> None:
+        self.runs += 1
+        self.failures += stage.failed
+        self.seconds += stage.seconds
+        self.slowest = max(self.slowest, stage.seconds)
+        self.tokens += stage.tokens or 0
+        self.nodes += stage.nodes or 0
+        if stage.allocated is not None:
+            self.allocated = max(self.allocated or 0, stage.allocated)
+
+
+class Report(Instrument):
+    def __init__(self, memory=False) -> None:
+        self.memory = memory
+        self.stages = {} # Totals by stage name, in the order the stages first ran
+
+    def finish(self, stage) -> None:
+        self.stages.setdefault(stage.name, Totals()).add(stage)
+
+    def __str__(self):
+        total = sum(totals.seconds for totals in self.stages.values()) or 1
+        lines = [f'{"stage":<6} {"runs":>6} {"total ms":>10} {"mean ms":>9} {"max ms":>9} {"share":>6} {"tokens/s":>11} {"nodes":>9} {"peak KB":>9}']
+        for name, totals in self.stages.items():
+            rate = f'{totals.tokens / totals.seconds:,.0f}' if totals.tokens and totals.seconds else '-'
+            peak = f'{totals.allocated / 1024:.1f}' if totals.allocated is not None else '-'
+            lines.append(f'{name:<6} {totals.runs:>6} {totals.seconds * 1000:>10.2f} {totals.seconds / totals.runs * 1000:>9.3f} '
+                         f'{totals.slowest * 1000:>9.3f} {totals.seconds / total:>6.1%} {rate:>11} {totals.nodes or "-":>9} {peak:>9}')
+        return '\n'.join(lines)
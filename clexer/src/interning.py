@@ -0,0 +1,97 @@
+from src.literals import float_value, float_values, int_value, int_values
+
+"""
+    Interning of the identifiers and numeric literals of a translation unit, shared by the
+    CLexer that makes the tokens and the CParser that builds the AST from them:
+        - SymbolTable gives every distinct identifier an id and keeps one string for it. Every
+          token and AST node of the name refers to that string, so a name repeated a million
+          times is stored once, pickles once, and dict lookups of it succeed on identity.
+        - ConstantPool converts every distinct INT and FLOAT literal text once and hands out
+          the same value for every other occurrence, one at a time or in batches.
+    The parser clears both at the start of every parse, a unit does not keep the names of
+    the ones parsed before it alive.
+"""
+
+class Strings(dict):
+    """Dict of strings to themselves, a missing name is added as it is looked up"""
+    def __missing__(self, name):
+        self[name] = name
+        return name
+
+
+class SymbolTable:
+    def __init__(self) -> None:
+        self.strings = Strings() # The string kept for every name, in the order the names were first seen
+        self.names = [] # Name of every id, extended from strings when ids are asked for
+        self.ids = {}
+        # The string kept for name, name itself the first time it is seen. It runs for every
+        # identifier token, so it is the lookup of strings itself
+        self.intern = self.strings.__getitem__
+
+    def _number(self) -> None:
+        for name in list(self.strings)[len(self.names):]:
+            self.ids[name] = len(self.names)
+            self.names.append(name)
+
+    def id(self, name) -> int:
+        """Id of name, ids count the names in the order they were first seen"""
+        name = self.intern(name)
+        if name not in self.ids:
+            self._number()
+        return self.ids[name]
+
+    def name(self, id) -> str:
+        if id >= len(self.names):
+            self._number()
+        return self.names[id]
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __contains__(self, name):
+        return name in self.strings
+
+    def clear(self) -> None:
+        self.strings.clear()
+        self.names.clear()
+        self.ids.clear()
+
+
+class ConstantPool:
+    def __init__(self) -> None:
+        self.ints = {} # Value of every INT text
+        self.floats = {} # Value of every FLOAT text
+        self.converters = {'INT': self.int_value, 'FLOAT': self.float_value}
+        self.batch_converters = {'INT': self.int_values, 'FLOAT': self.float_values}
+
+    def int_value(self, text) -> int:
+        value = self.ints.get(text)
+        if value is None:
+            value = self.ints[text] = int_value(text)
+        return value
+
+    def float_value(self, text) -> float:
+        value = self.floats.get(text)
+        if value is None:
+            value = self.floats[text] = float_value(text)
+        return value
+
+    def int_values(self, texts) -> list:
+        return self._values(self.ints, int_values, texts)
+
+    def float_values(self, texts) -> list:
+        return self._values(self.floats, float_values, texts)
+
+    @staticmethod
+    def _values(pool, convert, texts) -> list:
+        # Only the texts never seen are converted, each of them once
+        missing = [text for text in dict.fromkeys(texts) if text not in pool]
+        pool.update(zip(missing, convert(missing)))
+        return [pool[text] for text in texts]
+
+    def __len__(self):
+        return len(self.ints) + len(self.floats)
+
+    def clear(self) -> None:
+        self.ints.clear()
+        self.floats.clear()
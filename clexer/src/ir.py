@@ -4,13 +4,28 @@ from typing import Any
 
 from llvmlite import ir
 
+from src.scopes import Scopes, SemanticError, Symbol
+
 int32 = ir.IntType(32)
 float32 = ir.FloatType()
+bool1 = ir.IntType(1)
+
+TYPES = {'int': int32, 'float': float32}
 
 # Definición global
 class ASTNode(ABC):
+    # Line and column of the first token of the node, set by the parser. Every node class
+    # lists its own attributes in __slots__, so nodes have no __dict__
+    __slots__ = ('lineno', 'column')
+    children = () # Attributes that hold nodes or statement lists, in the order they are visited
+
+    def fields(self) -> dict:
+        """Attributes of the node without its position"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
     @abstractmethod
-    def accept(self, visitor: Visitor) -> None:
+    def accept(self, visitor: Visitor):
+        """Calls the visit method of the node, what it returns is returned"""
         pass
 
 class Visitor(ABC):
@@ -18,6 +33,9 @@ class Visitor(ABC):
     def visit_program(self, node: Program) -> None:
         pass
     @abstractmethod
+    def visit_function(self, node: Function) -> None:
+        pass
+    @abstractmethod
     def visit_for_statement(self, node: ForStatement) -> None:
         pass
     @abstractmethod
@@ -48,287 +66,559 @@ class Visitor(ABC):
     def visit_literal(self, node: Literal) -> None:
         pass
 
+    def visit_block(self, statements: list):
+        """Called by run() for a block, a statement list inside another one. Yielding the list visits its statements"""
+        yield statements
+
 class Program(ASTNode):
-    def __init__(self, declarations: list, statements: list) -> None:
+    __slots__ = ('functions',)
+    children = ('functions',)
+
+    def __init__(self, functions: list) -> None:
+        self.functions = functions
+        self.lineno = self.column = None
+    
+    def accept(self, visitor: Visitor):
+        return visitor.visit_program(self)
+
+class Function(ASTNode):
+    __slots__ = ('name', 'declarations', 'statements')
+    children = ('declarations', 'statements')
+
+    def __init__(self, name: str, declarations: list, statements: list) -> None:
+        self.name = name
         self.declarations = declarations
         self.statements = statements
-    
-    def accept(self, visitor: Visitor) -> None:
-        visitor.visit_program(self)
+        self.lineno = self.column = None
+
+    def accept(self, visitor: Visitor):
+        return visitor.visit_function(self)
 
 class ForStatement(ASTNode):
+    __slots__ = ('declaration', 'expression', 'assignment', 'statements')
+    children = ('declaration', 'expression', 'assignment', 'statements')
+
     def __init__(self, declaration: ASTNode, expression: ASTNode, assignment: ASTNode, statements: list) -> None:
         self.declaration = declaration
         self.expression = expression
         self.assignment = assignment
         self.statements = statements
+        self.lineno = self.column = None
 
     def accept(self, visitor: Visitor):
-        visitor.visit_for_statement(self)
+        return visitor.visit_for_statement(self)
 
 class IfStatement(ASTNode):
+    __slots__ = ('expression', 'statements')
+    children = ('expression', 'statements')
+
     def __init__(self, expression: ASTNode, statements: list) -> None:
         self.expression = expression
         self.statements = statements
+        self.lineno = self.column = None
 
     def accept(self, visitor: Visitor):
-        visitor.visit_if_statement(self)
+        return visitor.visit_if_statement(self)
 
 class IfElseStatement(ASTNode):
+    __slots__ = ('expression', 'then_statements', 'otherwise_statements')
+    children = ('expression', 'then_statements', 'otherwise_statements')
+
     def __init__(self, expression: ASTNode, then_statements: list, otherwise_statements: list) -> None:
         self.expression = expression
         self.then_statements = then_statements
         self.otherwise_statements = otherwise_statements
+        self.lineno = self.column = None
 
     def accept(self, visitor: Visitor):
-        visitor.visit_if_else_statement(self)
+        return visitor.visit_if_else_statement(self)
 
 class WhileStatement(ASTNode):
+    __slots__ = ('expression', 'statements')
+    children = ('expression', 'statements')
+
     def __init__(self, expression: ASTNode, statements: list) -> None:
         self.expression = expression
         self.statements = statements
+        self.lineno = self.column = None
 
     def accept(self, visitor: Visitor):
-        visitor.visit_while_statement(self)
+        return visitor.visit_while_statement(self)
 
 class BooleanOp(ASTNode):
+    __slots__ = ('lhs', 'rhs', 'op')
+    children = ('lhs', 'rhs')
+
     def __init__(self, op: str, lhs: ASTNode, rhs: ASTNode) -> None:
         self.lhs = lhs
         self.rhs = rhs
         self.op = op
+        self.lineno = self.column = None
 
     def accept(self, visitor: Visitor):
-        visitor.visit_relational_op(self)
+        return visitor.visit_boolean_op(self)
 
 class RelationalOp(ASTNode):
+    __slots__ = ('lhs', 'rhs', 'op')
+    children = ('lhs', 'rhs')
+
     def __init__(self, op: str, lhs: ASTNode, rhs: ASTNode) -> None:
         self.lhs = lhs
         self.rhs = rhs
         self.op = op
+        self.lineno = self.column = None
 
     def accept(self, visitor: Visitor):
-        visitor.visit_relational_op(self)
+        return visitor.visit_relational_op(self)
 
 class BinaryOp(ASTNode):
+    __slots__ = ('lhs', 'rhs', 'op')
+    children = ('lhs', 'rhs')
+
     def __init__(self, op: str, lhs: ASTNode, rhs: ASTNode) -> None:
         self.lhs = lhs
         self.rhs = rhs
         self.op = op
+        self.lineno = self.column = None
 
     def accept(self, visitor: Visitor):
-        visitor.visit_binary_op(self)
+        return visitor.visit_binary_op(self)
 
 class Assignment(ASTNode):
+    __slots__ = ('id', 'value')
+    children = ('value',)
+
     def __init__(self, id: str, value: ASTNode) -> None:
         self.id = id
         self.value = value
+        self.lineno = self.column = None
 
     def accept(self, visitor: Visitor):
-        visitor.visit_assignment(self)
+        return visitor.visit_assignment(self)
 
 class Declaration(ASTNode):
+    __slots__ = ('type', 'id', 'value')
+    children = ('value',)
+
     def __init__(self, type: str, id: str, value: ASTNode) -> None:
         self.type = type
         self.id = id
         self.value = value
+        self.lineno = self.column = None
 
     def accept(self, visitor: Visitor):
-        visitor.visit_declaration(self)
+        return visitor.visit_declaration(self)
 
 class Literal(ASTNode):
+    __slots__ = ('value', 'type')
+    children = ()
+
     def __init__(self, value: Any, type: str) -> None:
         self.value = value
         self.type = type
+        self.lineno = self.column = None
 
     def accept(self, visitor: Visitor):
-        visitor.visit_literal(self)
+        return visitor.visit_literal(self)
+
+ListIterator = type(iter([]))
+
+def run(visitor: Visitor, tree) -> None:
+    """
+        Visits tree with an explicit stack instead of Python recursion, so a tree of any depth
+        can be visited. A visit method with children to visit is a generator: it yields each
+        child, a node or a statement list, and is resumed once the child has been visited. The
+        code before a yield runs in pre-order and the code after it in post-order. A visit method
+        that is a plain function is just called.
+        A list found in a statement list is a block, visit_block of the visitor is called for it
+        like the visit method of a node, so the visitor can give it a scope.
+    """
+    pending = [iter((tree,))]
+    while pending:
+        items = pending[-1]
+        for item in items:
+            if isinstance(item, list):
+                if type(items) is not ListIterator:
+                    pending.append(iter(item))
+                    break
+                children = visitor.visit_block(item)
+            elif isinstance(item, ASTNode):
+                children = item.accept(visitor)
+            else:
+                continue
+            if children is not None:
+                pending.append(children)
+                break
+        else:
+            pending.pop()
+
+def walk(tree, enter=None, leave=None) -> None:
+    """
+        Calls enter(node) before the children of every node of tree and leave(node) after them,
+        depth first and without recursion. When enter returns False the children are skipped.
+    """
+    pending = [tree]
+    pop = pending.pop
+    push = pending.append
+    while pending:
+        item = pop()
+        if isinstance(item, ASTNode):
+            if enter is not None and enter(item) is False:
+                continue
+            if leave is not None:
+                push((item,)) # Left once the children pushed after it are done
+            for name in reversed(item.children):
+                push(getattr(item, name))
+        elif isinstance(item, list):
+            pending.extend(reversed(item))
+        elif isinstance(item, tuple):
+            leave(item[0])
+
+def loop_writes(tree) -> dict:
+    """Variables assigned in every loop of tree, nested loops included, keyed by the loop node"""
+    loops = {}
+    open_loops = []
+
+    def enter(node):
+        if isinstance(node, (ForStatement, WhileStatement)):
+            open_loops.append({}) # Ordered set of names, so the phis come out in a stable order
+        elif isinstance(node, Assignment) and open_loops:
+            open_loops[-1][node.id] = None
+
+    def leave(node):
+        if isinstance(node, (ForStatement, WhileStatement)):
+            loops[node] = writes = open_loops.pop()
+            if open_loops:
+                open_loops[-1].update(writes)
+
+    walk(tree, enter, leave)
+    return loops
 
 class IR(Visitor):
+    """
+        Lowers the AST of a program to LLVM IR in SSA form, every function to an ir.Function of
+        the module. A function only depends on the names of the others, so the functions of a
+        unit can be lowered by different visitors (see src.lowering).
+        Variables are never stored in memory: the current value of every variable is tracked
+        while the code is generated and phi nodes join the values where the control flow does:
+            - At the merge block of an if, for the variables assigned in either branch.
+            - At the head of a loop, for the variables declared before the loop and assigned in
+              it, found beforehand with loop_writes.
+        Every branch and loop body writes into a frame that remembers the values from before
+        it, so a merge only looks at the variables that were assigned.
+        Names are resolved through the Scopes of the visitor and values are kept per Symbol, so a
+        variable declared in a nested scope shadows the outer one and is gone once the scope is
+        left, its values never reach a phi.
+    """
+    # There are no return statements, every function is lowered returning void
+    return_type = ir.VoidType()
+
     def __init__(self):
         self.module = ir.Module()
-        self.function = ir.Function(self.module, ir.FunctionType(ir.VoidType(), []), name="main")
-        self.block = self.function.append_basic_block(name="entry")
-        self.builder = ir.IRBuilder(self.block)
-        self.definitions = {}
+        self.function = None # The function being lowered, with its entry block and the builder
+        self.block = None
+        self.builder = None
+        self.scopes = Scopes()
+        self.scopes.enter('file')
+        self.values = {} # Current value of every symbol that has one
+        self.frames = [] # Values before the innermost branches and loops, of the symbols written in them
+        self.writes = {}
         self.stack = []
 
+    # ast.accept(IR()) generates the whole program, the function visits call run() to drive the generators
     def visit_program(self, node: Program) -> None:
-        if node.declarations:
-            for declaration in node.declarations:
-                declaration.accept(self)
+        self.declare_functions(node.functions)
+        for function in node.functions:
+            function.accept(self)
+
+    def visit_function(self, node: Function) -> None:
+        self.begin_function(node)
+        run(self, node.declarations)
+        run(self, node.statements)
+        self.end_function()
+
+    def declare_functions(self, functions) -> None:
+        for function in functions:
+            self.scopes.declare(function.name, 'int()', 'extern', function)
+
+    def begin_function(self, node: Function) -> None:
+        """Makes the ir.Function of node the current one, positioned at its entry block, in a scope of its own"""
+        self.function = ir.Function(self.module, ir.FunctionType(self.return_type, []), name=node.name)
+        self.block = self.function.append_basic_block(name="entry")
+        self.builder = ir.IRBuilder(self.block)
+        self.scopes.enter('function')
+        self.values = {}
+        self.frames = []
+        self.writes = loop_writes(node)
 
-        if node.statements:
-            for statement in node.statements:
-                statement.accept(self)
+    def end_function(self) -> None:
+        if not self.builder.block.is_terminated:
+            self.builder.ret_void()
+        self.scopes.leave()
 
     def visit_for_statement(self, node: ForStatement) -> None:
         # Declaration is taken as an assignment, therefore, the variable must be initialized first
-        node.declaration.accept(self)
-        node.expression.accept(self)
-        condition = self.stack.pop()
+        self.scopes.enter('for')
+        yield node.declaration
 
         forHead = self.function.append_basic_block('for-head')
         forBody = self.function.append_basic_block('for-body')
         forExit = self.function.append_basic_block('for-exit')
 
-        self.builder.branch(forHead)
-        self.builder.position_at_start(forHead)
-        self.builder.cbranch(
-            condition,
-            forBody, forExit
-        )
-        
-        # If there are more than one statement, add the assignment to the statements
-        if isinstance(node.statements[0], list):
-            node.statements = node.statements[0] # Flatten the list
-            node.statements.append(node.assignment) # Append the assingment to the end of the list
+        # The condition is evaluated on every iteration
+        loop = self.enter_loop(node, forHead)
+        self.builder.cbranch((yield from self.condition(node.expression)), forBody, forExit)
 
-        # Start the loop body
-        self.builder.position_at_start(forBody)
-        for statement in node.statements:
-            statement.accept(self)
+        # Start the loop body, the assignment runs after the statements
+        self.builder.position_at_end(forBody)
+        yield from self.body(node.statements)
+        yield node.assignment
 
-        self.builder.branch(forHead)
-        self.builder.position_at_start(forExit)
+        self.leave_loop(loop, forHead, forExit)
+        self.scopes.leave()
 
     def visit_if_statement(self, node: IfStatement) -> None:
-        node.expression.accept(self)
-        condition = self.stack.pop()
+        condition = yield from self.condition(node.expression)
+        before = self.builder.block
         with self.builder.if_then(condition):
             # Emmit instructions for when the predicate is true
-            if isinstance(node.statements, list):
-                for statement in node.statements:
-                    statement.accept(self)
-            else:
-                statement.accept(self)
-    
+            self.frames.append({})
+            yield from self.body(node.statements)
+            then, then_frame = self.builder.block, self.restore()
+        self.merge(then, then_frame, before, {})
+
     def visit_if_else_statement(self, node: IfElseStatement) -> None:
-        node.expression.accept(self)
-        condition = self.stack.pop()
+        condition = yield from self.condition(node.expression)
         with self.builder.if_else(condition) as (then, otherwise):
             # Emmit instructions for when the predicate is true
             with then:
-                if isinstance(node.then_statements, list):
-                    for statement in node.then_statements:
-                        statement.accept(self)
-                else:
-                    statement.accept(self)
+                self.frames.append({})
+                yield from self.body(node.then_statements)
+                then_block, then_frame = self.builder.block, self.restore()
             with otherwise:
-                if isinstance(node.otherwise_statements, list):
-                    for statement in node.otherwise_statements:
-                        statement.accept(self)
-                else:
-                    statement.accept(self)
+                self.frames.append({})
+                yield from self.body(node.otherwise_statements)
+                otherwise_block, otherwise_frame = self.builder.block, self.frames.pop()
+        self.merge(then_block, then_frame, otherwise_block, otherwise_frame)
 
     def visit_while_statement(self, node: WhileStatement) -> None:
-        node.expression.accept(self)
-        condition = self.stack.pop()
         whileHead = self.function.append_basic_block('while-head')
         whileBody = self.function.append_basic_block('while-body')
         whileExit = self.function.append_basic_block('while-exit')
 
-        self.builder.branch(whileHead)
-        self.builder.position_at_start(whileHead)
-        self.builder.cbranch(
-            condition,
-            whileBody, whileExit
-        )
-        
-        if isinstance(node.statements[0], list):
-            # Flatten the list
-            node.statements = node.statements[0]
+        loop = self.enter_loop(node, whileHead)
+        self.builder.cbranch((yield from self.condition(node.expression)), whileBody, whileExit)
 
         # Start the loop body
-        self.builder.position_at_start(whileBody)
-        for statement in node.statements:
-            statement.accept(self)
+        self.builder.position_at_end(whileBody)
+        yield from self.body(node.statements)
 
-        self.builder.branch(whileHead)
-        self.builder.position_at_start(whileExit)
+        self.leave_loop(loop, whileHead, whileExit)
 
     def visit_boolean_op(self, node: BooleanOp) -> None:
-        pass# Start the loop body
+        # Expressions have no side effects, so both sides are evaluated
+        lhs = yield from self.condition(node.lhs)
+        rhs = yield from self.condition(node.rhs)
+
+        if node.op == '&&':
+            self.stack.append(self.builder.and_(lhs, rhs))
+        else:
+            self.stack.append(self.builder.or_(lhs, rhs))
 
     def visit_relational_op(self, node: RelationalOp) -> None:
-        node.lhs.accept(self)
-        node.rhs.accept(self)
-        lhs = self.stack.pop()
-        rhs = self.stack.pop()
+        lhs, rhs = yield from self.operands(node)
 
-        self.stack.append(self.builder.icmp_signed(node.op, lhs, rhs))
+        if lhs.type == float32:
+            self.stack.append(self.builder.fcmp_ordered(node.op, lhs, rhs))
+        else:
+            self.stack.append(self.builder.icmp_signed(node.op, lhs, rhs))
 
     def visit_binary_op(self, node: BinaryOp) -> None:
-        node.lhs.accept(self)
-        node.rhs.accept(self)
-        lhs = self.stack.pop()
-        rhs = self.stack.pop()
-
-        # Check wheter the value has been allocated or not and load its value
-        if isinstance(lhs, ir.instructions.AllocaInstr):
-            lhs = self.builder.load(lhs, name=lhs.name)
-        elif isinstance(rhs, ir.instructions.AllocaInstr):
-            rhs = self.builder.load(rhs, name=rhs.name)
-
-        if node.op == '+':
-            self.stack.append(self.builder.add(lhs, rhs))
-        elif node.op == '-':
-            self.stack.append(self.builder.sub(lhs, rhs))
-        elif node.op == '*':
-            self.stack.append(self.builder.mul(lhs, rhs))
-        elif node.op == '/':
-            self.stack.append(self.builder.sdiv(lhs, rhs))
+        lhs, rhs = yield from self.operands(node)
 
-    def visit_assignment(self, node: Assignment) -> None:
-        if node.id not in self.definitions:
-            raise # Variable is not defined, raise an error
-        
-        node.value.accept(self)
-        value = self.stack.pop()
-        variable = self.definitions[node.id]
-        data_type = variable[1]
-        allocation = variable[0]
+        if lhs.type == float32:
+            operations = {'+': self.builder.fadd, '-': self.builder.fsub, '*': self.builder.fmul, '/': self.builder.fdiv, '%': self.builder.frem}
+        else:
+            operations = {'+': self.builder.add, '-': self.builder.sub, '*': self.builder.mul, '/': self.builder.sdiv, '%': self.builder.srem}
 
-        if data_type == 'int':
-            self.builder.store(ir.Constant(int32, value), allocation)
-        elif data_type == 'float':
-            self.builder.store(ir.Constant(float32, value), allocation)
-
-    def allocate(self, type, id):
-        allocation = None
-        if type == 'int':
-            allocation = self.builder.alloca(int32, name=id)
-        elif type == 'float':
-            allocation = self.builder.alloca(float32, name=id)
-        
-        self.definitions[id] = (allocation, type)
+        self.stack.append(operations[node.op](lhs, rhs))
 
+    def visit_assignment(self, node: Assignment) -> None:
+        symbol = self.variable(node.id, node)
+        yield node.value
+        self.write(symbol, self.convert(self.stack.pop(), TYPES[symbol.type]))
 
     def visit_declaration(self, node: Declaration) -> None:
-        if node.id in self.definitions:
-            raise # Re-defined variable, raise an error
-        
-        if not node.value: # Just the definition
-            self.allocate(node.type, node.id)
-        else: # Variable is defined with a value
-            self.allocate(node.type, node.id)
-            definition = self.definitions[node.id]
-            allocation = definition[0]
-            type = definition[1]
-            node.value.accept(self)
-            value = self.stack.pop()
-            if type == 'int':
-                self.builder.store(ir.Constant(int32, value), allocation)
-            elif type == 'float':
-                self.builder.store(ir.Constant(float32, value), allocation)
+        symbol = self.declare(node)
+        if node.value: # Variable is defined with a value
+            yield node.value
+            self.write(symbol, self.convert(self.stack.pop(), TYPES[node.type]))
 
     def visit_literal(self, node: Literal) -> None:
         if node.type == 'INT':
-            new_value = int32(node.value)
-            self.stack.append(new_value)
+            self.stack.append(int32(node.value))
         elif node.type == 'FLOAT':
-            new_value = float32(node.value)
-            self.stack.append(new_value)
+            self.stack.append(float32(node.value))
         else: # Visit a literal that is an identifier, e.g. x = (x <- literal) + 1
-            definition = self.definitions[node.value]
-            variable = definition[0]
-            self.stack.append(variable)
\ No newline at end of file
+            self.stack.append(self.read(self.variable(node.value, node)))
+
+    def body(self, statements):
+        """Visits a block, or the body of an if, else or loop, in a scope of its own"""
+        self.scopes.enter()
+        yield statements
+        self.scopes.leave()
+
+    visit_block = body
+
+    def variable(self, id, node) -> Symbol:
+        return self.scopes.variable(id, node)
+
+    def declare(self, node: Declaration) -> Symbol:
+        return self.scopes.declare(node.id, node.type, node=node)
+
+    def read(self, symbol) -> ir.Value:
+        """Current value of a declared variable, undef until it is first assigned"""
+        value = self.values.get(symbol)
+        return value if value is not None else self.undefined(symbol)
+
+    def write(self, symbol, value) -> None:
+        if self.frames and symbol not in self.frames[-1]:
+            self.frames[-1][symbol] = self.values.get(symbol)
+        self.values[symbol] = value
+
+    def undefined(self, symbol) -> ir.Value:
+        return ir.Constant(TYPES[symbol.type], ir.Undefined)
+
+    def restore(self) -> dict:
+        """
+            Ends the innermost frame and puts back the values from before it. The frame, with
+            the value each variable has at its end instead, is returned
+        """
+        frame = self.frames.pop()
+        for symbol, value in frame.items():
+            frame[symbol] = self.values[symbol]
+            if value is None:
+                del self.values[symbol]
+            else:
+                self.values[symbol] = value
+        return frame
+
+    def merge(self, then, then_frame, otherwise, otherwise_frame) -> None:
+        """
+            Joins the values at the end of both branches at the current block. then_frame holds the
+            values at the end of then, otherwise_frame the ones from before the branches of the
+            variables written in otherwise, which are still the current ones
+        """
+        ends = {symbol: self.read(symbol) for symbol in otherwise_frame}
+        for symbol, value in otherwise_frame.items():
+            self.values[symbol] = value
+            if value is None:
+                del self.values[symbol]
+
+        for symbol in dict.fromkeys([*then_frame, *ends]):
+            if not symbol.scope.open: # Declared in a branch, it cannot be read after it
+                continue
+            then_value = then_frame[symbol] if symbol in then_frame else self.read(symbol)
+            otherwise_value = ends[symbol] if symbol in ends else self.read(symbol)
+            if then_value is otherwise_value:
+                continue
+            phi = self.builder.phi(TYPES[symbol.type], name=symbol.name)
+            phi.add_incoming(then_value, then)
+            phi.add_incoming(otherwise_value, otherwise)
+            self.write(symbol, phi)
+
+    def enter_loop(self, node, head) -> tuple:
+        """Branches to head and gives the variables assigned in the loop their phi there, the preheader and the phis are returned"""
+        preheader = self.builder.block
+        self.builder.branch(head)
+        self.builder.position_at_end(head)
+
+        phis = {}
+        self.frames.append({})
+        for id in self.writes.get(node, ()):
+            # Writes are known by name, a name declared again in the loop gives the outer symbol
+            # a phi that never changes, which the optimizer removes. Names that are not variables
+            # are left to the assignment to report
+            symbol = self.scopes.lookup(id)
+            if symbol is not None and symbol.storage == 'auto':
+                phis[symbol] = phi = self.builder.phi(TYPES[symbol.type], name=id)
+                phi.add_incoming(self.read(symbol), preheader)
+                self.write(symbol, phi)
+        return preheader, phis
+
+    def leave_loop(self, loop, head, exit) -> None:
+        """Closes the loop back to head, the values after it are the ones of head"""
+        preheader, phis = loop
+        latch = self.builder.block
+        self.builder.branch(head)
+
+        # The other symbols of the frame were declared in the body, they are gone with its scope
+        frame = self.restore()
+        for symbol, phi in phis.items():
+            phi.add_incoming(frame[symbol], latch)
+
+        self.builder.position_at_end(exit)
+        for symbol, phi in phis.items():
+            self.write(symbol, phi)
+
+    def operands(self, node) -> tuple:
+        yield node.lhs
+        yield node.rhs
+        rhs = self.stack.pop()
+        lhs = self.stack.pop()
+
+        # Comparisons are i1, they take part in arithmetic as int
+        lhs = self.convert(lhs, int32) if lhs.type == bool1 else lhs
+        rhs = self.convert(rhs, int32) if rhs.type == bool1 else rhs
+        if lhs.type == float32 or rhs.type == float32:
+            return self.convert(lhs, float32), self.convert(rhs, float32)
+        return lhs, rhs
+
+    def condition(self, expression) -> ir.Value:
+        yield expression
+        value = self.stack.pop()
+
+        if value.type == bool1:
+            return value
+        if value.type == float32:
+            return self.builder.fcmp_ordered('!=', value, float32(0))
+        return self.builder.icmp_signed('!=', value, value.type(0))
+
+    def convert(self, value, type) -> ir.Value:
+        if value.type == type:
+            return value
+        if value.type == bool1:
+            value = self.builder.zext(value, int32)
+            if type == int32:
+                return value
+        if type == float32:
+            return self.builder.sitofp(value, float32)
+        return self.builder.fptosi(value, type)
+
+
+class MemoryIR(IR):
+    """
+        The lowering IR used to do, kept as the baseline of the SSA form: every variable is an
+        alloca of its own entry block, read with a load and written with a store, and mem2reg
+        is left to build the SSA form.
+    """
+    def begin_function(self, node: Function) -> None:
+        super().begin_function(node)
+        self.allocations = ir.IRBuilder(self.function.insert_basic_block(0, 'allocations'))
+        self.slots = {}
+        self.writes = {} # No loop_writes, so no phis
+
+    def end_function(self) -> None:
+        super().end_function()
+        self.allocations.branch(self.block)
+
+    def declare(self, node: Declaration) -> Symbol:
+        symbol = super().declare(node)
+        self.slots[symbol] = self.allocations.alloca(TYPES[node.type], name=node.id)
+        return symbol
+
+    def read(self, symbol) -> ir.Value:
+        return self.builder.load(self.slots[symbol], name=symbol.name)
+
+    def write(self, symbol, value) -> None:
+        self.builder.store(value, self.slots[symbol])
@@ -0,0 +1,90 @@
+import ctypes
+import hashlib
+from collections import OrderedDict
+
+import llvmlite.binding as llvm
+
+from src.optimizer import create_target_machine
+
+"""
+    In-process execution of compiled programs with the llvmlite MCJIT engine.
+    JIT compiles a module to machine code once and keeps the engine, keyed by the
+    hash of the IR, so running the same program again only calls into native code:
+        - The IR can be the module built by the IR visitor or its text.
+        - main must take no arguments and return void, int or float, its return
+          type is checked against the module before anything is called.
+        - The number of engines kept alive is bounded, the least recently used
+          one is released first.
+"""
+
+RETURN_TYPES = {'void': None, 'i32': ctypes.c_int32, 'float': ctypes.c_float}
+
+
+class JITError(Exception):
+    pass
+
+
+class CompiledProgram:
+    def __init__(self, engine, module, function) -> None:
+        self.engine = engine
+        self.module = module # Owned by the engine, kept so it outlives every call
+        self.function = function
+
+    def __call__(self):
+        return self.function()
+
+
+class JIT:
+    def __init__(self, max_engines=64) -> None:
+        self.max_engines = max_engines
+        self.programs = OrderedDict()
+
+    @staticmethod
+    def key(ir) -> str:
+        return hashlib.sha256(str(ir).encode('utf-8')).hexdigest()
+
+    def load(self, ir, entry='main') -> CompiledProgram:
+        key = self.key(ir)
+        if key in self.programs:
+            self.programs.move_to_end(key)
+            return self.programs[key]
+
+        program = self.compile(str(ir), entry)
+        self.programs[key] = program
+        if len(self.programs) > self.max_engines:
+            self.programs.popitem(last=False)
+
+        return program
+
+    def compile(self, ir, entry) -> CompiledProgram:
+        module = llvm.parse_assembly(ir)
+        module.verify()
+
+        try:
+            function = module.get_function(entry)
+        except NameError:
+            function = None
+        if function is None or function.is_declaration:
+            raise JITError(f"'{entry}' is not defined")
+        signature = function.global_value_type
+        if list(signature.get_function_parameters()) or signature.is_function_vararg:
+            raise JITError(f"'{entry}' must not take arguments")
+        return_type = str(signature.get_function_return())
+        if return_type not in RETURN_TYPES:
+            raise JITError(f"'{entry}' returns unsupported type {return_type}")
+
+        # The engine takes ownership of the target machine, it cannot be shared
+        engine = llvm.create_mcjit_compiler(module, create_target_machine())
+        engine.finalize_object()
+        engine.run_static_constructors()
+
+        address = engine.get_function_address(entry)
+        function = ctypes.CFUNCTYPE(RETURN_TYPES[return_type])(address)
+
+        return CompiledProgram(engine, module, function)
+
+    def run(self, ir, entry='main'):
+        return self.load(ir, entry)()
+
+    def clear(self) -> None:
+        self.programs.clear()
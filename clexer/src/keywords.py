@@ -0,0 +1,135 @@
+"""
+    Reserved words of every C dialect the lexer can be built for, and the token type of each.
+    A dialect is selected when the lexer is built: its keywords are merged into a single dict
+    and every identifier is classified with one lookup in it. Words that are not keywords of
+    the dialect are identifiers, so 'bool' is a keyword in C23 and a plain name in C11.
+        - c89, c99, c11 and c23 follow the standards, each one extends the previous one
+        - msvc is c11 without _Imaginary, with the Microsoft extensions and the typeof
+          family, the default: the keywords the lexer had before dialects
+    The token types of all the dialects are always declared, so the parser tables do not
+    depend on the dialect.
+"""
+
+C89 = {
+    'auto'     : 'AUTO',
+    'break'    : 'BREAK',
+    'case'     : 'CASE',
+    'char'     : 'CHAR',
+    'const'    : 'CONST',
+    'continue' : 'CONTINUE',
+    'default'  : 'DEFAULT',
+    'do'       : 'DO',
+    'double'   : 'DOUBLE',
+    'else'     : 'ELSE',
+    'enum'     : 'ENUM',
+    'extern'   : 'EXTERN',
+    'float'    : 'FLOAT_KEYWORD',
+    'for'      : 'FOR',
+    'goto'     : 'GOTO',
+    'if'       : 'IF',
+    'int'      : 'INT_KEYWORD',
+    'long'     : 'LONG',
+    'register' : 'REGISTER',
+    'return'   : 'RETURN',
+    'short'    : 'SHORT',
+    'signed'   : 'SIGNED',
+    'sizeof'   : 'SIZEOF',
+    'static'   : 'STATIC',
+    'struct'   : 'STRUCT',
+    'switch'   : 'SWITCH',
+    'typedef'  : 'TYPEDEF',
+    'union'    : 'UNION',
+    'unsigned' : 'UNSIGNED',
+    'void'     : 'VOID',
+    'volatile' : 'VOLATILE',
+    'while'    : 'WHILE',
+}
+
+C99 = {
+    **C89,
+    'inline'     : 'INLINE',
+    'restrict'   : 'RESTRICT',
+    '_Bool'      : '_BOOL',
+    '_Complex'   : '_COMPLEX',
+    '_Imaginary' : '_IMAGINARY',
+}
+
+C11 = {
+    **C99,
+    '_Alignas'       : '_ALIGNAS',
+    '_Alignof'       : '_ALIGNOF',
+    '_Atomic'        : '_ATOMIC',
+    '_Generic'       : '_GENERIC',
+    '_Noreturn'      : '_NORETURN',
+    '_Static_assert' : '_STATIC_ASSERT',
+    '_Thread_local'  : '_THREAD_LOCAL',
+}
+
+C23 = {
+    **C11,
+    'alignas'       : 'ALIGNAS',
+    'alignof'       : 'ALIGNOF',
+    'bool'          : 'BOOL',
+    'constexpr'     : 'CONSTEXPR',
+    'false'         : 'FALSE',
+    'nullptr'       : 'NULLPTR',
+    'static_assert' : 'STATIC_ASSERT',
+    'thread_local'  : 'THREAD_LOCAL',
+    'true'          : 'TRUE',
+    'typeof'        : 'TYPEOF',
+    'typeof_unqual' : 'TYPEOF_UNQUAL',
+    '_BitInt'       : '_BITINT',
+    '_Decimal32'    : '_DECIMAL32',
+    '_Decimal64'    : '_DECIMAL64',
+    '_Decimal128'   : '_DECIMAL128',
+}
+
+# MSVC does not reserve _Imaginary, it has no imaginary types
+MSVC = {
+    **{word: type for word, type in C11.items() if word != '_Imaginary'},
+    'typeof'            : 'TYPEOF',
+    'typeof_unqual'     : 'TYPEOF_UNQUAL',
+    'static_assert'     : 'STATIC_ASSERT',
+    '__asm'             : '__ASM',
+    '__based'           : '__BASED',
+    '__cdecl'           : '__CDECL',
+    '__declspec'        : '__DECLSPEC',
+    '__except'          : '__EXCEPT',
+    '__fastcall'        : '__FASTCALL',
+    '__finally'         : '__FINALLY',
+    '__inline'          : '__INLINE',
+    '__int16'           : '__INT16',
+    '__int32'           : '__INT32',
+    '__int64'           : '__INT64',
+    '__int8'            : '__INT8',
+    '__leave'           : '__LEAVE',
+    '__restrict'        : '__RESTRICT',
+    '__stdcall'         : '__STDCALL',
+    '__try'             : '__TRY',
+    '__typeof__'        : '__TYPEOF__',
+    '__typeof_unqual__' : '__TYPEOF_UNQUAL__',
+    'dllexport'         : 'DLLEXPORT',
+    'dllimport'         : 'DLLIMPORT',
+    'naked'             : 'NAKED',
+    'thread'            : 'THREAD',
+}
+
+DIALECTS = {
+    'c89': C89,
+    'c99': C99,
+    'c11': C11,
+    'c23': C23,
+    'msvc': MSVC,
+}
+
+DEFAULT_DIALECT = 'msvc'
+
+# Every reserved word of any dialect
+RESERVED = {word: type for keywords in DIALECTS.values() for word, type in keywords.items()}
+
+
+def keywords(dialect=DEFAULT_DIALECT) -> dict:
+    """Token type of every keyword of dialect"""
+    if dialect not in DIALECTS:
+        raise ValueError(f'Unknown dialect {dialect!r}, expected one of {tuple(DIALECTS)}')
+    return DIALECTS[dialect]
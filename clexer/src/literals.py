@@ -0,0 +1,119 @@
+try:
+    import numpy
+except ImportError: # NumPy is optional, the batches are converted one literal at a time
+    numpy = None
+
+"""
+    Values of the integer and floating literals of C.
+    int_value and float_value convert one literal, the way the lexer rules do. int_values
+    and float_values convert a batch of them and give the same values:
+        - Integers can be decimal, octal (0 prefix), hexadecimal (0x) or binary (0b), with
+          any of the u, l, ll and i64 suffixes, which do not change the value
+        - Floats can have the f or l suffix
+    With NumPy, a batch of integers is turned into a matrix of bytes, one row per literal, and
+    the digits of every row are accumulated column by column in uint64, whatever the base. Literals
+    with more digits than fit in 64 bits are converted one at a time, and so is every literal
+    of a batch without NumPy. Floats are always converted one at a time: casting the texts to
+    a float64 array takes longer than calling float() on each of them.
+"""
+
+INTEGER_SUFFIXES = 'uUlL'
+SUFFIX_ENDS = INTEGER_SUFFIXES + '4' # Last characters of a suffix, i64 included
+FLOAT_SUFFIXES = 'fFlL'
+
+BASES = {'x': 16, 'X': 16, 'b': 2, 'B': 2}
+
+# Most digits of every base whose value fits in a uint64
+SAFE_DIGITS = {2: 64, 8: 21, 10: 19, 16: 16}
+
+
+def strip_integer_suffix(text) -> str:
+    if text[-3:] in ('i64', 'I64'):
+        text = text[:-3]
+    return text.rstrip(INTEGER_SUFFIXES)
+
+
+def int_value(text) -> int:
+    if text[-1] in SUFFIX_ENDS:
+        text = strip_integer_suffix(text)
+    if text[0] != '0' or len(text) == 1:
+        return int(text)
+
+    base = BASES.get(text[1])
+    if base:
+        return int(text[2:], base)
+    return int(text, 8)
+
+
+def float_value(text) -> float:
+    return float(text.rstrip(FLOAT_SUFFIXES))
+
+
+if numpy is not None:
+    # Value of every ASCII character as a digit, 255 when it is not one
+    DIGIT_VALUES = numpy.full(256, 255, dtype=numpy.uint8)
+    for code in range(ord('0'), ord('9') + 1):
+        DIGIT_VALUES[code] = code - ord('0')
+    for code in range(ord('a'), ord('f') + 1):
+        DIGIT_VALUES[code] = DIGIT_VALUES[code - 32] = code - ord('a') + 10
+
+    SAFE_DIGITS_BY_BASE = numpy.zeros(17, dtype=numpy.int64)
+    for base, count in SAFE_DIGITS.items():
+        SAFE_DIGITS_BY_BASE[base] = count
+
+
+def int_values(texts) -> list:
+    if numpy is None or not texts:
+        return [int_value(text) for text in texts]
+
+    # One row of bytes per literal, zero padded, read column by column
+    matrix = numpy.array(texts, dtype=bytes)
+    width = matrix.itemsize
+    rows = matrix.view(numpy.uint8).reshape(len(texts), width)
+    digits = DIGIT_VALUES[rows.T]
+
+    # The base and where the digits start come from the prefix
+    second = rows[:, 1] if width > 1 else numpy.zeros(len(texts), dtype=numpy.uint8)
+    zero = rows[:, 0] == ord('0')
+    hexadecimal = zero & ((second == ord('x')) | (second == ord('X')))
+    binary = zero & ((second == ord('b')) | (second == ord('B')))
+    bases = numpy.where(hexadecimal, 16, numpy.where(binary, 2, numpy.where(zero, 8, 10))).astype(numpy.uint8)
+    starts = numpy.where(hexadecimal | binary, 2, 0)
+
+    # Horner's rule over the columns, the digits of a row end at its suffix or its padding
+    values = numpy.zeros(len(texts), dtype=numpy.uint64)
+    counts = numpy.zeros(len(texts), dtype=numpy.int64)
+    going = numpy.ones(len(texts), dtype=bool)
+    multipliers = bases.astype(numpy.uint64)
+    for column in range(width):
+        digit = digits[column]
+        if column < 2:
+            active = going & (column >= starts) & (digit < bases)
+            going &= (digit < bases) | (column < starts)
+        else:
+            going &= digit < bases
+            active = going
+        values = numpy.where(active, values * multipliers + digit, values)
+        counts += active
+
+    # Wider literals wrapped around, they are converted again one at a time
+    values = values.tolist()
+    for index in numpy.flatnonzero(counts > SAFE_DIGITS_BY_BASE[bases]).tolist():
+        values[index] = int_value(texts[index])
+    return values
+
+
+def float_values(texts) -> list:
+    return [float_value(text) for text in texts]
+
+
+CONVERTERS = {'INT': int_value, 'FLOAT': float_value}
+BATCH_CONVERTERS = {'INT': int_values, 'FLOAT': float_values}
+
+
+def convert(tokens, converters=BATCH_CONVERTERS) -> None:
+    """Sets the value of the INT and FLOAT tokens from their text, one batch per type"""
+    for type, values in converters.items():
+        numbers = [token for token in tokens if token.type == type]
+        for token, value in zip(numbers, values([token.value for token in numbers])):
+            token.value = value
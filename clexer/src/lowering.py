@@ -0,0 +1,59 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from llvmlite import ir
+
+from src.ir import IR
+
+"""
+    Lowering of a whole translation unit to the text of its LLVM module.
+    A function of the unit only depends on the names of the others, so lower() can spread
+    the functions over a pool of worker processes: every worker declares all the names,
+    lowers its share of the functions with an IR visitor of its own and sends back their
+    text. The workers get the functions when they start, forked workers inherit them
+    without pickling, which would cost about a third of lowering them, so the tasks are
+    only ranges of indexes. The module is the header of an empty module followed by the
+    functions in the order of the unit, the same text a single IR visitor gives, so the
+    result and the cache keys do not depend on the number of jobs.
+    A pool only pays off for units with many functions and as many CPUs as workers.
+"""
+
+HEADER = str(ir.Module())
+
+
+def lower(ast, jobs=1) -> str:
+    """Text of the module of the program ast, lowered by up to jobs processes, None for all the CPUs"""
+    functions = ast.functions
+    jobs = min(jobs or os.cpu_count() or 1, len(functions))
+    if jobs <= 1:
+        visitor = IR()
+        ast.accept(visitor)
+        return str(visitor.module)
+
+    IR().declare_functions(functions) # Redeclared functions are reported before any worker starts
+
+    # Contiguous chunks keep the order of the unit and the inter process traffic low
+    chunksize = max(1, len(functions) // (jobs * 4))
+    starts = range(0, len(functions), chunksize)
+    with ProcessPoolExecutor(jobs, initializer=_start_worker, initargs=(functions,)) as executor:
+        chunks = executor.map(_lower_in_worker, starts, [start + chunksize for start in starts])
+        texts = [text for chunk in chunks for text in chunk]
+
+    return '\n'.join([HEADER, *texts])
+
+
+# Functions of the unit the worker process lowers a part of
+_functions = None
+
+def _start_worker(functions) -> None:
+    global _functions
+    _functions = functions
+
+def _lower_in_worker(start, stop) -> list:
+    visitor = IR()
+    visitor.declare_functions(_functions)
+    texts = []
+    for function in _functions[start:stop]:
+        function.accept(visitor)
+        texts.append(str(visitor.function))
+    return texts
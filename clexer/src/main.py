@@ -1,11 +1,119 @@
+import argparse
+import os
+import sys
+
+from src.backend import FORMATS, BackendError, link_shared
+from src.cache import CompilationCache, ContentCache, ObjectCache
 from src.compiler import Compiler
+from src.instrumentation import Report
 from src.ir import IR
+from src.jit import JIT
+from src.keywords import DEFAULT_DIALECT, DIALECTS
+from src.optimizer import LEVELS
+
+EXAMPLE = 'int main () { for (int x = 5; x < 5; x = x + 1) x = 5; }'
+
+
+def example():
+    compiler = Compiler()
+    compiler.build_parser()
+
+    ast = compiler.get_AST(EXAMPLE)
+    ir = IR()
+    ast.accept(ir)
+    print(ir.module)
+
+
+def main(argv=None):
+    arguments = argparse.ArgumentParser(prog='python -m src.main', description='Compile C sources to LLVM IR')
+    arguments.add_argument('files', nargs='*', help='sources to compile, the built in example when none is given')
+    arguments.add_argument('-j', '--jobs', type=int, default=None, help='worker processes (default: one per core)')
+    arguments.add_argument('--lower-jobs', type=int, default=1, metavar='N', help='processes the functions of a unit are lowered by when there is a single file, 0 for one per core (default: 1)')
+    arguments.add_argument('-o', '--output-dir', help='write <name>.ll files here instead of printing the IR, and the native files of --emit')
+    arguments.add_argument('--emit', choices=['ll', *FORMATS], default='ll', help='write <name>.o object files or <name>.s assembly instead of the IR (default: ll)')
+    arguments.add_argument('--shared', metavar='LIBRARY', help='link the object files into this shared library, implies --emit obj')
+    arguments.add_argument('--cache-dir', help='directory of the parser table cache')
+    arguments.add_argument('--compile-cache', metavar='DIR', help='reuse the AST, the IR and the native code of unchanged sources from this directory')
+    arguments.add_argument('--compile-cache-size', metavar='MB', type=int, default=256, help='size bound of the compile cache')
+    arguments.add_argument('--timings', action='store_true', help='print the time of every stage per file')
+    arguments.add_argument('--profile', action='store_true', help='print the time, tokens and nodes of every stage over all files')
+    arguments.add_argument('--profile-memory', action='store_true', help='also trace the peak memory of every stage, slower')
+    arguments.add_argument('--run', action='store_true', help='execute every compiled program in process instead of printing its IR')
+    arguments.add_argument('--no-fold', dest='fold', action='store_false', help='do not fold constants on the AST before lowering')
+    arguments.add_argument('--std', dest='dialect', choices=DIALECTS, default=DEFAULT_DIALECT, help=f'keywords of this C dialect (default: {DEFAULT_DIALECT})')
+    arguments.add_argument('-O', dest='opt_level', type=int, choices=LEVELS, default=0, help='LLVM optimization level (default: 0)')
+    options = arguments.parse_args(argv)
+
+    if not options.files:
+        example()
+        return 0
+
+    if options.shared:
+        options.emit = 'obj'
+    emit = options.emit if options.emit != 'll' else None
+
+    cache = objects = None
+    if options.compile_cache:
+        store = ContentCache(options.compile_cache, options.compile_cache_size << 20)
+        cache = CompilationCache(store=store)
+        objects = ObjectCache(store=store)
+
+    report = Report(memory=options.profile_memory) if options.profile or options.profile_memory else None
+    compiler = Compiler(options.cache_dir, cache=cache, opt_level=options.opt_level, fold=options.fold, instruments=[report] if report else None,
+                        dialect=options.dialect, emit=emit, objects=objects, lower_jobs=options.lower_jobs)
+    results = compiler.compile_many(options.files, jobs=options.jobs)
+    natives = []
+
+    jit = JIT() if options.run else None
+    failed = 0
+    for result in results:
+        for diagnostic in result.diagnostics:
+            print(f'{result.path}: {diagnostic}', file=sys.stderr)
+        if options.timings and result.timings:
+            stages = ' '.join(f'{stage}={seconds * 1000:.2f}ms' for stage, seconds in result.timings.items())
+            print(f'{result.path}: {stages}', file=sys.stderr)
+        if options.timings and result.instructions:
+            print(f'{result.path}: instructions {result.instructions[0]} -> {result.instructions[1]}', file=sys.stderr)
+        if not result.ok:
+            failed += 1
+            continue
+
+        if jit:
+            try:
+                value = jit.run(result.ir)
+            except Exception as exception:
+                print(f'{result.path}: jit: {exception!r}', file=sys.stderr)
+                failed += 1
+                continue
+            if value is not None:
+                print(f'{result.path}: {value}')
+        elif emit:
+            os.makedirs(options.output_dir or '.', exist_ok=True)
+            name = os.path.splitext(os.path.basename(result.path))[0] + FORMATS[emit]
+            natives.append(os.path.join(options.output_dir or '.', name))
+            with open(natives[-1], 'wb') as output:
+                output.write(result.native)
+        elif options.output_dir:
+            os.makedirs(options.output_dir, exist_ok=True)
+            name = os.path.splitext(os.path.basename(result.path))[0] + '.ll'
+            with open(os.path.join(options.output_dir, name), 'w') as output:
+                output.write(result.ir)
+        else:
+            print(f'; {result.path}')
+            print(result.ir)
+
+    if options.shared and natives and not jit:
+        try:
+            link_shared(natives, options.shared)
+        except BackendError as exception:
+            print(f'{options.shared}: {exception}', file=sys.stderr)
+            failed += 1
+
+    if report:
+        print(report, file=sys.stderr)
 
-compiler = Compiler()
-compiler.build_parser()
+    return 1 if failed else 0
 
 
-ast = compiler.get_AST('int main () { for (int x = 5; x < 5; x = x + 1) x = 5; }')
-ir = IR()
-ast.accept(ir)
-print(ir.module)
\ No newline at end of file
+if __name__ == '__main__':
+    sys.exit(main())
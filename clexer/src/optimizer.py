@@ -0,0 +1,83 @@
+import threading
+
+import llvmlite.binding as llvm
+
+"""
+    LLVM optimization pipeline for the IR produced by the IR visitor.
+    The levels follow clang and opt:
+        - O0 only parses and verifies the module.
+        - O1 to O3 run the standard LLVM pipeline of that level. The IR is already in
+          SSA form, with no stack allocations left for mem2reg, and every level runs
+          instcombine, GVN, CFG simplification and the loop passes (rotation,
+          invariant code motion, induction variable simplification, deletion);
+          O3 also unrolls and vectorizes loops more aggressively.
+    The instruction count before and after is kept so the gains can be tracked.
+    Every module is parsed into its own LLVM context and every thread has its own target
+    machine, so modules can be optimized from several threads at once.
+"""
+
+LEVELS = (0, 1, 2, 3)
+
+_native = False
+_native_lock = threading.Lock()
+_machines = threading.local() # Target machines of every thread, by relocation and code model
+
+
+def create_target_machine(reloc='default', codemodel='jitdefault'):
+    """A new machine for the host, for users that take ownership of it like the JIT engines"""
+    global _native
+    with _native_lock:
+        if not _native:
+            llvm.initialize_native_target()
+            llvm.initialize_native_asmprinter()
+            _native = True
+
+    return llvm.Target.from_default_triple().create_target_machine(reloc=reloc, codemodel=codemodel)
+
+
+def target_machine(reloc='default', codemodel='jitdefault'):
+    machines = getattr(_machines, 'machines', None)
+    if machines is None:
+        machines = _machines.machines = {}
+    if (reloc, codemodel) not in machines:
+        machines[reloc, codemodel] = create_target_machine(reloc, codemodel)
+
+    return machines[reloc, codemodel]
+
+
+def count_instructions(module) -> int:
+    return sum(1 for function in module.functions for block in function.blocks for _ in block.instructions)
+
+
+class OptimizationResult:
+    def __init__(self, ir, level, before, after) -> None:
+        self.ir = ir
+        self.level = level
+        self.before = before
+        self.after = after
+
+    @property
+    def removed(self) -> int:
+        return self.before - self.after
+
+
+def optimize(ir, level=2) -> OptimizationResult:
+    """Optimize the textual IR of a module, the result holds the optimized IR"""
+    if level not in LEVELS:
+        raise ValueError(f'Unknown optimization level {level!r}')
+
+    module = llvm.parse_assembly(str(ir), llvm.create_context())
+    module.verify()
+    before = count_instructions(module)
+
+    if level > 0:
+        machine = target_machine()
+        module.triple = machine.triple
+        module.data_layout = str(machine.target_data)
+
+        options = llvm.create_pipeline_tuning_options(speed_level=level)
+        builder = llvm.create_pass_builder(machine, options)
+        builder.getModulePassManager().run(module, builder)
+        module.verify()
+
+    return OptimizationResult(str(module), level, before, count_instructions(module))
@@ -0,0 +1,56 @@
+import bisect
+import re
+from array import array
+
+"""
+    Line and column of an offset in a source text.
+    LineIndex finds every line start of the text once, with a single regex scan, and answers
+    position queries with a binary search over them, so positions cost O(log lines) whatever
+    the size of the input and nothing has to be counted while lexing.
+    Lines and columns start at 1, a column counts characters from the start of the line
+    (a tab is one column).
+"""
+
+NEWLINE = re.compile('\n')
+
+
+class LineIndex:
+    def __init__(self, text, line=1) -> None:
+        self.text = text
+        self.line = line # Number of the first line, a batch of a stream does not start at 1
+        self.starts = array('q', [0])
+        self.starts.extend(match.end() for match in NEWLINE.finditer(text))
+
+    def __len__(self) -> int:
+        """Number of lines, a text that ends with a newline has an empty last line"""
+        return len(self.starts)
+
+    def line_of(self, offset) -> int:
+        return bisect.bisect_right(self.starts, offset) - 1 + self.line
+
+    def line_start(self, line) -> int:
+        """Offset of the first character of line"""
+        if not self.line <= line < self.line + len(self.starts):
+            raise IndexError(f'Line {line} out of range {self.line}-{self.line + len(self.starts) - 1}')
+        return self.starts[line - self.line]
+
+    def line_bounds(self, offset) -> tuple:
+        """(line, start, end) of the line of offset, end is where the next line starts"""
+        index = bisect.bisect_right(self.starts, offset) - 1
+        end = self.starts[index + 1] if index + 1 < len(self.starts) else len(self.text) + 1
+        return index + self.line, self.starts[index], end
+
+    def position(self, offset) -> tuple:
+        """(line, column) of offset"""
+        index = bisect.bisect_right(self.starts, offset) - 1
+        return index + self.line, offset - self.starts[index] + 1
+
+    def offset(self, line, column) -> int:
+        """Offset of (line, column), the inverse of position"""
+        return self.line_start(line) + column - 1
+
+    def line_text(self, line) -> str:
+        """Text of line without its newline"""
+        start = self.line_start(line)
+        end = self.text.find('\n', start)
+        return self.text[start:end if end >= 0 else len(self.text)]
@@ -0,0 +1,337 @@
+import copy
+import re
+
+import ply.lex as lex
+from ply.lex import LexError, LexToken
+
+from src.positions import LineIndex
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError: # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+"""
+    Scanner is a drop-in replacement for the PLY lexer object built from the same CLexer rules.
+    Instead of running every token through the combined master regex, it looks at the first
+    character and only tries the rules that can start with it:
+        - The rules, their order, states, literals, ignore characters and error
+          functions are collected exactly as PLY does, so the token stream is identical.
+        - For every state, the first characters each rule can match are computed from the
+          parsed regex and stored in a per character dispatch table.
+        - Characters outside ASCII fall back to trying every rule in PLY order.
+    Unlike PLY's lexer, every token gets its line and column, from a LineIndex of the input.
+"""
+
+ASCII = frozenset(range(128))
+
+DIGITS = frozenset(range(ord('0'), ord('9') + 1))
+WORD = DIGITS | frozenset(range(ord('a'), ord('z') + 1)) | frozenset(range(ord('A'), ord('Z') + 1)) | {ord('_')}
+SPACE = frozenset(map(ord, ' \t\n\r\f\v'))
+
+CATEGORIES = {
+    sre_constants.CATEGORY_DIGIT: DIGITS,
+    sre_constants.CATEGORY_NOT_DIGIT: ASCII - DIGITS,
+    sre_constants.CATEGORY_WORD: WORD,
+    sre_constants.CATEGORY_NOT_WORD: ASCII - WORD,
+    sre_constants.CATEGORY_SPACE: SPACE,
+    sre_constants.CATEGORY_NOT_SPACE: ASCII - SPACE,
+}
+
+
+def first_chars(pattern, flags):
+    """ASCII code points a match of pattern can start with, None if it can start with anything"""
+    if flags & re.IGNORECASE:
+        return None
+
+    chars, nullable = _first_of_sequence(sre_parse.parse(pattern, flags))
+    return None if nullable else chars
+
+
+def _first_of_sequence(items):
+    chars = set()
+    for op, av in items:
+        first, nullable = _first_of_item(op, av)
+        if first is None:
+            return None, False
+        chars |= first
+        if not nullable:
+            return chars, False
+
+    return chars, True
+
+
+def _first_of_item(op, av):
+    if op is sre_constants.LITERAL:
+        return {av}, False
+    if op is sre_constants.NOT_LITERAL:
+        return ASCII - {av}, False
+    if op is sre_constants.ANY:
+        return set(ASCII), False
+    if op is sre_constants.IN:
+        return _first_of_set(av), False
+    if op is sre_constants.SUBPATTERN:
+        return _first_of_sequence(av[-1])
+    if op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+        minimum, _, items = av
+        first, nullable = _first_of_sequence(items)
+        return first, nullable or minimum == 0
+    if op is sre_constants.BRANCH:
+        chars, nullable = set(), False
+        for items in av[1]:
+            first, branch_nullable = _first_of_sequence(items)
+            if first is None:
+                return None, False
+            chars |= first
+            nullable = nullable or branch_nullable
+        return chars, nullable
+    if op is sre_constants.AT:
+        return set(), True
+
+    return None, False # Anything else is not analysed: the rule is always tried
+
+
+def _first_of_set(items):
+    chars = set()
+    negate = False
+    for op, av in items:
+        if op is sre_constants.NEGATE:
+            negate = True
+        elif op is sre_constants.LITERAL:
+            chars.add(av)
+        elif op is sre_constants.RANGE:
+            chars.update(code for code in range(av[0], av[1] + 1) if code < 128)
+        elif op is sre_constants.CATEGORY and av in CATEGORIES:
+            chars |= CATEGORIES[av]
+        else:
+            return None
+
+    return ASCII - chars if negate else chars
+
+
+class Scanner:
+    def __init__(self, module, reflags=int(re.VERBOSE)):
+        ldict = {name: getattr(module, name) for name in dir(module)}
+        linfo = lex.LexerReflect(ldict, log=lex.NullLogger(), reflags=reflags)
+        linfo.get_all()
+
+        self.lexliterals = ''.join(linfo.literals)
+        self.lexstateinfo = linfo.stateinfo
+        self.lexstateignore = linfo.ignore
+        self.lexstateerrorf = linfo.errorf
+        self.lexstateeoff = linfo.eoff
+        self.lexstaterules = {}
+        self.lexstatedispatch = {}
+
+        rules = {}
+        for state in linfo.stateinfo:
+            rules[state] = []
+            for name, func in linfo.funcsym[state]:
+                rules[state].append((getattr(func, 'regex', func.__doc__), func, linfo.toknames[name]))
+            for name, regex in linfo.strsym[state]:
+                tokname = None if name.find('ignore_') > 0 else linfo.toknames[name]
+                rules[state].append((regex, None, tokname))
+
+        for state, stype in linfo.stateinfo.items():
+            if state != 'INITIAL' and stype == 'inclusive':
+                rules[state].extend(rules['INITIAL'])
+
+        for state, state_rules in rules.items():
+            compiled = []
+            dispatch = {chr(code): [] for code in ASCII}
+            for regex, func, tokname in state_rules:
+                rule = (re.compile(regex, reflags), func, tokname)
+                compiled.append(rule)
+                starts = first_chars(regex, reflags)
+                for code in ASCII if starts is None else starts:
+                    dispatch[chr(code)].append(rule)
+
+            self.lexstaterules[state] = tuple(compiled)
+            # Characters that start the same rules share one tuple of them, a clone rebinds it once
+            shared = {}
+            self.lexstatedispatch[state] = {char: shared.setdefault(tuple(candidates), tuple(candidates)) for char, candidates in dispatch.items()}
+
+        self.lexdata = None
+        self.lexpos = 0
+        self.lexlen = 0
+        self.lineno = 1
+        self.index = None
+        self.line_start = 0 # Offsets where the current line starts and where the next one does
+        self.next_line = 0
+        self.lexstatestack = []
+        self.begin('INITIAL')
+
+    def clone(self, object=None):
+        """Copy of the scanner, given an object its rules call the methods of object instead"""
+        c = copy.copy(self)
+        c.lexstatestack = []
+        if object is not None:
+            rebound = {}
+            def rebind(rule):
+                if rule not in rebound:
+                    regex, func, tokname = rule
+                    rebound[rule] = (regex, getattr(object, func.__name__) if func else None, tokname)
+                return rebound[rule]
+
+            tuples = {}
+            def rebind_all(rules):
+                if id(rules) not in tuples:
+                    tuples[id(rules)] = tuple(map(rebind, rules))
+                return tuples[id(rules)]
+
+            c.lexstaterules = {state: rebind_all(rules) for state, rules in self.lexstaterules.items()}
+            c.lexstatedispatch = {state: {char: rebind_all(candidates) for char, candidates in dispatch.items()}
+                                  for state, dispatch in self.lexstatedispatch.items()}
+            c.lexstateerrorf = {state: getattr(object, func.__name__) for state, func in self.lexstateerrorf.items() if func}
+            c.lexstateeoff = {state: getattr(object, func.__name__) for state, func in self.lexstateeoff.items() if func}
+        c.begin(self.lexstate)
+        return c
+
+    def input(self, s, line=1):
+        if not isinstance(s, str):
+            raise ValueError('Expected a string')
+        self.lexdata = s
+        self.lexpos = 0
+        self.lexlen = len(s)
+        self.index = LineIndex(s, line)
+        self.lineno = line
+        self.line_start = self.next_line = 0
+
+    def seek(self, lexpos):
+        """Make the line of lexpos the current one"""
+        self.lineno, self.line_start, self.next_line = self.index.line_bounds(lexpos)
+
+    def begin(self, state):
+        if state not in self.lexstaterules:
+            raise ValueError('Undefined state')
+        self.lexrules = self.lexstaterules[state]
+        self.lexdispatch = self.lexstatedispatch[state]
+        self.lexignore = self.lexstateignore.get(state, '')
+        self.lexerrorf = self.lexstateerrorf.get(state, None)
+        self.lexeoff = self.lexstateeoff.get(state, None)
+        self.lexstate = state
+
+    def push_state(self, state):
+        self.lexstatestack.append(self.lexstate)
+        self.begin(state)
+
+    def pop_state(self):
+        self.begin(self.lexstatestack.pop())
+
+    def current_state(self):
+        return self.lexstate
+
+    def skip(self, n):
+        self.lexpos += n
+
+    def token(self):
+        lexpos = self.lexpos
+        lexlen = self.lexlen
+        lexignore = self.lexignore
+        lexdata = self.lexdata
+
+        while lexpos < lexlen:
+            char = lexdata[lexpos]
+            if char in lexignore:
+                lexpos += 1
+                continue
+
+            for regex, func, tokname in self.lexdispatch.get(char, self.lexrules):
+                m = regex.match(lexdata, lexpos)
+                if not m:
+                    continue
+
+                tok = LexToken()
+                tok.value = m.group()
+                tok.lineno = self.lineno
+                tok.lexpos = lexpos
+                tok.type = tokname
+                lexpos = m.end()
+
+                if not func:
+                    if tokname:
+                        if not self.line_start <= tok.lexpos < self.next_line:
+                            self.seek(tok.lexpos)
+                        tok.lineno = self.lineno
+                        tok.column = tok.lexpos - self.line_start + 1
+                        self.lexpos = lexpos
+                        return tok
+                    break
+
+                tok.lexer = self
+                self.lexmatch = m
+                self.lexpos = lexpos
+
+                newtok = func(tok)
+                if not newtok:
+                    # The rule may have moved the position or changed the state, like PLY the
+                    # ignored characters are only reloaded here
+                    lexpos = self.lexpos
+                    lexignore = self.lexignore
+                    break
+
+                # The rule may have moved the token, like a string to its opening quote
+                if not self.line_start <= newtok.lexpos < self.next_line:
+                    self.seek(newtok.lexpos)
+                newtok.lineno = self.lineno
+                newtok.column = newtok.lexpos - self.line_start + 1
+                return newtok
+            else:
+                if char in self.lexliterals:
+                    tok = LexToken()
+                    tok.value = char
+                    if not self.line_start <= lexpos < self.next_line:
+                        self.seek(lexpos)
+                    tok.lineno = self.lineno
+                    tok.column = lexpos - self.line_start + 1
+                    tok.type = char
+                    tok.lexpos = lexpos
+                    self.lexpos = lexpos + 1
+                    return tok
+
+                if self.lexerrorf:
+                    tok = LexToken()
+                    tok.value = lexdata[lexpos:]
+                    if not self.line_start <= lexpos < self.next_line:
+                        self.seek(lexpos)
+                    tok.lineno = self.lineno
+                    tok.column = lexpos - self.line_start + 1
+                    tok.type = 'error'
+                    tok.lexer = self
+                    tok.lexpos = lexpos
+                    self.lexpos = lexpos
+                    newtok = self.lexerrorf(tok)
+                    if lexpos == self.lexpos:
+                        raise LexError("Scanning error. Illegal character '%s'" % char, lexdata[lexpos:])
+                    lexpos = self.lexpos
+                    if not newtok:
+                        continue
+                    return newtok
+
+                self.lexpos = lexpos
+                raise LexError("Illegal character '%s' at index %d" % (char, lexpos), lexdata[lexpos:])
+
+        if self.lexeoff:
+            tok = LexToken()
+            tok.type = 'eof'
+            tok.value = ''
+            tok.lineno = self.lineno
+            tok.lexpos = lexpos
+            tok.lexer = self
+            self.lexpos = lexpos
+            return self.lexeoff(tok)
+
+        self.lexpos = lexpos + 1
+        if self.lexdata is None:
+            raise RuntimeError('No input string given with input()')
+        return None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        t = self.token()
+        if t is None:
+            raise StopIteration
+        return t
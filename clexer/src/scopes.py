@@ -0,0 +1,102 @@
+from src.diagnostics import Diagnostic
+
+"""
+    Lexical scopes of a program and the symbols declared in them, for the passes that resolve
+    names: the ConstantFolder and the IR visitor.
+        - The unit is the outermost scope, it holds the functions. A function is a scope, so
+          is every block, the header of a for statement and the body of an if, else, while or
+          for, as in C99. A name can be declared again in a nested scope, it shadows the outer
+          symbol until its scope is left.
+        - Scopes is a versioned map: every name maps to its innermost symbol, which links to the
+          symbol it shadows. Entering and leaving a scope are O(1), leaving only marks the scope
+          closed. The symbols of closed scopes are dropped from the chain of their name the next
+          time it is looked up, each of them once, so lookups are O(1) amortized at any depth.
+    A Symbol is one declaration, the passes key what they know about a variable by its symbol,
+    so two variables of the same name never mix.
+"""
+
+KINDS = {'auto': 'Variable', 'extern': 'Function'}
+
+
+class SemanticError(Exception):
+    """A name declared twice or used where it is not declared, at the node that does it"""
+    def __init__(self, message, node=None) -> None:
+        super().__init__(message)
+        self.message = message
+        self.line = node.lineno if node is not None else None
+        self.column = node.column if node is not None else None
+
+    @property
+    def diagnostic(self) -> Diagnostic:
+        return Diagnostic('semantic', self.message, None, self.line, self.column)
+
+
+class Scope:
+    __slots__ = ('parent', 'kind', 'depth', 'open')
+
+    def __init__(self, parent, kind) -> None:
+        self.parent = parent
+        self.kind = kind # 'file', 'function', 'block' or 'for'
+        self.depth = parent.depth + 1 if parent is not None else 0
+        self.open = True
+
+
+class Symbol:
+    __slots__ = ('name', 'type', 'storage', 'scope', 'shadowed')
+
+    def __init__(self, name, type, storage, scope, shadowed) -> None:
+        self.name = name
+        self.type = type # 'int' or 'float', 'int()' for a function
+        self.storage = storage # 'auto' for the variables of a function, kept in SSA values, 'extern' for the functions
+        self.scope = scope
+        self.shadowed = shadowed # Symbol of the same name this one hides, None when there is none
+
+    def __repr__(self):
+        return f'Symbol({self.name!r}, {self.type!r}, {self.storage!r}, depth={self.scope.depth})'
+
+
+class Scopes:
+    def __init__(self) -> None:
+        self.symbols = {} # Innermost symbol of every name, possibly of a closed scope
+        self.scope = None
+
+    def enter(self, kind='block') -> Scope:
+        self.scope = Scope(self.scope, kind)
+        return self.scope
+
+    def leave(self) -> Scope:
+        scope = self.scope
+        scope.open = False
+        self.scope = scope.parent
+        return scope
+
+    def declare(self, name, type, storage='auto', node=None) -> Symbol:
+        """Symbol of a new name in the current scope, node is the declaration errors are reported at"""
+        shadowed = self.lookup(name)
+        if shadowed is not None and shadowed.scope is self.scope:
+            raise SemanticError(f"{KINDS[storage]} '{name}' is already declared", node)
+
+        self.symbols[name] = symbol = Symbol(name, type, storage, self.scope, shadowed)
+        return symbol
+
+    def lookup(self, name):
+        """Symbol name refers to in the current scope, None when it is not declared"""
+        symbol = self.symbols.get(name)
+        if symbol is not None and not symbol.scope.open:
+            while symbol is not None and not symbol.scope.open:
+                symbol = symbol.shadowed
+            self.symbols[name] = symbol
+        return symbol
+
+    def resolve(self, name, node=None) -> Symbol:
+        symbol = self.lookup(name)
+        if symbol is None:
+            raise SemanticError(f"Variable '{name}' is not declared", node)
+        return symbol
+
+    def variable(self, name, node=None) -> Symbol:
+        """Symbol of the variable name refers to, a function is not one"""
+        symbol = self.resolve(name, node)
+        if symbol.storage != 'auto':
+            raise SemanticError(f"'{name}' is a function, not a variable", node)
+        return symbol
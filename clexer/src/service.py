@@ -0,0 +1,382 @@
+import argparse
+import asyncio
+import collections
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from src.clexer import DEFAULT_ENGINE
+from src.compiler import Compiler
+from src.ir import ASTNode
+from src.keywords import DEFAULT_DIALECT, DIALECTS
+from src.optimizer import LEVELS
+
+"""
+    Compile service: JSON-RPC 2.0 over a local socket or stdin and stdout.
+    Requests and responses are JSON objects, one per line. The methods are:
+        compile  params {"source": text, "ast": false, "ir": true}, the result has ok,
+                 diagnostics, timings and, when asked for, the IR and the AST (after folding)
+        stats    requests served and rejected, requests pending and latency percentiles in ms
+    Every worker owns a Compiler built once, with its own lexer and parser:
+        - 'thread' workers are a pool of Compilers lent to the threads of an executor,
+          one request at a time each. One is built, the others are clones of it.
+        - 'process' workers build their Compiler when their process starts.
+    The response of a compile is encoded in the worker, so the event loop only copies text.
+    At most max_pending requests are accepted at once, the rest are rejected with the busy
+    error right away instead of queueing without bound. Requests of a connection are served
+    concurrently and can be answered out of order, match them by id.
+        python -m src.service --socket /tmp/clexer.sock --workers 4
+        python -m src.service --stdio < requests.jsonl
+"""
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+BUSY = -32000
+
+MODES = ('thread', 'process')
+
+# Longest line of a request, sources are sent whole
+LINE_LIMIT = 64 << 20
+
+
+class ServiceError(Exception):
+    def __init__(self, code, message) -> None:
+        super().__init__(code, message) # Both are kept to be pickled back from a worker process
+        self.code = code
+        self.message = message
+
+    def __str__(self):
+        return f'{self.message} ({self.code})'
+
+
+def ast_json(tree):
+    """The AST as dicts and lists of JSON values, built without recursion"""
+    root = []
+    pending = [(tree, root, None)]
+    while pending:
+        value, container, key = pending.pop()
+        if isinstance(value, list):
+            result = []
+            pending.extend((item, result, None) for item in reversed(value))
+        elif isinstance(value, ASTNode):
+            fields = value.fields()
+            result = {'node': type(value).__name__, 'line': value.lineno, 'column': value.column, **fields}
+            pending.extend((field, result, name) for name, field in fields.items() if isinstance(field, (list, ASTNode)))
+        else:
+            result = value
+
+        if key is None:
+            container.append(result)
+        else:
+            container[key] = result
+    return root[0]
+
+
+def compile_request(compiler, source, ast=False, ir=True) -> str:
+    """JSON result of a compile request"""
+    result = compiler.compile(source)
+    try:
+        return json.dumps({
+            'ok': result.ok,
+            'diagnostics': result.diagnostics,
+            'timings': result.timings,
+            'ir': result.ir if ir else None,
+            'ast': ast_json(result.ast) if ast and result.ast is not None else None,
+        })
+    except RecursionError:
+        raise ServiceError(INTERNAL_ERROR, 'The AST is too deep to encode') from None
+
+
+# Compiler of a process worker, built once when its process starts
+_worker = None
+
+def _start_worker(options) -> None:
+    global _worker
+    _worker = Compiler(**options)
+    _worker.build_parser()
+
+def _compile_in_worker(source, ast, ir) -> str:
+    return compile_request(_worker, source, ast, ir)
+
+def _ready() -> bool:
+    return True
+
+
+class Latencies:
+    """Latency of the last size requests"""
+    def __init__(self, size=10000) -> None:
+        self.samples = collections.deque(maxlen=size)
+
+    def add(self, seconds) -> None:
+        self.samples.append(seconds)
+
+    def percentiles(self) -> dict:
+        if not self.samples:
+            return {}
+        ordered = sorted(self.samples)
+        last = len(ordered) - 1
+        return {f'p{percent}': ordered[round(last * percent / 100)] * 1000 for percent in (50, 90, 99)} | {'max': ordered[-1] * 1000}
+
+
+class CompileService:
+    def __init__(self, workers=4, mode='thread', max_pending=None, cache_dir=None, engine=DEFAULT_ENGINE, dialect=DEFAULT_DIALECT, opt_level=0, fold=True) -> None:
+        if mode not in MODES:
+            raise ValueError(f'Unknown worker mode {mode!r}, expected one of {MODES}')
+        self.workers = workers
+        self.mode = mode
+        self.max_pending = max_pending or workers * 4
+        self.options = {'cache_dir': cache_dir, 'engine': engine, 'dialect': dialect, 'opt_level': opt_level, 'fold': fold}
+        self.executor = None
+        self.compilers = None # Idle Compilers of the thread workers
+        self.pending = 0
+        self.served = 0
+        self.rejected = 0
+        self.latencies = Latencies()
+        self.servers = []
+
+    async def start(self) -> None:
+        """Builds every worker, the first requests do not pay for it"""
+        loop = asyncio.get_running_loop()
+        if self.mode == 'thread':
+            self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix='compile')
+            self.compilers = asyncio.Queue()
+            compiler = Compiler(**self.options)
+            compiler.build_parser()
+            self.compilers.put_nowait(compiler)
+            for _ in range(self.workers - 1):
+                self.compilers.put_nowait(compiler.clone())
+        else:
+            self.executor = ProcessPoolExecutor(self.workers, initializer=_start_worker, initargs=(self.options,))
+            await asyncio.gather(*(loop.run_in_executor(self.executor, _ready) for _ in range(self.workers)))
+
+    async def close(self) -> None:
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+        self.servers = []
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    # Requests
+    async def compile(self, source, ast=False, ir=True) -> str:
+        """JSON result of compiling source, ServiceError when the service is busy"""
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise ServiceError(BUSY, f'Busy, {self.pending} requests pending')
+
+        self.pending += 1
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            if self.mode == 'thread':
+                compiler = await self.compilers.get()
+                try:
+                    return await loop.run_in_executor(self.executor, compile_request, compiler, source, ast, ir)
+                finally:
+                    self.compilers.put_nowait(compiler)
+            return await loop.run_in_executor(self.executor, _compile_in_worker, source, ast, ir)
+        finally:
+            self.pending -= 1
+            self.served += 1
+            self.latencies.add(time.perf_counter() - start)
+
+    def stats(self) -> dict:
+        return {
+            'workers': self.workers,
+            'mode': self.mode,
+            'served': self.served,
+            'rejected': self.rejected,
+            'pending': self.pending,
+            'latency_ms': self.latencies.percentiles(),
+        }
+
+    async def handle(self, line) -> str:
+        """Response line of a request line, None for a notification"""
+        try:
+            request = json.loads(line)
+        except ValueError as exception:
+            return error_response(None, PARSE_ERROR, f'Parse error: {exception}')
+        if not isinstance(request, dict) or request.get('jsonrpc') != '2.0' or not isinstance(request.get('method'), str):
+            return error_response(request.get('id') if isinstance(request, dict) else None, INVALID_REQUEST, 'Invalid request')
+
+        id = request.get('id')
+        params = request.get('params', {})
+        try:
+            if not isinstance(params, dict):
+                raise ServiceError(INVALID_PARAMS, 'params must be an object')
+            if request['method'] == 'compile':
+                if not isinstance(params.get('source'), str):
+                    raise ServiceError(INVALID_PARAMS, 'source must be a string')
+                result = await self.compile(params['source'], bool(params.get('ast', False)), bool(params.get('ir', True)))
+            elif request['method'] == 'stats':
+                result = json.dumps(self.stats())
+            else:
+                raise ServiceError(METHOD_NOT_FOUND, f'Method not found: {request["method"]}')
+        except ServiceError as error:
+            return None if id is None else error_response(id, error.code, error.message)
+        except Exception as exception:
+            return None if id is None else error_response(id, INTERNAL_ERROR, repr(exception))
+
+        if id is None:
+            return None
+        # The result is already encoded, by the worker for compile
+        return f'{{"jsonrpc": "2.0", "id": {json.dumps(id)}, "result": {result}}}'
+
+    # Transports
+    async def serve_connection(self, reader, writer) -> None:
+        tasks = set()
+        lock = asyncio.Lock()
+
+        async def answer(line):
+            response = await self.handle(line)
+            if response is not None:
+                async with lock:
+                    writer.write(response.encode('utf-8') + b'\n')
+                    await writer.drain()
+
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError: # Longer than LINE_LIMIT, the rest of the stream can not be trusted
+                    writer.write(error_response(None, INVALID_REQUEST, 'Request too long').encode('utf-8') + b'\n')
+                    break
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.create_task(answer(line))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            writer.close()
+
+    async def serve_unix(self, path):
+        server = await asyncio.start_unix_server(self.serve_connection, path, limit=LINE_LIMIT)
+        self.servers.append(server)
+        return server
+
+    async def serve_tcp(self, host='127.0.0.1', port=0):
+        server = await asyncio.start_server(self.serve_connection, host, port, limit=LINE_LIMIT)
+        self.servers.append(server)
+        return server
+
+    async def serve_stdio(self) -> None:
+        """Serves the requests of stdin until it ends, the responses go to stdout"""
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=LINE_LIMIT)
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+        writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+        await self.serve_connection(reader, writer)
+
+
+def error_response(id, code, message) -> str:
+    return json.dumps({'jsonrpc': '2.0', 'id': id, 'error': {'code': code, 'message': message}})
+
+
+class ServiceClient:
+    """Client of a CompileService connection, requests can be sent concurrently"""
+    def __init__(self, reader, writer) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.next_id = 0
+        self.waiting = {} # Future of every request sent, by id
+        self.receiver = asyncio.create_task(self.receive())
+
+    @classmethod
+    async def connect_unix(cls, path):
+        return cls(*await asyncio.open_unix_connection(path, limit=LINE_LIMIT))
+
+    @classmethod
+    async def connect_tcp(cls, host, port):
+        return cls(*await asyncio.open_connection(host, port, limit=LINE_LIMIT))
+
+    async def receive(self) -> None:
+        try:
+            while line := await self.reader.readline():
+                response = json.loads(line)
+                future = self.waiting.pop(response.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            for future in self.waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError('The service closed the connection'))
+
+    async def call(self, method, **params):
+        """Result of the request, ServiceError for an error response"""
+        self.next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[self.next_id] = future
+        self.writer.write(json.dumps({'jsonrpc': '2.0', 'id': self.next_id, 'method': method, 'params': params}).encode('utf-8') + b'\n')
+        await self.writer.drain()
+
+        response = await future
+        if 'error' in response:
+            raise ServiceError(response['error']['code'], response['error']['message'])
+        return response['result']
+
+    async def compile(self, source, ast=False, ir=True) -> dict:
+        return await self.call('compile', source=source, ast=ast, ir=ir)
+
+    async def stats(self) -> dict:
+        return await self.call('stats')
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+        await self.receiver
+
+
+async def serve(options) -> None:
+    service = CompileService(options.workers, options.mode, options.max_pending, options.cache_dir, dialect=options.dialect, opt_level=options.opt_level)
+    async with service:
+        if options.stdio:
+            await service.serve_stdio()
+            return
+        if options.socket:
+            server = await service.serve_unix(options.socket)
+        else:
+            server = await service.serve_tcp(options.host, options.port)
+        print(f'Serving on {", ".join(str(socket.getsockname()) for socket in server.sockets)}', file=sys.stderr)
+        await server.serve_forever()
+
+
+def main(argv=None):
+    arguments = argparse.ArgumentParser(prog='python -m src.service', description='Compile C sources to LLVM IR over JSON-RPC')
+    transport = arguments.add_mutually_exclusive_group()
+    transport.add_argument('--socket', metavar='PATH', help='listen on a Unix socket')
+    transport.add_argument('--port', type=int, default=0, help='listen on a TCP port of --host')
+    transport.add_argument('--stdio', action='store_true', help='serve the requests of stdin on stdout')
+    arguments.add_argument('--host', default='127.0.0.1')
+    arguments.add_argument('--workers', type=int, default=4)
+    arguments.add_argument('--mode', choices=MODES, default='thread', help='workers are threads or processes (default: thread)')
+    arguments.add_argument('--max-pending', type=int, help='requests accepted at once, the rest are rejected (default: 4 per worker)')
+    arguments.add_argument('--cache-dir', help='directory of the parser table cache')
+    arguments.add_argument('--std', dest='dialect', choices=DIALECTS, default=DEFAULT_DIALECT, help=f'keywords of this C dialect (default: {DEFAULT_DIALECT})')
+    arguments.add_argument('-O', dest='opt_level', type=int, choices=LEVELS, default=0, help='LLVM optimization level (default: 0)')
+    options = arguments.parse_args(argv)
+
+    try:
+        asyncio.run(serve(options))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
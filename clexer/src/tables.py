@@ -0,0 +1,137 @@
+import hashlib
+import marshal
+import os
+import shutil
+import sys
+import tempfile
+import types
+
+import ply
+import ply.lex as lex
+import ply.yacc as yacc
+
+"""
+    Persistent cache for the PLY lexer and parser tables.
+    Tables are written once per grammar and then loaded from disk, so a new process
+    does not have to rebuild the master regexes or the LALR tables.
+        - Every table file is keyed by a hash of the grammar it was built from
+          (token rules and productions in the order PLY uses them, tokens, literals
+          and the PLY version), so any change to the grammar invalidates it.
+        - The cache directory can be set per build or through CLEXER_CACHE_DIR.
+        - Files are built in a private staging directory and moved in place
+          atomically, so concurrent processes never read half written tables.
+        - The compiled table code is kept next to the source, so loading does not
+          depend on the interpreter writing __pycache__ entries.
+"""
+
+TABLES_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.environ.get('CLEXER_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'clexer')
+
+
+def grammar_hash(spec, prefix) -> str:
+    parts = [str(TABLES_VERSION), ply.__version__]
+    for name in ('tokens', 'literals', 'states', 'precedence', 'start'):
+        parts.append(repr(getattr(spec, name, None)))
+
+    # PLY tries function rules in the order they are defined and takes the first p_ rule as the start symbol
+    rules = [(name, getattr(spec, name)) for name in sorted(dir(spec)) if name.startswith(prefix)]
+    functions = sorted((item for item in rules if callable(item[1])), key=lambda item: item[1].__code__.co_firstlineno)
+    for name, rule in functions:
+        parts.append(f'{name}={getattr(rule, "regex", rule.__doc__)!r}')
+    for name, rule in rules:
+        if not callable(rule):
+            parts.append(f'{name}={rule!r}')
+
+    return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+class TableCache:
+    def __init__(self, directory=None):
+        self.directory = directory or DEFAULT_CACHE_DIR
+
+    def path(self, name) -> str:
+        return os.path.join(self.directory, name + '.py')
+
+    def compiled_path(self, name) -> str:
+        return os.path.join(self.directory, f'{name}.{sys.implementation.cache_tag}.bin')
+
+    def load(self, name):
+        path = self.path(name)
+        compiled = self.compiled_path(name)
+        module = types.ModuleType(name)
+        module.__file__ = path
+        try:
+            try:
+                with open(compiled, 'rb') as table:
+                    code = marshal.load(table)
+            except (OSError, EOFError, ValueError, TypeError):
+                with open(path) as table:
+                    code = compile(table.read(), path, 'exec')
+                self._write_compiled(compiled, code)
+            exec(code, module.__dict__)
+        except Exception:
+            # A damaged table is treated as a miss and rebuilt
+            return None
+
+        return module
+
+    def lexer(self, spec):
+        name = 'lextab_' + grammar_hash(spec, 't_')
+        table = self.load(name)
+        if table is not None:
+            return lex.lex(module=spec, optimize=1, lextab=table)
+
+        staging = self._staging()
+        if staging is None:
+            return lex.lex(module=spec)
+
+        try:
+            lexer = lex.lex(module=spec, optimize=1, lextab=name, outputdir=staging)
+            self._publish(staging, name)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        return lexer
+
+    def parser(self, spec):
+        name = 'parsetab_' + grammar_hash(spec, 'p_')
+        table = self.load(name)
+        if table is not None:
+            return yacc.yacc(module=spec, tabmodule=table, debug=False, write_tables=False)
+
+        staging = self._staging()
+        if staging is None:
+            return yacc.yacc(module=spec, debug=False, write_tables=False)
+
+        try:
+            parser = yacc.yacc(module=spec, tabmodule=name, outputdir=staging, debug=False)
+            self._publish(staging, name)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        return parser
+
+    def _staging(self):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            return tempfile.mkdtemp(prefix='.staging-', dir=self.directory)
+        except OSError:
+            return None # Read-only location, build the tables in memory only
+
+    def _publish(self, staging, name):
+        try:
+            os.replace(os.path.join(staging, name + '.py'), self.path(name))
+            if os.path.exists(self.compiled_path(name)):
+                os.unlink(self.compiled_path(name))
+        except OSError:
+            pass
+
+    def _write_compiled(self, compiled, code):
+        try:
+            fd, staging = tempfile.mkstemp(prefix='.staging-', dir=self.directory)
+            with os.fdopen(fd, 'wb') as table:
+                marshal.dump(code, table)
+            os.replace(staging, compiled)
+        except OSError:
+            pass
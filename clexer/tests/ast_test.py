@@ -0,0 +1,48 @@
+import pickle
+import tempfile
+import unittest
+from src.cparser import CParser
+from src.ir import IR, Assignment, BinaryOp, Literal
+
+
+class ASTTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tables = tempfile.TemporaryDirectory()
+        cls.parser = CParser()
+        cls.parser.build(cls.tables.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tables.cleanup()
+
+    def test_slots(self):
+        node = BinaryOp('+', Literal(1, 'INT'), Literal(2, 'INT'))
+        self.assertFalse(hasattr(node, '__dict__'))
+        self.assertEqual((node.lineno, node.column), (None, None))
+        self.assertEqual(list(node.fields()), ['lhs', 'rhs', 'op'])
+        with self.assertRaises(AttributeError):
+            node.other = 1
+
+    def test_pickle(self):
+        ast = self.parser.parse('int main () {\n  int x = 1;\n  x = x * 2;\n}')
+        copy, = pickle.loads(pickle.dumps(ast)).functions
+        self.assertEqual((copy.statements[0].lineno, copy.statements[0].column), (3, 3))
+        self.assertEqual(copy.statements[0].value.fields(), {'lhs': copy.statements[0].value.lhs, 'rhs': copy.statements[0].value.rhs, 'op': '*'})
+
+    def test_long_lists(self):
+        count = 20000
+        text = 'int main () {\n' + ''.join(f'int x{index};\n' for index in range(count // 2))
+        text += ''.join(f'x{index} = {index};\n' for index in range(count // 2)) + '{ }\n}\n'
+        ast = self.parser.parse(text)
+        main, = ast.functions
+        self.assertEqual([declaration.id for declaration in main.declarations], [f'x{index}' for index in range(count // 2)])
+        self.assertEqual(len(main.statements), count // 2 + 1)
+        self.assertIsInstance(main.statements[-2], Assignment)
+        self.assertEqual(main.statements[-2].value.value, count // 2 - 1)
+        self.assertIsNone(main.statements[-1])
+        ast.accept(IR())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import ctypes
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from src import backend
+from src.backend import BackendError, emit, emit_many, find_linker, link_shared
+from src.cache import ObjectCache
+from src.compiler import Compiler
+from src.ir import IR
+from src.main import main
+
+RETURN_INT = '''
+define i32 @"main"()
+{
+entry:
+  %"x" = add i32 40, 2
+  ret i32 %"x"
+}
+'''
+
+SOURCE = 'int main () { int x = 0; while (x < 10) { x = x + 1; } }'
+
+
+class BackendTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_emit(self):
+        compiler = Compiler(self.path('tables'))
+        compiler.build_parser()
+        ir = IR()
+        compiler.get_AST(SOURCE).accept(ir)
+
+        code = emit(ir.module)
+        if sys.platform.startswith('linux'):
+            self.assertTrue(code.startswith(b'\x7fELF'))
+        self.assertEqual(emit(str(ir.module)), code)
+        self.assertIn(b'main', emit(ir.module, 'asm'))
+        with self.assertRaises(ValueError):
+            emit(ir.module, 'exe')
+
+    def test_emit_many(self):
+        irs = [RETURN_INT.replace('40', str(value)) for value in range(4)]
+        cache = ObjectCache(self.path('objects'))
+        codes = emit_many(irs, jobs=2, cache=cache)
+        self.assertEqual(codes, [emit(ir) for ir in irs])
+
+        # Cached modules skip code generation, only the new one is emitted
+        with mock.patch.object(backend, 'emit', wraps=backend.emit) as emitted:
+            self.assertEqual(emit_many([*irs, RETURN_INT], jobs=1, cache=cache)[:4], codes)
+        self.assertEqual(emitted.call_count, 1)
+
+    @unittest.skipIf(find_linker() is None, 'no linker on the PATH')
+    def test_link_shared(self):
+        with open(self.path('main.o'), 'wb') as output:
+            output.write(emit(RETURN_INT))
+        library = link_shared([self.path('main.o')], self.path('libmain.so'))
+        self.assertEqual(ctypes.CDLL(library).main(), 42)
+
+        with self.assertRaises(BackendError):
+            link_shared([self.path('missing.o')], self.path('libmissing.so'))
+
+    def test_compiler(self):
+        objects = ObjectCache(self.path('objects'))
+        compiler = Compiler(self.path('tables'), emit='obj', objects=objects)
+        compiler.build_parser()
+        result = compiler.compile(SOURCE)
+        self.assertTrue(result.ok, result.diagnostics)
+        self.assertEqual(result.native, emit(result.ir))
+        self.assertIn('codegen', result.timings)
+
+        with mock.patch('src.compiler.emit') as emitted:
+            self.assertEqual(compiler.compile(SOURCE).native, result.native)
+        emitted.assert_not_called()
+
+        self.assertIsNone(compiler.compile('int main () { x }').native)
+        with self.assertRaises(ValueError):
+            Compiler(self.path('tables'), emit='exe')
+
+    def test_compile_many(self):
+        paths = []
+        for index in range(3):
+            paths.append(self.path(f'unit{index}.c'))
+            with open(paths[-1], 'w') as source:
+                source.write(SOURCE.replace('10', str(index + 10)))
+
+        results = Compiler(self.path('tables'), emit='asm').compile_many(paths, jobs=2)
+        for index, result in enumerate(results):
+            self.assertTrue(result.ok, result.diagnostics)
+            self.assertIn(b'main', result.native)
+
+    @unittest.skipIf(find_linker() is None, 'no linker on the PATH')
+    def test_main(self):
+        with open(self.path('unit.c'), 'w') as source:
+            source.write(SOURCE)
+        status = main([self.path('unit.c'), '--shared', self.path('libunit.so'), '-o', self.path('out'), '-j', '1', '--cache-dir', self.path('tables')])
+        self.assertEqual(status, 0)
+        self.assertTrue(os.path.exists(self.path('out/unit.o')))
+        ctypes.CDLL(self.path('libunit.so')).main()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from src.cache import CompilationCache, ContentCache, ObjectCache
+from src.compiler import Compiler
+
+
+def hammer(directory, worker):
+    cache = ContentCache(directory, max_bytes=64 << 10)
+    seen = 0
+    for round in range(200):
+        key = cache.key('entry', round % 20)
+        data = cache.get(key)
+        if data is not None:
+            # Entries are complete or missing, never partial
+            assert data == bytes([round % 20]) * 4096, (worker, round)
+            seen += 1
+        cache.put(key, bytes([round % 20]) * 4096)
+    return seen
+
+
+class ContentCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_put(self):
+        cache = ContentCache(self.directory.name)
+        key = cache.key('source', 1)
+        self.assertIsNone(cache.get(key))
+        cache.put(key, b'data')
+        self.assertEqual(cache.get(key), b'data')
+        self.assertNotEqual(cache.key('source', 1), cache.key('source', 2))
+        self.assertNotEqual(cache.key('ab', 'c'), cache.key('a', 'bc'))
+
+    def test_lru_eviction(self):
+        cache = ContentCache(self.directory.name, max_bytes=10 * 1000)
+        keys = [cache.key(index) for index in range(10)]
+        for index, key in enumerate(keys):
+            cache.put(key, b'x' * 1000)
+            os.utime(cache.path(key), (index, index))
+
+        cache.get(keys[0]) # Most recently used now
+        cache.put(cache.key('new'), b'x' * 1000)
+
+        self.assertLessEqual(cache.size(), 9 * 1000)
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIsNotNone(cache.get(keys[9]))
+
+    def test_shared_store(self):
+        # The compile and object caches of a directory are bounded together
+        store = ContentCache(self.directory.name, max_bytes=10 * 1000)
+        compilations, objects = CompilationCache(store=store), ObjectCache(store=store)
+        for index in range(10):
+            compilations.save(f'source {index}', 'version', None, 'i' * 500)
+            objects.save(f'ir {index}', 'target', 'obj', b'o' * 500)
+
+        self.assertLessEqual(store.size(), 10 * 1000)
+        self.assertIsNotNone(compilations.lookup('source 9', 'version'))
+        self.assertEqual(objects.lookup('ir 9', 'target', 'obj'), b'o' * 500)
+        self.assertIsNone(objects.lookup('ir 0', 'target', 'obj'))
+
+    def test_concurrent_processes(self):
+        with ProcessPoolExecutor(4) as executor:
+            futures = [executor.submit(hammer, self.directory.name, worker) for worker in range(4)]
+            for future in futures:
+                future.result()
+
+        self.assertLessEqual(ContentCache(self.directory.name).size(), 64 << 10)
+
+
+class CompilationCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.tables = tempfile.TemporaryDirectory()
+        self.compiler = Compiler(self.tables.name, cache=CompilationCache(self.directory.name))
+        self.compiler.build_parser()
+
+    def tearDown(self):
+        self.directory.cleanup()
+        self.tables.cleanup()
+
+    def compile(self, t_string):
+        return self.compiler.compile(t_string)
+
+    def test_hit(self):
+        first = self.compile('int main () { int x = 5; x = x + 1; }')
+        self.assertNotIn('cache', first.timings)
+
+        second = self.compile('int main () { int x = 5; x = x + 1; }')
+        self.assertEqual(list(second.timings), ['cache'])
+        self.assertEqual(second.ir, first.ir)
+        self.assertEqual(second.ast.functions[0].declarations[0].id, 'x')
+
+        other = self.compile('int main () { int y = 5; }')
+        self.assertNotIn('cache', other.timings)
+
+    def test_version_change_misses(self):
+        self.compile('int main () { int x = 5; }')
+        self.compiler.version += '-changed'
+        self.assertNotIn('cache', self.compile('int main () { int x = 5; }').timings)
+
+    def test_failures_are_not_cached(self):
+        self.compile('int main () { x }')
+        self.assertNotIn('cache', self.compile('int main () { x }').timings)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+from src.compiler import Compiler
+
+
+class CompileManyTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.directory.name, 'tables')
+        self.paths = []
+        for index in range(6):
+            path = os.path.join(self.directory.name, f'unit{index}.c')
+            with open(path, 'w') as source:
+                source.write(f'int main () {{ int value{index} = {index}; }}')
+            self.paths.append(path)
+
+        self.bad = os.path.join(self.directory.name, 'bad.c')
+        with open(self.bad, 'w') as source:
+            source.write('int main () { x }')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def check(self, results, paths):
+        self.assertEqual([result.path for result in results], paths)
+        for index, result in enumerate(results[:len(self.paths)]):
+            self.assertTrue(result.ok, result.diagnostics)
+            self.assertNotIn('alloca', result.ir)
+            self.assertIn('ret void', result.ir)
+            self.assertIn('parse', result.timings)
+            self.assertIn('ir', result.timings)
+
+    def test_in_order_with_workers(self):
+        paths = self.paths + [self.bad, os.path.join(self.directory.name, 'missing.c')]
+        results = Compiler(self.cache_dir).compile_many(paths, jobs=2)
+
+        self.check(results, paths)
+        self.assertFalse(results[-2].ok)
+        self.assertEqual(results[-2].diagnostics, ["parse: 1:17: syntax: Error de sintaxis en '}'"])
+        self.assertFalse(results[-1].ok)
+        self.assertTrue(results[-1].diagnostics[0].startswith('read:'))
+
+    def test_single_job(self):
+        results = Compiler(self.cache_dir).compile_many(self.paths, jobs=1, keep_ast=True)
+
+        self.check(results, self.paths)
+        self.assertEqual(results[0].ast.functions[0].declarations[0].id, 'value0')
+
+
+if __name__ == '__main__':
+    unittest.main()
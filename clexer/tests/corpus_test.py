@@ -0,0 +1,92 @@
+import collections
+import tempfile
+import unittest
+from benchmarks.corpus import lexer_corpus, program, unit
+from benchmarks.suite import compare
+from benchmarks.traversal import RecursiveIR
+from src.cparser import CParser
+from src.ir import IR, ASTNode
+from src.keywords import RESERVED, keywords
+
+
+class CorpusTest(unittest.TestCase):
+    def setUp(self):
+        self.tables = tempfile.TemporaryDirectory()
+        self.c_parser = CParser()
+        self.c_parser.build(self.tables.name)
+
+    def tearDown(self):
+        self.tables.cleanup()
+
+    def test_deterministic(self):
+        self.assertEqual(program(50, seed=4), program(50, seed=4))
+        self.assertNotEqual(program(50, seed=4), program(50, seed=5))
+        self.assertEqual(lexer_corpus(50, seed=4), lexer_corpus(50, seed=4))
+
+    def test_program(self):
+        for seed in range(3):
+            with self.subTest(seed=seed):
+                ast = self.c_parser.parse(program(200, seed))
+                self.assertEqual(list(self.c_parser.diagnostics), [])
+                ast.accept(IR())
+
+    def test_unit(self):
+        self.assertEqual(unit(1, 50, seed=4), program(50, seed=4))
+        ast = self.c_parser.parse(unit(5, 50, seed=1))
+        self.assertEqual(list(self.c_parser.diagnostics), [])
+        self.assertEqual([function.name for function in ast.functions], [f'function_{index}' for index in range(4)] + ['main'])
+        ast.accept(IR())
+
+    def test_coverage(self):
+        kinds = collections.Counter()
+        pending = [self.c_parser.parse(program(300))]
+        while pending:
+            node = pending.pop()
+            if isinstance(node, list):
+                pending.extend(node)
+            elif isinstance(node, ASTNode):
+                kinds[type(node).__name__, getattr(node, 'op', None)] += 1
+                pending.extend(node.fields().values())
+
+        for kind in ('Declaration', 'Assignment', 'IfStatement', 'IfElseStatement', 'WhileStatement', 'ForStatement', 'Literal'):
+            self.assertIn((kind, None), kinds)
+        for op in ('+', '-', '*', '/', '%'):
+            self.assertIn(('BinaryOp', op), kinds)
+        for op in ('<', '<=', '>', '>=', '==', '!='):
+            self.assertIn(('RelationalOp', op), kinds)
+        for op in ('&&', '||'):
+            self.assertIn(('BooleanOp', op), kinds)
+
+        c_lexer = self.c_parser.c_lexer
+        c_lexer.input(lexer_corpus(300))
+        types = {token.type for token in c_lexer}
+        # KEYWORD, SIZE and ALIGNMENT have no input that reaches them, nor the keywords of other dialects
+        other_dialects = set(RESERVED.values()) - set(keywords().values())
+        self.assertEqual(set(c_lexer.tokens) - types, {'KEYWORD', 'SIZE', 'ALIGNMENT'} | other_dialects)
+        self.assertEqual(set(c_lexer.literals) - types, set())
+        self.assertEqual({diagnostic.kind for diagnostic in c_lexer.diagnostics}, {'lexical'})
+
+    def test_recursive_traversal(self):
+        # The recursive driver of benchmarks.traversal lowers the same IR, so only the dispatch is compared
+        text = program(300, seed=3)
+        iterative, recursive = IR(), RecursiveIR()
+        self.c_parser.parse(text).accept(iterative)
+        self.c_parser.parse(text).accept(recursive)
+        self.assertEqual(str(iterative.module), str(recursive.module))
+
+    def test_compare(self):
+        baseline = [
+            {'size': 10, 'stage': 'lex', 'engine': 'ply', 'seconds': 1.0, 'peak_bytes': 100},
+            {'size': 10, 'stage': 'ir', 'engine': None, 'seconds': 1.0, 'peak_bytes': 100},
+        ]
+        results = [
+            {'size': 10, 'stage': 'lex', 'engine': 'ply', 'seconds': 1.05, 'peak_bytes': 150},
+            {'size': 10, 'stage': 'ir', 'engine': None, 'seconds': 2.0, 'peak_bytes': 100},
+            {'size': 20, 'stage': 'ir', 'engine': None, 'seconds': 9.0, 'peak_bytes': 900},
+        ]
+        self.assertEqual(compare(baseline, results, 0.1), ['lex ply size 10: peak memory +50.0%', 'ir size 10: time +100.0%'])
+        self.assertEqual(compare(baseline, baseline), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
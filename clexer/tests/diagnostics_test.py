@@ -0,0 +1,115 @@
+import contextlib
+import io
+import tempfile
+import unittest
+from src.clexer import CLexer
+from src.compiler import Compiler
+from src.cparser import CParser
+from src.diagnostics import Diagnostic, Diagnostics
+
+
+class DiagnosticsTest(unittest.TestCase):
+    def test_limit(self):
+        diagnostics = Diagnostics(limit=2)
+        for offset in range(5):
+            diagnostics.report('lexical', 'bad', offset, 1, offset + 1)
+
+        self.assertEqual(list(diagnostics), [Diagnostic('lexical', 'bad', 0, 1, 1), Diagnostic('lexical', 'bad', 1, 1, 2)])
+        self.assertEqual((len(diagnostics), diagnostics.count, diagnostics.dropped), (2, 5, 3))
+        diagnostics.clear()
+        self.assertEqual((len(diagnostics), diagnostics.count, diagnostics.dropped), (0, 0, 0))
+
+    def test_sink(self):
+        received = []
+        diagnostics = Diagnostics(limit=None, sink=received.append)
+        diagnostics.report('syntax', 'unexpected', 3, 2, 1)
+        diagnostics.report('syntax', 'at the end')
+
+        self.assertEqual(len(diagnostics), 0)
+        self.assertEqual([str(record) for record in received], ['2:1: syntax: unexpected', 'syntax: at the end'])
+
+
+class ParserDiagnosticsTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tables = tempfile.TemporaryDirectory()
+        cls.parser = CParser()
+        cls.parser.build(cls.tables.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tables.cleanup()
+
+    def parse(self, text):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            ast = self.parser.parse(text)
+        self.assertEqual(output.getvalue(), '')
+        return ast
+
+    def test_recovery(self):
+        text = 'int main () {\n  int a = 1;\n  a = ;\n  a = 2;\n  b = 3 + ;\n  a = 3 @ 4;\n}'
+        ast = self.parse(text)
+
+        self.assertEqual([(record.kind, record.line, record.column, record.offset) for record in self.parser.diagnostics],
+                         [('syntax', 3, 7, text.index('= ;') + 2), ('syntax', 5, 11, text.index('+ ;') + 2),
+                          ('lexical', 6, 9, text.index('@')), ('syntax', 6, 11, text.index('4;'))])
+        self.assertEqual(self.parser.diagnostics.records[0].message, "Error de sintaxis en ';'")
+        self.assertEqual(ast.functions[0].statements[1].value.value, 2) # The statements between the errors are kept
+
+    def test_end_of_input(self):
+        self.assertIsNone(self.parse('int main () {\n  int a = 1;\n'))
+        self.assertEqual([str(record) for record in self.parser.diagnostics], ['3:1: syntax: Error de sintaxis al final de la entrada'])
+
+    def test_cleared_by_every_parse(self):
+        self.parse('int main () { a = ; }')
+        self.assertEqual(len(self.parser.diagnostics), 1)
+        self.parse('int main () { int a = 1; }')
+        self.assertEqual(len(self.parser.diagnostics), 0)
+
+    def test_stream_offsets(self):
+        text = 'int main () {\n' + '  int a = 1;\n' * 20 + '  a = $;\n}\n'
+        self.parser.parse_stream(io.StringIO(text), chunk_size=16)
+
+        self.assertEqual([(record.kind, record.offset, record.line, record.column) for record in self.parser.diagnostics],
+                         [('lexical', text.index('$'), 22, 7), ('syntax', text.index('$') + 1, 22, 8)])
+
+
+class LexerDiagnosticsTest(unittest.TestCase):
+    def setUp(self):
+        self.tables = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tables.cleanup()
+
+    def test_both_engines(self):
+        text = 'x = @;\n"open\ny = `1;'
+        for engine in CLexer.engines:
+            with self.subTest(engine=engine):
+                c_lexer = CLexer()
+                c_lexer.build(self.tables.name, engine=engine)
+                c_lexer.input(text)
+                list(c_lexer)
+                self.assertEqual([str(record) for record in c_lexer.diagnostics],
+                                 ["1:5: lexical: Illegal character '@'", '2:1: lexical: Unterminated string', "3:5: lexical: Illegal character '`'"])
+
+
+class CompilerDiagnosticsTest(unittest.TestCase):
+    def setUp(self):
+        self.tables = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tables.cleanup()
+
+    def test_recovered_tree_is_not_compiled(self):
+        compiler = Compiler(self.tables.name)
+        compiler.build_parser()
+        result = compiler.compile('int main () { int a = 1; a = ; a = 2 a; }')
+
+        self.assertFalse(result.ok)
+        self.assertIsNone(result.ir)
+        self.assertEqual(result.diagnostics, ["parse: 1:30: syntax: Error de sintaxis en ';'", "parse: 1:38: syntax: Error de sintaxis en 'a'"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import tempfile
+import unittest
+from src.compiler import Compiler
+from src.folding import fold
+from src.ir import IR, Literal, BinaryOp, Assignment, Declaration, WhileStatement, SemanticError
+from src.jit import JIT
+
+
+class ConstantFolderTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tables = tempfile.TemporaryDirectory()
+        cls.compiler = Compiler(cls.tables.name, fold=False)
+        cls.compiler.build_parser()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tables.cleanup()
+
+    def fold(self, t_string):
+        return fold(self.compiler.get_AST(t_string))
+
+    def value(self, t_string):
+        ast = self.fold(t_string)
+        literal = ast.functions[0].declarations[-1].value
+        self.assertIsInstance(literal, Literal)
+        return literal.value
+
+    def test_int_arithmetic(self):
+        self.assertEqual(self.value('int main () { int x = 2 + 3 * 4 - 1; }'), 13)
+        self.assertEqual(self.value('int main () { int x = 0 - 7 / 2; }'), -3)
+        self.assertEqual(self.value('int main () { int x = 0 - 7 % 3; }'), -1)
+        self.assertEqual(self.value('int main () { int x = 2147483647 + 1; }'), -2147483648)
+        self.assertEqual(self.value('int main () { int x = 3 < 4; }'), 1)
+        self.assertEqual(self.value('int main () { int x = 3 == 4; }'), 0)
+
+    def test_float_arithmetic(self):
+        self.assertEqual(self.value('int main () { float x = 0.1 + 0.2; }'), 0.30000001192092896)
+        self.assertEqual(self.value('int main () { float x = 1 / 2.0; }'), 0.5)
+
+    def test_undefined_operations_are_kept(self):
+        for t_string in ('int main () { int x = 1 / 0; }', 'int main () { float x = 1.0 % 0; }'):
+            self.assertIsInstance(self.fold(t_string).functions[0].declarations[-1].value, BinaryOp)
+
+    def test_identities(self):
+        ast = self.fold('int main () { int y = 1; float f = 1; int x = y * 1 + 0 + 1 + 2; float g = f + 0; float h = y + 0.0; }')
+        x, g, h = ast.functions[0].declarations[2:]
+        self.assertEqual((x.value.op, x.value.lhs.value, x.value.rhs.value), ('+', 'y', 3))
+        self.assertIsInstance(g.value, BinaryOp) # -0.0 + 0 is not -0.0
+        self.assertIsInstance(h.value, BinaryOp) # turns y into a float
+
+    def test_branch_pruning(self):
+        ast = self.fold('int main () { int x = 0; if (1 > 2) { int y = 5; x = 1; } else { while (x < 0 && 0) x = x + 1; } }')
+        self.assertEqual(ast.functions[0].statements, [])
+
+        # A branch that declares variables stays a block, they go out of scope with it
+        block = self.fold('int main () { int x = 0; if (2) { int y = 3; x = y; } }').functions[0].statements[0]
+        self.assertIsInstance(block, list)
+        self.assertEqual([type(statement) for statement in block], [Declaration, Assignment])
+
+        assignment = self.fold('int main () { int x = 0; if (2) x = 3; }').functions[0].statements[0]
+        self.assertEqual((assignment.id, assignment.value.value), ('x', 3))
+
+        loop = self.fold('int main () { int x = 0; while (1) { x = x + 1; } }').functions[0].statements[0]
+        self.assertIsInstance(loop, WhileStatement)
+
+    def test_dead_code_is_checked(self):
+        with self.assertRaises(SemanticError):
+            self.fold('int main () { if (0) x = 1; }')
+        with self.assertRaises(SemanticError):
+            self.fold('int main () { int x = 0; if (x > 2) { int y = 5; } else { while (0) x = y; } }')
+        with self.assertRaises(SemanticError):
+            self.fold('int main () { if (0) { int y = 1; int y = 2; } }')
+        self.fold('int main () { int y = 0; if (0) { float y = 1; { int y = 2; } y = y * 2.5; } }')
+
+    def test_shadowed_types(self):
+        # The float y of the block is gone after it, y + 0 of the outer int is an identity again
+        ast = self.fold('int main () { int y = 1; int x = 0; { float y = 2; x = y + 0; } x = y + 0; }')
+        inner, outer = ast.functions[0].statements
+        self.assertIsInstance(inner[1].value, BinaryOp)
+        self.assertEqual(outer.value.value, 'y')
+
+    def test_folded_program_runs(self):
+        program = '''int main () { int x = 0; int n = 0; int s = 3 * 4;
+            for (int i = 0 * 5; i < 10 + 0; i = i + 1 + 0) { if (1 || x) { x = x + i * 1 + s - 0; } }
+            while (1 < 2 && n < 4) { n = n + 1; if (0) x = 0; } }'''
+        plain = self.compiler.get_AST(program)
+        folded = self.fold(program)
+
+        modules = []
+        for ast in (plain, folded):
+            ir = IR()
+            ast.accept(ir)
+            modules.append(str(ir.module))
+        self.assertLess(len(modules[1]), len(modules[0]))
+        for module in modules:
+            self.assertIsNone(JIT().run(module))
+
+
+if __name__ == '__main__':
+    unittest.main()
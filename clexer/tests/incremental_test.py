@@ -0,0 +1,116 @@
+import random
+import tempfile
+import unittest
+from src.cparser import CParser
+from src.incremental import IncrementalParser
+from src.ir import ASTNode
+
+PROGRAM = '''int main () {
+  int a = 1; float b = 2.5; int c;
+  a = a + 1;
+  { c = a * 2; b = b / 2; }
+  ;
+  if (a < 3) { a = 4; } else { a = 5; }
+  while (c > 0) { c = c - 1; int d = c; d = d + 1;
+    for (int i = 0; i < 10; i = i + 1) { a = a + i; }
+    b = 1.e+5; }
+}'''
+
+SNIPPETS = [' ', 'x', '1', ';', '{', '}', 'if (a) ', 'else ', 'while (c < 2) ', 'a = 3; ', 'int z = 1; ', '"s"', '.', 'e', '+', '=', '(', ')', '\n']
+
+
+def same(a, b) -> bool:
+    if isinstance(a, ASTNode):
+        return (type(a) is type(b) and (a.lineno, a.column) == (b.lineno, b.column)
+                and all(same(value, other) for value, other in zip(a.fields().values(), b.fields().values())))
+    if isinstance(a, list):
+        return isinstance(b, list) and len(a) == len(b) and all(map(same, a, b))
+    return type(a) is type(b) and a == b
+
+
+class IncrementalParserTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tables = tempfile.TemporaryDirectory()
+        cls.parser = CParser()
+        cls.parser.build(cls.tables.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tables.cleanup()
+
+    def setUp(self):
+        self.incremental = IncrementalParser(self.parser)
+        self.incremental.parse(PROGRAM)
+
+    def full(self, text):
+        self.parser.c_lexer.lexer.begin('INITIAL')
+        return self.parser.parse(text)
+
+    def check(self, offset, deleted, inserted):
+        text = self.incremental.text[:offset] + inserted + self.incremental.text[offset + deleted:]
+        ast = self.incremental.edit(offset, deleted, inserted)
+        self.assertEqual(self.incremental.text, text)
+        self.assertTrue(same(ast, self.full(text)), (text, self.incremental.mode))
+
+        self.parser.c_lexer.input(text)
+        self.assertEqual([(token.type, token.value, token.lexpos, token.lineno, token.column) for token in self.parser.c_lexer],
+                         [(token.type, token.value, token.lexpos, token.lineno, token.column) for token in self.incremental.tokens])
+        return ast
+
+    def test_untouched_items_are_reused(self):
+        before = self.incremental.ast
+        ast = self.check(PROGRAM.index('* 2') + 2, 0, '7')
+
+        self.assertEqual(self.incremental.mode, 'incremental')
+        self.assertIs(ast.functions[0].declarations[0], before.functions[0].declarations[0])
+        self.assertIs(ast.functions[0].statements[0], before.functions[0].statements[0])
+        self.assertIs(ast.functions[0].statements[3], before.functions[0].statements[3])
+        self.assertLess(self.incremental.reparsed, 20)
+
+    def test_edit_inside_loop_body(self):
+        before = self.incremental.ast
+        ast = self.check(PROGRAM.index('b = 1.e+5'), 0, 'a = 2; ')
+
+        self.assertEqual(self.incremental.mode, 'incremental')
+        otherwise, before_otherwise = ast.functions[0].statements[-1].otherwise_statements, before.functions[0].statements[-1].otherwise_statements
+        self.assertIs(otherwise[0], before_otherwise[0])
+        self.assertIs(otherwise[1].statements[0][3].statements[0], before_otherwise[1].statements[0][3].statements[0])
+        self.assertLess(self.incremental.reparsed, 10)
+
+    def test_lookahead_before_the_edit(self):
+        self.check(PROGRAM.index('1.e+5'), 5, '1.e+')
+        self.check(PROGRAM.index('1.e+') + 4, 0, '7')
+        self.assertEqual(self.incremental.tokens[-4].value, 1e7)
+
+    def test_whitespace_and_errors(self):
+        self.check(0, 0, '  \n')
+        self.assertEqual(self.incremental.mode, 'unchanged')
+        self.check(PROGRAM.index('a = a + 1') + 3, 0, '+')
+        self.assertFalse(self.incremental.valid)
+        self.check(PROGRAM.index('a = a + 1') + 3, 1, '')
+        self.assertTrue(self.incremental.valid)
+
+    def test_functions(self):
+        # Splitting main in two is not an edit of its statements, the whole text is parsed
+        self.check(PROGRAM.index('  ;'), 0, '} int f () {')
+        self.assertEqual(self.incremental.mode, 'full')
+        self.assertEqual([function.name for function in self.incremental.ast.functions], ['main', 'f'])
+        self.check(PROGRAM.index('a = a + 1') + 8, 1, '2')
+        self.assertEqual(self.incremental.mode, 'full')
+
+    def test_random_edits(self):
+        rng = random.Random(7)
+        for trial in range(400):
+            text = self.incremental.text
+            offset = rng.randrange(len(text) + 1)
+            deleted = min(rng.choice([0, 0, 1, 2, 5]), len(text) - offset)
+            inserted = rng.choice(SNIPPETS) if rng.random() < 0.7 else ''
+            with self.subTest(trial=trial, text=text, offset=offset, deleted=deleted, inserted=inserted):
+                self.check(offset, deleted, inserted)
+            if not self.incremental.valid and rng.random() < 0.5:
+                self.incremental.parse(PROGRAM)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+from src.compiler import Compiler
+from src.instrumentation import Instrument, Report, count_nodes
+
+SOURCE = 'int main () { int x = 1 + 2; float y; while (x < 10) { x = x * 2; } }'
+
+
+class Recorded(Instrument):
+    def __init__(self, memory=False) -> None:
+        self.memory = memory
+        self.events = []
+        self.stages = []
+
+    def start(self, stage):
+        self.events.append(('start', stage.name))
+
+    def finish(self, stage):
+        self.events.append(('finish', stage.name))
+        self.stages.append((stage.name, stage.tokens, stage.nodes, stage.allocated))
+
+
+class InstrumentationTest(unittest.TestCase):
+    def setUp(self):
+        self.tables = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tables.cleanup()
+
+    def compiler(self, *instruments, **options):
+        compiler = Compiler(self.tables.name, instruments=instruments, **options)
+        compiler.build_parser()
+        return compiler
+
+    def test_stages(self):
+        instrument = Recorded()
+        result = self.compiler(instrument, opt_level=1).compile(SOURCE)
+        self.assertTrue(result.ok, result.diagnostics)
+
+        names = ['lex', 'parse', 'fold', 'ir', 'llvm']
+        self.assertEqual(instrument.events, [(event, name) for name in names for event in ('start', 'finish')])
+        self.assertEqual(list(result.timings), names)
+        self.assertEqual([stage.name for stage in result.stages], names)
+        self.assertEqual(result.stages[-1].instructions, result.instructions)
+
+        compiler = Compiler(self.tables.name)
+        compiler.build_parser()
+        compiler.parser.c_lexer.input(SOURCE)
+        tokens = sum(1 for _ in compiler.parser.c_lexer)
+        stages = {name: (tokens, nodes, allocated) for name, tokens, nodes, allocated in instrument.stages}
+        # x = 1 + 2 is folded to x = 3 before ir
+        self.assertEqual(stages['lex'], (tokens, None, None))
+        self.assertEqual(stages['parse'], (None, 15, None))
+        self.assertEqual(stages['ir'], (None, 13, None))
+
+    def test_same_result(self):
+        plain = self.compiler().compile(SOURCE)
+        instrumented = self.compiler(Recorded()).compile(SOURCE)
+        self.assertEqual(instrumented.ir, plain.ir)
+        self.assertEqual(list(plain.timings), ['parse', 'fold', 'ir'])
+        self.assertEqual(plain.stages, [])
+
+    def test_errors(self):
+        source = 'int main () { int x = 1 @ 2; x = ; }'
+        instrument = Recorded()
+        result = self.compiler(instrument).compile(source)
+        self.assertFalse(result.ok)
+        self.assertEqual(result.diagnostics, ["parse: 1:25: lexical: Illegal character '@'",
+                                              'parse: 1:27: syntax: Error de sintaxis en 2',
+                                              "parse: 1:34: syntax: Error de sintaxis en ';'"])
+        self.assertEqual(result.diagnostics, self.compiler().compile(source).diagnostics)
+        self.assertEqual(instrument.events, [('start', 'lex'), ('finish', 'lex'), ('start', 'parse'), ('finish', 'parse')])
+
+        # A failed fold is recorded like the stages before it
+        result = self.compiler(Recorded()).compile('int main () { int x; int x; }')
+        self.assertFalse(result.ok)
+        self.assertEqual(list(result.timings), ['lex', 'parse', 'fold'])
+        self.assertEqual([(stage.name, stage.failed) for stage in result.stages], [('lex', False), ('parse', False), ('fold', True)])
+
+    def test_memory(self):
+        instrument = Recorded(memory=True)
+        self.compiler(instrument).compile(SOURCE)
+        for name, _, _, allocated in instrument.stages:
+            self.assertGreater(allocated, 0, name)
+
+    def test_report(self):
+        report = Report()
+        compiler = self.compiler(report)
+        for _ in range(3):
+            compiler.compile(SOURCE)
+
+        self.assertEqual(list(report.stages), ['lex', 'parse', 'fold', 'ir'])
+        self.assertEqual(report.stages['parse'].runs, 3)
+        self.assertEqual(report.stages['parse'].nodes, 3 * 15)
+        self.assertEqual(report.stages['lex'].tokens % 3, 0)
+        lines = str(report).split('\n')
+        self.assertEqual(len(lines), 5)
+        self.assertTrue(lines[2].startswith('parse'))
+
+    def test_workers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for index in range(4):
+                paths.append(os.path.join(directory, f'unit{index}.c'))
+                with open(paths[-1], 'w') as source:
+                    source.write(SOURCE)
+
+            report = Report()
+            results = Compiler(self.tables.name, instruments=[report]).compile_many(paths, jobs=2)
+
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual(list(report.stages), ['read', 'lex', 'parse', 'fold', 'ir'])
+        self.assertEqual(report.stages['ir'].runs, 4)
+        self.assertEqual(report.stages['parse'].nodes, 4 * 15)
+        self.assertTrue(all(stage.tree is None for result in results for stage in result.stages))
+
+    def test_count_nodes(self):
+        compiler = self.compiler()
+        self.assertEqual(count_nodes(compiler.parser.parse('int main () { int x; }')), 3) # Program, main and the declaration
+        self.assertEqual(count_nodes(None), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import tempfile
+import unittest
+from src.clexer import CLexer
+from src.cparser import CParser
+from src.interning import ConstantPool, SymbolTable
+from src.ir import Assignment, Declaration, Literal, walk
+from src.literals import float_value, int_value
+
+SOURCE = '''
+int main () {
+    int counter = 0x10;
+    float ratio = 1.5;
+    while (counter < 100) { counter = counter + 0x10; ratio = ratio * 1.5; }
+}
+'''
+
+
+def names(ast) -> list:
+    """Every identifier string of ast, in the order of the nodes"""
+    found = []
+    def enter(node):
+        if isinstance(node, (Declaration, Assignment)):
+            found.append(node.id)
+        elif isinstance(node, Literal) and node.type == 'ID':
+            found.append(node.value)
+    walk(ast, enter)
+    return found
+
+
+class SymbolTableTest(unittest.TestCase):
+    def test_intern(self):
+        symbols = SymbolTable()
+        name = ''.join(['coun', 'ter'])
+        self.assertIs(symbols.intern(name), name)
+        self.assertIs(symbols.intern(''.join(['count', 'er'])), name)
+        self.assertIn('counter', symbols)
+        self.assertNotIn('ratio', symbols)
+
+    def test_ids(self):
+        symbols = SymbolTable()
+        for name in ('counter', 'ratio', 'counter', 'total'):
+            symbols.intern(name)
+        self.assertEqual([symbols.id(name) for name in ('counter', 'ratio', 'total')], [0, 1, 2])
+        self.assertEqual(symbols.id('other'), 3)
+        self.assertEqual(symbols.name(1), 'ratio')
+        self.assertEqual(len(symbols), 4)
+
+        symbols.clear()
+        self.assertEqual(len(symbols), 0)
+        self.assertEqual(symbols.id('total'), 0)
+
+
+class ConstantPoolTest(unittest.TestCase):
+    def test_values(self):
+        constants = ConstantPool()
+        texts = ['0x10', '16', '0x10', '07', '16u']
+        values = constants.int_values(texts)
+        self.assertEqual(values, [int_value(text) for text in texts])
+        self.assertEqual(len(constants), 4)
+        self.assertEqual(constants.int_value('0x10'), 16)
+        self.assertEqual(constants.float_values(['1.5', '1.5f']), [float_value('1.5'), float_value('1.5f')])
+        self.assertEqual(len(constants), 6)
+
+        constants.clear()
+        self.assertEqual(len(constants), 0)
+
+    def test_converted_once(self):
+        converted = []
+        def convert(texts):
+            converted.extend(texts)
+            return [int_value(text) for text in texts]
+
+        constants = ConstantPool()
+        self.assertEqual(constants._values(constants.ints, convert, ['1', '2', '1']), [1, 2, 1])
+        self.assertEqual(constants._values(constants.ints, convert, ['2', '3']), [2, 3])
+        self.assertEqual(converted, ['1', '2', '3'])
+
+
+class ParserTest(unittest.TestCase):
+    def setUp(self):
+        self.tables = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tables.cleanup()
+
+    def assertShared(self, ast):
+        found = names(ast)
+        self.assertEqual(found.count('counter'), 4)
+        for name in ('counter', 'ratio'):
+            self.assertEqual(len({id(string) for string in found if string == name}), 1, name)
+
+    def test_parse(self):
+        for engine in CLexer.engines:
+            for values in CLexer.value_policies:
+                with self.subTest(engine=engine, values=values):
+                    c_parser = CParser()
+                    c_parser.build(self.tables.name, engine=engine, values=values)
+                    self.assertShared(c_parser.parse(SOURCE))
+                    self.assertShared(c_parser.parse_tokens(c_parser.tokenize(SOURCE)))
+                    self.assertIn('counter', c_parser.symbols)
+                    self.assertEqual(c_parser.constants.ints, {'0x10': 16, '100': 100})
+
+    def test_cleared(self):
+        c_parser = CParser()
+        c_parser.build(self.tables.name)
+        c_parser.parse(SOURCE)
+        c_parser.parse('int main () { int other = 2; }')
+        self.assertNotIn('counter', c_parser.symbols)
+        self.assertIn('other', c_parser.symbols)
+        self.assertEqual(c_parser.constants.ints, {'2': 2})
+
+    def test_clone(self):
+        c_parser = CParser()
+        c_parser.build(self.tables.name)
+        clone = c_parser.clone()
+        self.assertIsNot(clone.symbols, c_parser.symbols)
+        self.assertIs(clone.symbols, clone.c_lexer.symbols)
+        self.assertIs(clone.constants, clone.c_lexer.constants)
+        clone.parse(SOURCE)
+        self.assertIn('counter', clone.symbols)
+        self.assertNotIn('counter', c_parser.symbols)
+
+
+if __name__ == '__main__':
+    unittest.main()
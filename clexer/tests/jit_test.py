@@ -0,0 +1,56 @@
+import tempfile
+import unittest
+from src.compiler import Compiler
+from src.ir import IR
+from src.jit import JIT, JITError
+
+RETURN_INT = '''
+define i32 @"main"()
+{
+entry:
+  %"x" = add i32 40, 2
+  ret i32 %"x"
+}
+'''
+
+
+class JITTest(unittest.TestCase):
+    def setUp(self):
+        self.jit = JIT(max_engines=2)
+        self.tables = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tables.cleanup()
+
+    def test_runs_compiled_program(self):
+        compiler = Compiler(self.tables.name)
+        compiler.build_parser()
+        ast = compiler.get_AST('int main () { int x = 0; while (x < 10) { x = x + 1; } }')
+        ir = IR()
+        ast.accept(ir)
+
+        self.assertIsNone(self.jit.run(ir.module))
+        self.assertIsNone(self.jit.run(str(ir.module)))
+        self.assertEqual(len(self.jit.programs), 1)
+
+    def test_return_value_and_reuse(self):
+        program = self.jit.load(RETURN_INT)
+        self.assertEqual(program(), 42)
+        self.assertEqual(program(), 42)
+        self.assertIs(self.jit.load(RETURN_INT), program)
+
+    def test_engines_are_bounded(self):
+        for value in range(3):
+            self.jit.run(RETURN_INT.replace('40', str(value)))
+        self.assertEqual(len(self.jit.programs), 2)
+        self.assertEqual(self.jit.run(RETURN_INT.replace('40', '0')), 2)
+
+    def test_signature_is_checked(self):
+        with self.assertRaises(JITError):
+            self.jit.load(RETURN_INT.replace('@"main"()', '@"main"(i32 %"a")'))
+        with self.assertRaises(JITError):
+            self.jit.load(RETURN_INT.replace('main', 'start'))
+
+
+if __name__ == '__main__':
+    unittest.main()
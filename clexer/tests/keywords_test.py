@@ -0,0 +1,75 @@
+import tempfile
+import unittest
+from src.clexer import CLexer
+from src.compiler import Compiler
+from src.keywords import C89, C99, C11, C23, DEFAULT_DIALECT, DIALECTS, MSVC, RESERVED, keywords
+
+
+class KeywordsTest(unittest.TestCase):
+    def setUp(self):
+        self.tables = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tables.cleanup()
+
+    def lex(self, text, engine='ply', dialect=DEFAULT_DIALECT):
+        c_lexer = CLexer()
+        c_lexer.build(self.tables.name, engine=engine, dialect=dialect)
+        c_lexer.input(text)
+        return [(token.type, token.value) for token in c_lexer]
+
+    def test_identifiers(self):
+        for engine in CLexer.engines:
+            with self.subTest(engine):
+                self.assertEqual(self.lex('a1b _x9_y9z value_12 int1 for_ while', engine), [
+                    ('IDENTIFIER', 'a1b'), ('IDENTIFIER', '_x9_y9z'), ('IDENTIFIER', 'value_12'),
+                    ('IDENTIFIER', 'int1'), ('IDENTIFIER', 'for_'), ('WHILE', 'while'),
+                ])
+                self.assertEqual(self.lex('9ab', engine), [('INT', 9), ('IDENTIFIER', 'ab')])
+
+    def test_dialects(self):
+        self.assertTrue(set(C89) < set(C99) < set(C11) < set(C23))
+        self.assertTrue(set(C11) - {'_Imaginary'} < set(MSVC))
+        self.assertEqual(set(RESERVED), set().union(*DIALECTS.values()))
+        self.assertEqual(set(CLexer.tokens) & set(RESERVED.values()), set(RESERVED.values()))
+
+        text = 'bool inline __int64 _Atomic int'
+        expected = {
+            'c89': ['IDENTIFIER', 'IDENTIFIER', 'IDENTIFIER', 'IDENTIFIER', 'INT_KEYWORD'],
+            'c99': ['IDENTIFIER', 'INLINE', 'IDENTIFIER', 'IDENTIFIER', 'INT_KEYWORD'],
+            'c11': ['IDENTIFIER', 'INLINE', 'IDENTIFIER', '_ATOMIC', 'INT_KEYWORD'],
+            'c23': ['BOOL', 'INLINE', 'IDENTIFIER', '_ATOMIC', 'INT_KEYWORD'],
+            'msvc': ['IDENTIFIER', 'INLINE', '__INT64', '_ATOMIC', 'INT_KEYWORD'],
+        }
+        for dialect, types in expected.items():
+            for engine in CLexer.engines:
+                with self.subTest(dialect=dialect, engine=engine):
+                    self.assertEqual([type for type, _ in self.lex(text, engine, dialect)], types)
+
+    def test_default_dialect(self):
+        # The default keeps the keywords of the lexer before dialects, _Imaginary is a name
+        for engine in CLexer.engines:
+            with self.subTest(engine):
+                self.assertEqual(self.lex('_Imaginary _Complex', engine), [('IDENTIFIER', '_Imaginary'), ('_COMPLEX', '_Complex')])
+                self.assertEqual(self.lex('_Imaginary', engine, 'c11'), [('_IMAGINARY', '_Imaginary')])
+
+    def test_unknown_dialect(self):
+        with self.assertRaises(ValueError):
+            keywords('c77')
+        with self.assertRaises(ValueError):
+            CLexer().build(self.tables.name, dialect='gnu')
+
+    def test_compiler(self):
+        source = 'int main () { int bool = 1; bool = bool + 1; }'
+        compilers = {}
+        for dialect in ('c11', 'c23'):
+            compilers[dialect] = Compiler(self.tables.name, dialect=dialect)
+            compilers[dialect].build_parser()
+
+        self.assertTrue(compilers['c11'].compile(source).ok)
+        self.assertFalse(compilers['c23'].compile(source).ok)
+        self.assertNotEqual(compilers['c11'].version, compilers['c23'].version)
+
+
+if __name__ == '__main__':
+    unittest.main()
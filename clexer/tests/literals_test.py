@@ -0,0 +1,92 @@
+import io
+import random
+import tempfile
+import unittest
+from unittest import mock
+from src import literals
+from src.clexer import CLexer
+from src.literals import float_value, float_values, int_value, int_values
+
+SOURCE = 'x = 10UL + 10ULL * 0x1F - 0XaBu / 0b101 % 0B11LL;\ny = 0755 + 0 + 7i64 + 3Ui64 + 1.5f + 2.e3L + .5 + 08;\n'
+
+
+def random_ints(count, seed=0) -> list:
+    generator = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        value = generator.choice([generator.randint(0, 999), generator.randint(0, 1 << 40), generator.randint(0, (1 << 64) - 1), generator.randint(0, 1 << 80)])
+        digits = generator.choice([str(value), f'0{value:o}', f'0x{value:x}', f'0X{value:X}', f'0b{value:b}', f'0B{value:b}'])
+        texts.append(digits + generator.choice(['', 'u', 'UL', 'ull', 'LLU', 'l', 'i64', 'Ui64']))
+    return texts
+
+
+class LiteralsTest(unittest.TestCase):
+    def test_int_value(self):
+        cases = {'10': 10, '10UL': 10, '10ULL': 10, '10llu': 10, '0x1F': 31, '0XaBu': 171, '0b101': 5, '0B11LL': 3,
+                 '0755': 493, '0': 0, '7i64': 7, '3Ui64': 3, '18446744073709551615u': (1 << 64) - 1}
+        for text, value in cases.items():
+            with self.subTest(text):
+                self.assertEqual(int_value(text), value)
+
+    def test_float_value(self):
+        for text, value in {'1.5f': 1.5, '2.e3L': 2000.0, '.5': 0.5, '1575e-2F': 15.75}.items():
+            with self.subTest(text):
+                self.assertEqual(float_value(text), value)
+
+    def test_batches(self):
+        texts = random_ints(5000) + ['0', '00', '1', '0x0', '0b0', '0' * 30 + '1']
+        expected = [int_value(text) for text in texts]
+        self.assertEqual(int_values(texts), expected)
+        with mock.patch.object(literals, 'numpy', None):
+            self.assertEqual(int_values(texts), expected)
+
+        generator = random.Random(1)
+        floats = [f'{generator.uniform(0, 1e6):.{generator.randint(0, 9)}e}{generator.choice(["", "f", "L"])}' for _ in range(1000)]
+        self.assertEqual(float_values(floats), [float_value(text) for text in floats])
+        self.assertEqual(int_values([]), [])
+
+
+class ValuePolicyTest(unittest.TestCase):
+    def setUp(self):
+        self.tables = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tables.cleanup()
+
+    def lexer(self, engine, values):
+        c_lexer = CLexer()
+        c_lexer.build(self.tables.name, engine=engine, values=values)
+        return c_lexer
+
+    def test_tokens(self):
+        c_lexer = self.lexer('ply', 'eager')
+        c_lexer.input(SOURCE)
+        numbers = [token.value for token in c_lexer if token.type in ('INT', 'FLOAT')]
+        self.assertEqual(numbers, [10, 10, 31, 171, 5, 3, 493, 0, 7, 3, 1.5, 2000.0, 0.5, 0, 8])
+
+    def test_same_values(self):
+        c_lexer = self.lexer('ply', 'eager')
+        c_lexer.input(SOURCE)
+        expected = [(token.type, token.value, token.lexpos, token.lineno, token.column) for token in c_lexer]
+
+        for engine in CLexer.engines:
+            c_lexer = self.lexer(engine, 'deferred')
+            with self.subTest(engine):
+                c_lexer.input(SOURCE)
+                self.assertEqual([(token.type, token.value, token.lexpos, token.lineno, token.column) for token in c_lexer], expected)
+                c_lexer.input(SOURCE)
+                self.assertEqual([(token.type, token.value, token.lexpos, token.lineno, token.column) for token in c_lexer.batch()], expected)
+                tokens = c_lexer.tokenize_stream(io.StringIO(SOURCE), chunk_size=16)
+                self.assertEqual([(token.type, token.value, token.lexpos, token.lineno, token.column) for token in tokens], expected)
+
+                buffer = c_lexer.tokenize_buffer(SOURCE)
+                self.assertEqual([(token.type, token.value, token.lexpos, token.lineno, token.column) for token in buffer], expected)
+                self.assertEqual(len(buffer.values), 15)
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            CLexer().build(self.tables.name, values='lazy')
+
+
+if __name__ == '__main__':
+    unittest.main()
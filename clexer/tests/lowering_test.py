@@ -0,0 +1,98 @@
+import tempfile
+import unittest
+from src.compiler import Compiler
+from src.folding import fold
+from src.ir import Function, IR
+from src.jit import JIT
+from src.lowering import lower
+from src.scopes import SemanticError
+
+UNIT = '''
+int square () { int x = 3; x = x * x; }
+int count () { int n = 0; while (n < 10) { n = n + 1; } }
+int main () { float x = 1.5; for (int i = 0; i < 3; i = i + 1) { x = x * 2; } }
+'''
+
+
+# Loops, branches and variables of both types, NAME and INDEX are filled in by unit()
+FUNCTION = '''int NAME () {
+    int x = INDEX; float y = 0.5;
+    { for (int i = 0; i < x; i = i + 1) { { if (i % 2) { y = y * 2; } else { x = x - 1; } } } }
+    { while (x > 0) { x = x - 1; float z = y / 3; y = z + x; } }
+}
+'''
+
+
+def unit(functions) -> str:
+    names = [f'function_{index}' for index in range(functions - 1)] + ['main']
+    return ''.join(FUNCTION.replace('NAME', name).replace('INDEX', str(index)) for index, name in enumerate(names))
+
+
+class LoweringTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tables = tempfile.TemporaryDirectory()
+        cls.compiler = Compiler(cls.tables.name)
+        cls.compiler.build_parser()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tables.cleanup()
+
+    def test_functions(self):
+        ast = self.compiler.get_AST(UNIT)
+        self.assertEqual([function.name for function in ast.functions], ['square', 'count', 'main'])
+        self.assertTrue(all(isinstance(function, Function) for function in ast.functions))
+        self.assertEqual([(function.lineno, function.column) for function in ast.functions], [(2, 1), (3, 1), (4, 1)])
+        self.assertEqual((ast.lineno, ast.column), (2, 1))
+
+        # Every function has its own variables, x is an int in square and a float in main
+        visitor = IR()
+        ast.accept(visitor)
+        self.assertEqual([function.name for function in visitor.module.functions], ['square', 'count', 'main'])
+        self.assertIsNone(JIT().run(visitor.module))
+
+    def test_errors(self):
+        sources = [
+            'int f () { } int f () { }',
+            'int f () { int x = 1; } int main () { x = 2; }',
+            'int f () { } int main () { int x = f; }',
+            'int f () { } int main () { f = 1; }',
+        ]
+        for text in sources:
+            ast = self.compiler.get_AST(text)
+            for jobs in (1, 2):
+                with self.subTest(text, jobs=jobs), self.assertRaises(SemanticError):
+                    lower(ast, jobs)
+            with self.subTest(text, folded=True), self.assertRaises(SemanticError):
+                lower(fold(self.compiler.get_AST(text)))
+
+        # The position of the error comes back from the workers
+        ast = self.compiler.get_AST('int f () { }\nint main () {\n  int x = 1;\n  x = f;\n}')
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs), self.assertRaises(SemanticError) as raised:
+                lower(ast, jobs)
+            self.assertEqual(str(raised.exception.diagnostic), "4:7: semantic: 'f' is a function, not a variable")
+
+        # A variable can shadow a function
+        self.assertIsNone(JIT().run(lower(self.compiler.get_AST('int f () { } int main () { int f = 1; f = f + 1; }'))))
+
+    def test_parallel(self):
+        ast = fold(self.compiler.get_AST(unit(12)))
+        serial = lower(ast)
+        self.assertEqual(serial.count('define void'), 12)
+        for jobs in (2, 3, None):
+            with self.subTest(jobs=jobs):
+                self.assertEqual(lower(ast, jobs), serial)
+
+    def test_compiler(self):
+        compiler = Compiler(self.tables.name, lower_jobs=2)
+        compiler.build_parser()
+        result = compiler.compile(UNIT)
+        self.assertTrue(result.ok, result.diagnostics)
+        self.assertEqual(result.ir, self.compiler.compile(UNIT).ir)
+        self.assertIsNone(JIT().run(result.ir))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import tempfile
+import unittest
+import llvmlite.binding as llvm
+from src.compiler import Compiler
+from src.optimizer import optimize, count_instructions
+
+PROGRAMS = [
+    'int main () { for (int x = 5; x < 5; x = x + 1) x = 5; }',
+    'int main () { int a = 1; float f = 2.5; int b; if (a < 3 && f > 1) { b = a * 2 % 3; } else { b = 0; } while (b < 10) b = b + 1; }',
+    'int main () { int x = 0; while (x < 3) { if (x == 1 || x == 2) x = x + 2; x = x + 1; } }',
+    'int main () { float f = 1; int i = f * 3 + 1; int c = i < 4; for (int j = 0; j < 10; j = j + 1) { i = i + j; } }',
+]
+
+
+class OptimizerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tables = tempfile.TemporaryDirectory()
+        cls.compiler = Compiler(cls.tables.name)
+        cls.compiler.build_parser()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tables.cleanup()
+
+    def compile(self, t_string):
+        result = self.compiler.compile(t_string)
+        self.assertTrue(result.ok, result.diagnostics)
+        return result.ir
+
+    def test_ir_verifies(self):
+        for program in PROGRAMS:
+            with self.subTest(program=program):
+                llvm.parse_assembly(self.compile(program)).verify()
+
+    def test_levels(self):
+        for program in PROGRAMS:
+            ir = self.compile(program)
+            o0 = optimize(ir, 0)
+            self.assertEqual(o0.before, o0.after)
+            for level in (1, 2, 3):
+                with self.subTest(program=program, level=level):
+                    result = optimize(ir, level)
+                    self.assertEqual(result.before, o0.before)
+                    self.assertLess(result.after, result.before)
+                    self.assertNotIn('alloca', result.ir)
+                    self.assertEqual(count_instructions(llvm.parse_assembly(result.ir)), result.after)
+
+    def test_unknown_level(self):
+        with self.assertRaises(ValueError):
+            optimize(self.compile(PROGRAMS[0]), 4)
+
+    def test_compiler_level(self):
+        compiler = Compiler(self.tables.name, opt_level=2)
+        compiler.build_parser()
+        result = compiler.compile(PROGRAMS[2])
+
+        self.assertTrue(result.ok, result.diagnostics)
+        self.assertIn('llvm', result.timings)
+        before, after = result.instructions
+        self.assertLess(after, before)
+        self.assertTrue(compiler.version.endswith('-O2'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import tempfile
+import unittest
+from src.clexer import CLexer
+from src.cparser import CParser
+from src.positions import LineIndex
+
+TEXT = 'int main () {\n\tint a = 1;\n\n  a = a +\n    2;\n}'
+
+
+class LineIndexTest(unittest.TestCase):
+    def test_positions(self):
+        index = LineIndex(TEXT)
+        self.assertEqual(len(index), 6)
+        for offset in range(len(TEXT) + 1):
+            line = TEXT.count('\n', 0, offset) + 1
+            column = offset - (TEXT.rfind('\n', 0, offset) + 1) + 1
+            self.assertEqual(index.position(offset), (line, column))
+            self.assertEqual(index.line_of(offset), line)
+            self.assertEqual(index.offset(line, column), offset)
+
+    def test_lines(self):
+        index = LineIndex('a\nbc\n', line=10)
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.position(3), (11, 2))
+        self.assertEqual(index.line_text(11), 'bc')
+        self.assertEqual(index.line_text(12), '')
+        self.assertEqual(index.line_start(12), 5)
+        with self.assertRaises(IndexError):
+            index.line_start(9)
+        with self.assertRaises(IndexError):
+            index.offset(13, 1)
+
+    def test_empty(self):
+        self.assertEqual(LineIndex('').position(0), (1, 1))
+
+
+class TokenPositionsTest(unittest.TestCase):
+    def setUp(self):
+        self.tables = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tables.cleanup()
+
+    def test_engines(self):
+        index = LineIndex(TEXT)
+        for engine in CLexer.engines:
+            with self.subTest(engine=engine):
+                c_lexer = CLexer()
+                c_lexer.build(self.tables.name, engine=engine)
+                c_lexer.input(TEXT)
+                tokens = list(c_lexer)
+                self.assertEqual([(token.lineno, token.column) for token in tokens], [index.position(token.lexpos) for token in tokens])
+                self.assertEqual([(token.value, token.lineno, token.column) for token in tokens[-4:]], [('+', 4, 9), (2, 5, 5), (';', 5, 6), ('}', 6, 1)])
+
+    def test_restart(self):
+        c_lexer = CLexer()
+        c_lexer.build(self.tables.name)
+        c_lexer.input('a\nb\nc')
+        self.assertEqual([token.lineno for token in c_lexer], [1, 2, 3])
+        c_lexer.lexer.lexpos = 2 # Going back searches the index again
+        self.assertEqual([(token.lineno, token.column) for token in c_lexer], [(2, 1), (3, 1)])
+
+    def test_errors(self):
+        c_lexer = CLexer()
+        c_lexer.build(self.tables.name)
+        c_lexer.input('x = 1;\n  y @ 2;\n"open\n')
+        list(c_lexer)
+        self.assertEqual([(record.line, record.column, record.message) for record in c_lexer.diagnostics],
+                         [(2, 5, "Illegal character '@'"), (3, 1, 'Unterminated string')])
+
+
+class NodePositionsTest(unittest.TestCase):
+    def setUp(self):
+        self.tables = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tables.cleanup()
+
+    def test_nodes(self):
+        parser = CParser()
+        parser.build(self.tables.name)
+        ast = parser.parse(TEXT)
+
+        self.assertEqual((ast.lineno, ast.column), (1, 1))
+        declaration = ast.functions[0].declarations[0]
+        self.assertEqual((declaration.lineno, declaration.column), (2, 2))
+        self.assertEqual((declaration.value.lineno, declaration.value.column), (2, 10))
+
+        assignment = ast.functions[0].statements[0]
+        self.assertEqual((assignment.lineno, assignment.column), (4, 3))
+        self.assertEqual((assignment.value.lineno, assignment.value.column), (4, 7)) # An operation starts at its left operand
+        self.assertEqual((assignment.value.rhs.lineno, assignment.value.rhs.column), (5, 5))
+
+    def test_statements(self):
+        parser = CParser()
+        parser.build(self.tables.name)
+        text = 'int main () {\n  while (1)\n    for (int i = 0; i < 2; i = i + 1)\n      if (i) ; else ;\n}'
+        loop = parser.parse(text).functions[0].statements[0]
+
+        self.assertEqual((loop.lineno, loop.column), (2, 3))
+        self.assertEqual((loop.statements[0].lineno, loop.statements[0].column), (3, 5))
+        self.assertEqual((loop.statements[0].declaration.lineno, loop.statements[0].declaration.column), (3, 10))
+        self.assertEqual((loop.statements[0].assignment.lineno, loop.statements[0].assignment.column), (3, 28))
+        self.assertEqual((loop.statements[0].statements[0].lineno, loop.statements[0].statements[0].column), (4, 7))
+
+
+if __name__ == '__main__':
+    unittest.main()
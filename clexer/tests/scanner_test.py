@@ -0,0 +1,92 @@
+import random
+import tempfile
+import unittest
+from src.clexer import CLexer
+from src.scanner import first_chars
+
+# Inputs of clexer_test.py
+CASES = [
+    '90000000000004',
+    '5',
+    '15.75 1. .54',
+    '15.75 1.575E1 1575e-2 2.5e-3 25E-4',
+    '.0075e2 0.075e1 .075e1 75e-2',
+    '"hello, world"',
+    '"hello \\"world\\""',
+    '"escaped \\"quotes\\" and \\\\ backslashes \\\\"',
+    'LastNum',
+    '*',
+    'auto',
+    'void swap(int* xp, int* yp){int temp = *xp; *xp = *yp; *yp = temp;}',
+]
+
+FRAGMENTS = [
+    'int', 'float', 'while', 'for', 'if', 'else', '_Alignof', 'sizeof', '__int64', 'typeof_unqual',
+    'x', 'a1b', '_tmp', 'Z9', '0', '7', '0755', '0x1F', '42u', '10UL', '3LL', '5i64',
+    '1.', '.5', '2.5e-3', '1e10', '6.02E+23f', '1.5L', '.e', '1.e',
+    '"', '"text"', '"a \\" b"', '"\\\\"', '\\', '\n', '\t', ' ', '  ',
+    '&&', '||', '<=', '>=', '==', '!=', '&', '|', '<', '>', '=', '!',
+    '*', '+', '-', '%', '/', '~', '^', ',', '(', ')', '{', '}', ';',
+    '@', '#', '$', '?', ':', '.', '[', ']', "'", 'é', '٣', '\x00',
+]
+
+
+def run(c_lexer, text):
+    tokens = []
+    try:
+        c_lexer.diagnostics.clear()
+        c_lexer.input(text)
+        for token in c_lexer:
+            tokens.append((token.type, token.value, token.lineno, token.column, token.lexpos))
+    except Exception as exception:
+        tokens.append(('exception', type(exception), str(exception)))
+
+    return tokens, [(record.kind, record.message, record.offset, record.line, record.column) for record in c_lexer.diagnostics]
+
+
+class DifferentialTest(unittest.TestCase):
+    def setUp(self):
+        self.tables = tempfile.TemporaryDirectory()
+        self.ply = CLexer()
+        self.ply.build(self.tables.name)
+        self.scanner = CLexer()
+        self.scanner.build(self.tables.name, engine='scanner')
+
+    def tearDown(self):
+        self.tables.cleanup()
+
+    def assertSameTokens(self, text):
+        self.assertEqual(run(self.ply, text), run(self.scanner, text), msg=repr(text))
+
+    def test_lexer_cases(self):
+        for text in CASES:
+            self.assertSameTokens(text)
+
+    def test_fuzzed_fragments(self):
+        generator = random.Random(1234)
+        for _ in range(500):
+            text = ''.join(generator.choice(FRAGMENTS) + generator.choice(['', '', ' ']) for _ in range(generator.randint(1, 30)))
+            self.assertSameTokens(text)
+
+    def test_fuzzed_characters(self):
+        generator = random.Random(4321)
+        alphabet = 'aeEfFlLuUxX019._ "\\\n\t&|<>=!*+-%/(){};,@é'
+        for _ in range(500):
+            text = ''.join(generator.choice(alphabet) for _ in range(generator.randint(1, 40)))
+            self.assertSameTokens(text)
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            CLexer().build(self.tables.name, engine='dfa')
+
+
+class FirstCharsTest(unittest.TestCase):
+    def test_first_chars(self):
+        self.assertEqual(first_chars(CLexer.identifier, 0), set(map(ord, '_abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ')))
+        self.assertEqual(first_chars(CLexer.floating_point_constant, 0), set(map(ord, '0123456789.')))
+        self.assertEqual(first_chars(r'\|\|', 0), {ord('|')})
+        self.assertIsNone(first_chars(r'a?', 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import tempfile
+import unittest
+from src.compiler import Compiler
+from src.folding import fold
+from src.ir import IR
+from src.jit import JIT
+from src.scopes import Scopes, SemanticError
+
+DEPTH = 3000
+
+
+class ScopesTest(unittest.TestCase):
+    def test_shadowing(self):
+        scopes = Scopes()
+        function = scopes.enter('function')
+        x = scopes.declare('x', 'int')
+        self.assertIs(scopes.lookup('x'), x)
+        self.assertEqual((x.type, x.storage, x.scope), ('int', 'auto', function))
+
+        block = scopes.enter()
+        self.assertEqual(block.depth, 1)
+        self.assertIs(scopes.lookup('x'), x)
+        inner = scopes.declare('x', 'float')
+        self.assertIs(inner.shadowed, x)
+        self.assertIs(scopes.resolve('x'), inner)
+        scopes.declare('y', 'int')
+
+        self.assertIs(scopes.leave(), block)
+        self.assertFalse(block.open)
+        self.assertIs(scopes.lookup('x'), x)
+        self.assertIsNone(scopes.lookup('y'))
+        with self.assertRaises(SemanticError):
+            scopes.resolve('y')
+
+    def test_redeclaration(self):
+        scopes = Scopes()
+        scopes.enter('function')
+        scopes.declare('x', 'int')
+        with self.assertRaises(SemanticError):
+            scopes.declare('x', 'float')
+
+        # A sibling scope can declare the name again
+        for _ in range(2):
+            scopes.enter()
+            scopes.declare('y', 'int')
+            scopes.leave()
+
+    def test_closed_symbols_are_dropped(self):
+        scopes = Scopes()
+        scopes.enter('function')
+        outer = scopes.declare('x', 'int')
+        for depth in range(DEPTH):
+            scopes.enter()
+            scopes.declare('x', 'int')
+        for depth in range(DEPTH):
+            scopes.leave()
+
+        self.assertIsNot(scopes.symbols['x'], outer)
+        self.assertIs(scopes.lookup('x'), outer)
+        self.assertIs(scopes.symbols['x'], outer)
+
+
+class ScopedProgramTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tables = tempfile.TemporaryDirectory()
+        cls.compiler = Compiler(cls.tables.name, fold=False)
+        cls.compiler.build_parser()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tables.cleanup()
+
+    def lower(self, text, folded=False):
+        ast = self.compiler.parser.parse(text)
+        if folded:
+            ast = fold(ast)
+        visitor = IR()
+        ast.accept(visitor)
+        return str(visitor.module)
+
+    def test_errors(self):
+        sources = [
+            'int main () { { int y = 1; } y = 2; }',
+            'int main () { int x = 1; float x = 2; }',
+            'int main () { { for (int i = 0; i < 2; i = i + 1) { } } i = 3; }',
+            'int main () { int x = 0; if (x) { int y = 1; } else { x = y; } }',
+        ]
+        for text in sources:
+            for folded in (False, True):
+                with self.subTest(text, folded=folded), self.assertRaises(SemanticError):
+                    self.lower(text, folded)
+
+    def test_positions(self):
+        # Stage that reports the error when folding, the folder checks the code it drops. IR reports all of them without folding
+        sources = [
+            ('int main () {\n  int x = 1;\n  { y = 2; }\n}', 'ir', "3:5: semantic: Variable 'y' is not declared"),
+            ('int main () {\n  int x = 1;\n  float x = 2;\n}', 'fold', "3:3: semantic: Variable 'x' is already declared"),
+            ('int main () { int x = 0; if (0) { x = z; } }', 'fold', "1:39: semantic: Variable 'z' is not declared"),
+            ('int f () { }\nint main () { int x = 0; if (0) { x = f; } }', 'fold', "2:39: semantic: 'f' is a function, not a variable"),
+            ('int f () { }\nint main () { while (0) { f = 1; } }', 'fold', "2:27: semantic: 'f' is a function, not a variable"),
+        ]
+        for text, stage, expected in sources:
+            for fold in (True, False):
+                with self.subTest(text, fold=fold):
+                    compiler = Compiler(self.tables.name, fold=fold)
+                    compiler.build_parser()
+                    self.assertEqual(compiler.compile(text).diagnostics, [f'{stage if fold else "ir"}: {expected}'])
+
+    def test_nested_declarations(self):
+        sources = [
+            'int main () { { for (int i = 0; i < 2; i = i + 1) { } } for (int i = 0; i < 3; i = i + 1) { } }',
+            'int main () { int x = 1; { float x = 2.5; { int x = 3; } x = x * 2; } x = x + 1; }',
+            'int main () { int x = 0; { while (x < 3) { x = x + 1; int x = 7; x = x * 2; } } }',
+        ]
+        for text in sources:
+            for folded in (False, True):
+                with self.subTest(text, folded=folded):
+                    self.assertIsNone(JIT().run(self.lower(text, folded)))
+
+    def test_deep_shadowing(self):
+        text = 'int main () { int x = 0; ' + '{ int x = 1; x = x + 1; ' * DEPTH + '}' * DEPTH + ' x = x + 1; }'
+        compiler = Compiler(self.tables.name, opt_level=0)
+        compiler.build_parser()
+        result = compiler.compile(text)
+        self.assertTrue(result.ok, result.diagnostics)
+        self.assertIsNone(JIT().run(result.ir))
+
+
+if __name__ == '__main__':
+    unittest.main()
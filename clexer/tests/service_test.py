@@ -0,0 +1,147 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from src.compiler import Compiler
+from src.service import BUSY, INVALID_PARAMS, METHOD_NOT_FOUND, PARSE_ERROR, CompileService, ServiceClient, ServiceError, ast_json
+
+SOURCE = 'int main () { int x = 1; while (x < 10) { x = x * 2; } }'
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ServiceTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'service.sock')
+        self.tables = os.path.join(self.directory.name, 'tables')
+
+    async def asyncTearDown(self):
+        self.directory.cleanup()
+
+    async def serve(self, **options):
+        service = CompileService(cache_dir=self.tables, **options)
+        await service.start()
+        await service.serve_unix(self.path)
+        client = await ServiceClient.connect_unix(self.path)
+        return service, client
+
+    async def test_compile(self):
+        service, client = await self.serve(workers=2)
+        try:
+            compiler = Compiler(self.tables)
+            compiler.build_parser()
+            result = await client.compile(SOURCE, ast=True)
+            self.assertTrue(result['ok'])
+            self.assertEqual(result['ir'], compiler.compile(SOURCE).ir)
+            self.assertEqual(result['ast']['node'], 'Program')
+            self.assertEqual(result['ast']['functions'][0]['declarations'][0], {'node': 'Declaration', 'line': 1, 'column': 15, 'type': 'int', 'id': 'x',
+                                                                'value': {'node': 'Literal', 'line': 1, 'column': 23, 'value': 1, 'type': 'INT'}})
+
+            result = await client.compile('int main () { x = ; }', ir=False)
+            self.assertFalse(result['ok'])
+            self.assertEqual(result['diagnostics'], ["parse: 1:19: syntax: Error de sintaxis en ';'"])
+            self.assertIsNone(result['ir'])
+        finally:
+            await client.close()
+            await service.close()
+
+    async def test_concurrent(self):
+        service, client = await self.serve(workers=3, max_pending=100)
+        try:
+            sources = [f'int main () {{ int x = {index}; x = x * 3; }}' for index in range(40)]
+            results = await asyncio.gather(*(client.compile(source) for source in sources))
+            for index, result in enumerate(results):
+                self.assertTrue(result['ok'])
+                self.assertIn(f'i32 {index}', result['ir'])
+
+            stats = await client.stats()
+            self.assertEqual((stats['served'], stats['rejected'], stats['pending']), (40, 0, 0))
+            latency = stats['latency_ms']
+            self.assertLessEqual(latency['p50'], latency['p90'])
+            self.assertLessEqual(latency['p99'], latency['max'])
+        finally:
+            await client.close()
+            await service.close()
+
+    async def test_backpressure(self):
+        service, client = await self.serve(workers=1, max_pending=2)
+        try:
+            # Long enough that the first requests are still running when the last ones arrive
+            source = 'int main () { int x = 0; float y = 1.5; ' + '{ while (x < 10) { x = x + 1; y = y * 2; } } x = x % 3; ' * 500 + '}'
+            results = await asyncio.gather(*(client.compile(source, ir=False) for _ in range(10)), return_exceptions=True)
+            rejected = [result for result in results if isinstance(result, ServiceError)]
+            self.assertTrue(rejected)
+            self.assertTrue(all(error.code == BUSY for error in rejected))
+            self.assertGreaterEqual(len(results) - len(rejected), 2)
+            self.assertEqual((await client.stats())['rejected'], len(rejected))
+            self.assertTrue((await client.compile(SOURCE))['ok'])
+        finally:
+            await client.close()
+            await service.close()
+
+    async def test_errors(self):
+        service, client = await self.serve(workers=1)
+        try:
+            with self.assertRaises(ServiceError) as error:
+                await client.call('link')
+            self.assertEqual(error.exception.code, METHOD_NOT_FOUND)
+            with self.assertRaises(ServiceError) as error:
+                await client.call('compile', source=1)
+            self.assertEqual(error.exception.code, INVALID_PARAMS)
+
+            response = json.loads(await service.handle(b'{"jsonrpc": "2.0", "id": 1, "method"'))
+            self.assertEqual(response['error']['code'], PARSE_ERROR)
+            self.assertIsNone(await service.handle(json.dumps({'jsonrpc': '2.0', 'method': 'stats'})))
+        finally:
+            await client.close()
+            await service.close()
+
+    async def test_processes(self):
+        service, client = await self.serve(workers=2, mode='process')
+        try:
+            results = await asyncio.gather(*(client.compile(SOURCE) for _ in range(4)))
+            self.assertTrue(all(result['ok'] for result in results))
+        finally:
+            await client.close()
+            await service.close()
+
+
+class ServiceStdioTest(unittest.TestCase):
+    def test_stdio(self):
+        requests = [
+            {'jsonrpc': '2.0', 'id': 1, 'method': 'compile', 'params': {'source': SOURCE}},
+            {'jsonrpc': '2.0', 'id': 2, 'method': 'stats'},
+        ]
+        with tempfile.TemporaryDirectory() as tables:
+            output = subprocess.run([sys.executable, '-m', 'src.service', '--stdio', '--workers', '1', '--cache-dir', tables], cwd=ROOT, capture_output=True,
+                                    text=True, timeout=120, input=''.join(json.dumps(request) + '\n' for request in requests))
+        responses = {response['id']: response for response in map(json.loads, output.stdout.splitlines())}
+        self.assertTrue(responses[1]['result']['ok'])
+        self.assertEqual(responses[2]['result']['workers'], 1)
+
+
+class ASTJSONTest(unittest.TestCase):
+    def setUp(self):
+        self.tables = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tables.cleanup()
+
+    def test_deep(self):
+        compiler = Compiler(self.tables.name)
+        compiler.build_parser()
+        ast = compiler.get_AST('int main () { int x = 1; ' + 'if (x < 2) { x = 1; } else ' * 3000 + 'x = 2; }')
+        tree = ast_json(ast)
+        depth = 0
+        node = tree['functions'][0]['statements'][0]
+        while node['node'] == 'IfElseStatement':
+            node = node['otherwise_statements'][0]
+            depth += 1
+        self.assertEqual(depth, 3000)
+
+
+if __name__ == '__main__':
+    unittest.main()
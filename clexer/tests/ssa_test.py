@@ -0,0 +1,101 @@
+import tempfile
+import unittest
+import llvmlite.binding as llvm
+from src.cparser import CParser
+from src.ir import IR, MemoryIR, int32, loop_writes
+from src.jit import JIT
+from src.optimizer import count_instructions
+
+# Statements after a loop or an if are part of its body, the blocks end them
+RESULTS = {
+    'int main () { int result = 0; for (int i = 0; i < 10; i = i + 1) { result = result + i; } }': 45,
+    'int main () { int result = 0; int x = 0; while (x < 10) { { if (x % 2 == 0) { result = result + x; } else { result = result - 1; } } x = x + 1; } }': 15,
+    'int main () { int result = 0; for (int i = 0; i < 4; i = i + 1) { for (int j = 0; j < i; j = j + 1) { result = result + j; } } }': 4,
+    'int main () { float f = 1.5; int result = 7; { while (result < 0) { result = 0; } } result = result + f; }': 8,
+    'int main () { int x = 0; int result = 0; { while (x < 3) { int result = x * 10; x = x + 1; } } result = result + x; }': 3,
+    'int main () { int result = 2; { if (result > 1) { float result = 2.5; { int result = 4; } result = result * 2; } } }': 2,
+    'int main () { int result; int a = 5; { if (a > 3) { result = 1; } } { if (a > 10) { result = result + 100; } } }': 1,
+    'int main () { int x = 3; int result = 0; if (x < 2) { result = 1; } else if (x < 5) { result = 2; } else result = 3; }': 2,
+    'int main () { int result = 1; int n = 0; { while (n < 5) { { if (n > 1) { int k = n; result = result * k; } } n = n + 1; } } }': 24,
+}
+
+# Every kind of statement, nested, with variables of both types read and written at every level
+PROGRAM = '''int main () {
+    int total = 0; float scale = 1.5; int limit = 40; int flag;
+    flag = limit > 10;
+    { if (flag && total == 0 || scale < 1) { flag = total != 0; } }
+    for (int i = 0; i < limit; i = i + 1) {
+        int step = i % 7;
+        { if (step < 3) { total = total + step * 2; scale = scale * 1.01; } else { total = total - 1; } }
+        { while (step > 0) { step = step - 1; float half = scale / 2; scale = half + scale / 2; } }
+        { if (flag) { int t = total; total = t + 0x10; } }
+        ;
+        total = total + i;
+    }
+    scale = scale + total;
+}'''
+
+
+class ResultIR(IR):
+    """main returns the value of result, so the JIT can check what the program computed"""
+    return_type = int32
+
+    def end_function(self) -> None:
+        self.builder.ret(self.convert(self.read(self.scopes.resolve('result')), int32))
+        super().end_function()
+
+
+class SSATest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tables = tempfile.TemporaryDirectory()
+        cls.parser = CParser()
+        cls.parser.build(cls.tables.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tables.cleanup()
+
+    def lower(self, visitor, text):
+        ast = self.parser.parse(text)
+        self.assertEqual(list(self.parser.diagnostics), [])
+        ast.accept(visitor)
+        return str(visitor.module)
+
+    def test_results(self):
+        jit = JIT()
+        for text, expected in RESULTS.items():
+            with self.subTest(text):
+                module = self.lower(ResultIR(), text)
+                self.assertNotIn('alloca', module)
+                self.assertEqual(jit.run(module), expected)
+
+    def test_fewer_instructions(self):
+        for text in [*RESULTS, PROGRAM]:
+            with self.subTest(text[:60]):
+                ssa = llvm.parse_assembly(self.lower(IR(), text))
+                ssa.verify()
+                memory = llvm.parse_assembly(self.lower(MemoryIR(), text))
+                memory.verify()
+                for instruction in (instruction for function in ssa.functions for block in function.blocks for instruction in block.instructions):
+                    self.assertNotIn(instruction.opcode, ('alloca', 'load', 'store'))
+                self.assertLess(count_instructions(ssa), count_instructions(memory))
+
+    def test_phis(self):
+        module = self.lower(IR(), 'int main () { int x = 0; int y = 1; while (x < 10) { { if (x > 5) { y = y * 2; } } x = x + 1; } }')
+        head = module[module.index('while-head:'):module.index('while-body:')]
+        self.assertEqual(head.count('phi'), 2)
+        self.assertIn('[0, %"entry"]', head)
+        self.assertIn('[1, %"entry"]', head)
+        # Only y changes in the if, x is read from the head
+        self.assertEqual(module.count('phi'), 3)
+
+    def test_loop_writes(self):
+        ast = self.parser.parse('int main () { int a = 0; int b = 0; while (a < 1) { { for (int i = 0; i < 2; i = i + 1) { b = b + i; } } a = a + 1; } }')
+        loop = ast.functions[0].statements[0]
+        self.assertEqual(list(loop_writes(ast)[loop]), ['i', 'b', 'a'])
+        self.assertEqual(list(loop_writes(ast)[loop.statements[0][0][0]]), ['i', 'b'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import io
+import os
+import random
+import tempfile
+import tracemalloc
+import unittest
+from src.clexer import CLexer
+from src.cparser import CParser
+
+FRAGMENTS = [
+    'int', 'float', 'x', 'counter', '42 ', '0755 ', '3.25 ', '1.e', '2.5e-3 ', '"a string"', '"esc \\" q"',
+    '"open', '=', '==', '<=', '&&', '||', '+', ';', '{', '}', '(', ')', '@', 'é', ' ', '\t', '\n', '\n',
+]
+
+
+def tokens(iterable):
+    return [(token.type, token.value, token.lexpos, token.lineno, token.column) for token in iterable]
+
+
+class StreamingTest(unittest.TestCase):
+    def setUp(self):
+        self.tables = tempfile.TemporaryDirectory()
+        self.c_lexer = CLexer()
+        self.c_lexer.build(self.tables.name)
+
+    def tearDown(self):
+        self.tables.cleanup()
+
+    def lex(self, text):
+        self.c_lexer.lexer.begin('INITIAL')
+        self.c_lexer.input(text)
+        return tokens(self.c_lexer)
+
+    def stream(self, stream, chunk_size):
+        return tokens(self.c_lexer.tokenize_stream(stream, chunk_size))
+
+    def test_chunk_boundaries(self):
+        generator = random.Random(7)
+        for _ in range(50):
+            text = ''.join(generator.choice(FRAGMENTS) for _ in range(generator.randint(1, 80)))
+            expected = self.lex(text)
+            for chunk_size in (1, 2, 3, 5, 16, 4096):
+                self.assertEqual(self.stream(io.StringIO(text), chunk_size), expected)
+                self.assertEqual(self.stream(io.BytesIO(text.encode('utf-8')), chunk_size), expected)
+
+    def test_string_positions(self):
+        self.assertEqual(self.lex('x = "a b" ;'), [('IDENTIFIER', 'x', 0, 1, 1), ('=', '=', 2, 1, 3), ('STRING', '"a b"', 4, 1, 5), (';', ';', 10, 1, 11)])
+
+    def test_unterminated_string_ends_at_newline(self):
+        self.assertEqual(self.lex('"abc\nx'), [('IDENTIFIER', 'x', 5, 2, 1)])
+
+    def test_file(self):
+        text = 'int main () {\n    int x = 5;\n    x = x + 1;\n}\n' * 3
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'source.c')
+            with open(path, 'w') as source:
+                source.write(text)
+            self.assertEqual(tokens(self.c_lexer.tokenize_file(path, chunk_size=7)), self.lex(text))
+
+            empty = os.path.join(directory, 'empty.c')
+            open(empty, 'w').close()
+            self.assertEqual(list(self.c_lexer.tokenize_file(empty)), [])
+
+    def test_bounded_memory(self):
+        line = 'float value_1 = 3.25 * counter + 42; "a string literal"\n'
+        peaks = []
+        for lines in (1000, 8000):
+            stream = io.BytesIO(line.encode('utf-8') * lines)
+            tracemalloc.start()
+            for _ in self.c_lexer.tokenize_stream(stream, chunk_size=4096):
+                pass
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+        self.assertLess(peaks[1], 2 * peaks[0])
+
+
+class StreamingParserTest(unittest.TestCase):
+    def setUp(self):
+        self.tables = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tables.cleanup()
+
+    def test_parse_stream(self):
+        parser = CParser()
+        parser.build(self.tables.name)
+        text = 'int main () {\nint x = 5;\nx = x + 1;\n}\n'
+        ast = parser.parse_stream(io.StringIO(text), chunk_size=3)
+        self.assertEqual(ast.functions[0].declarations[0].id, 'x')
+        self.assertEqual(ast.functions[0].statements[0].id, 'x')
+
+
+if __name__ == '__main__':
+    unittest.main()
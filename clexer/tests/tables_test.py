@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+from src.clexer import CLexer
+from src.cparser import CParser
+from src.tables import TableCache, grammar_hash
+
+
+class TableCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache_dir = self.directory.name
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_tables_are_written_once(self):
+        parser = CParser()
+        parser.build(self.cache_dir, engine='ply') # The scanner has no tables
+        tables = sorted(name for name in os.listdir(self.cache_dir) if name.endswith('.py'))
+        self.assertEqual(len(tables), 2)
+        mtimes = [os.path.getmtime(os.path.join(self.cache_dir, name)) for name in tables]
+
+        parser = CParser()
+        parser.build(self.cache_dir, engine='ply')
+        self.assertEqual(sorted(name for name in os.listdir(self.cache_dir) if name.endswith('.py')), tables)
+        self.assertEqual([os.path.getmtime(os.path.join(self.cache_dir, name)) for name in tables], mtimes)
+
+    def test_cached_tables_parse(self):
+        for _ in range(2):
+            parser = CParser()
+            parser.build(self.cache_dir)
+            ast = parser.parse('int main () { int x = 5; x = x + 1; }')
+            self.assertEqual(ast.functions[0].declarations[0].id, 'x')
+            self.assertEqual(ast.functions[0].statements[0].id, 'x')
+
+    def test_cached_lexer(self):
+        for _ in range(2):
+            c_lexer = CLexer()
+            c_lexer.build(self.cache_dir, engine='ply')
+            c_lexer.lexer.input('int x = 0755;')
+            self.assertEqual([token.type for token in c_lexer.lexer], ['INT_KEYWORD', 'IDENTIFIER', '=', 'INT', ';'])
+
+    def test_grammar_change_invalidates(self):
+        class OtherLexer(CLexer):
+            t_AND = r'and'
+
+        self.assertNotEqual(grammar_hash(CLexer(), 't_'), grammar_hash(OtherLexer(), 't_'))
+        self.assertEqual(grammar_hash(CLexer(), 't_'), grammar_hash(CLexer(), 't_'))
+
+    def test_rule_order_invalidates(self):
+        # PLY tries function rules in the order they are defined, 1.5 is a FLOAT only when t_FLOAT comes first
+        class FloatFirst:
+            def t_FLOAT(self, t):
+                r'\d+\.\d*'
+                return t
+
+            def t_INT(self, t):
+                r'\d+'
+                return t
+
+        class IntFirst:
+            def t_INT(self, t):
+                r'\d+'
+                return t
+
+            def t_FLOAT(self, t):
+                r'\d+\.\d*'
+                return t
+
+        self.assertNotEqual(grammar_hash(FloatFirst(), 't_'), grammar_hash(IntFirst(), 't_'))
+
+    def test_damaged_table_is_rebuilt(self):
+        c_lexer = CLexer()
+        c_lexer.build(self.cache_dir, engine='ply')
+        name = 'lextab_' + grammar_hash(c_lexer, 't_')
+        with open(TableCache(self.cache_dir).path(name), 'w') as table:
+            table.write('this is not python')
+
+        c_lexer = CLexer()
+        c_lexer.build(self.cache_dir, engine='ply')
+        c_lexer.lexer.input('auto')
+        self.assertEqual(c_lexer.lexer.token().type, 'AUTO')
+        self.assertIsNotNone(TableCache(self.cache_dir).load(name))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import sys
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from src.clexer import CLexer
+from src.compiler import Compiler
+from src.cparser import CParser
+from src.service import ast_json
+
+THREADS = 8
+ROUNDS = 6
+
+STATEMENTS = [
+    'x = x + 0x1F;', 'y = y * 1.5f;', '{ int t = x % 7; x = t - 1; }', ';', '{ if (x < 100) { y = y / 2.0; } else { x = 010; } }',
+    '{ while (x > 50) { x = x - 3; } }', '{ for (int i = 0; i < 3; i = i + 1) { y = y + i; } }', '{ if (x > 2 && y < 1e3 || x == 0b101) { x = x != 2; } }',
+    '{ float z = .5e-1; y = y - z * x; }', 'x = x + 7u;',
+]
+
+
+def program(statements, start) -> str:
+    lines = [STATEMENTS[(start + index) % len(STATEMENTS)] for index in range(statements)]
+    return 'int main () {\n    int x = 1; float y = 2.5;\n' + ''.join(f'    {line}\n' for line in lines) + '}\n'
+
+
+SOURCES = [program(statements, start) for start, statements in enumerate((5, 40, 120, 300))] + [
+    'int main () { x = ; }',
+    'int main () { int x = 1 @ 2; x = x $ 3; }',
+    'int main () { int x = 0x1F; while (x > 0) { x = x - 1; }',
+]
+
+
+def parse(c_parser, source):
+    ast = c_parser.parse(source)
+    return ast_json(ast) if ast is not None else None, [str(diagnostic) for diagnostic in c_parser.diagnostics]
+
+
+class CloneTest(unittest.TestCase):
+    def setUp(self):
+        self.tables = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tables.cleanup()
+
+    def test_unbuilt(self):
+        with self.assertRaises(Exception):
+            CParser().clone()
+        with self.assertRaises(Exception):
+            CLexer().clone()
+
+    def test_independent(self):
+        for engine in CLexer.engines:
+            with self.subTest(engine):
+                c_parser = CParser()
+                c_parser.build(self.tables.name, engine=engine)
+                clone = c_parser.clone()
+                self.assertIsNot(clone.c_lexer, c_parser.c_lexer)
+                self.assertIs(clone.c_lexer.keywords, c_parser.c_lexer.keywords)
+                self.assertIs(clone.parser.action, c_parser.parser.action)
+
+                expected = parse(c_parser, SOURCES[1])
+                self.assertEqual(parse(clone, SOURCES[4])[1], ["1:19: syntax: Error de sintaxis en ';'"])
+                self.assertEqual(clone.errors, 1)
+                self.assertEqual(list(c_parser.diagnostics), [])
+                self.assertEqual(parse(clone, SOURCES[1]), expected)
+                self.assertEqual(c_parser.errors, 0)
+
+    def test_lexer(self):
+        for engine in CLexer.engines:
+            for values in CLexer.value_policies:
+                with self.subTest(engine=engine, values=values):
+                    c_lexer = CLexer()
+                    c_lexer.build(self.tables.name, engine=engine, values=values)
+                    clone = c_lexer.clone()
+                    c_lexer.input(SOURCES[2])
+                    first = c_lexer.token()
+                    clone.input(SOURCES[2])
+                    tokens = [(token.type, token.value, token.lineno, token.column) for token in clone]
+                    self.assertEqual(tokens[0], (first.type, first.value, first.lineno, first.column))
+
+                    c_lexer.input(SOURCES[2])
+                    self.assertEqual([(token.type, token.value, token.lineno, token.column) for token in c_lexer], tokens)
+
+
+class ThreadsTest(unittest.TestCase):
+    def setUp(self):
+        # Switch threads as often as possible, so that shared state would be caught in the middle of a parse
+        self.interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.tables = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        sys.setswitchinterval(self.interval)
+        self.tables.cleanup()
+
+    def test_parsers(self):
+        for engine in CLexer.engines:
+            with self.subTest(engine):
+                c_parser = CParser()
+                c_parser.build(self.tables.name, engine=engine)
+                expected = [parse(c_parser, source) for source in SOURCES]
+                local = threading.local()
+
+                def work(index):
+                    if not hasattr(local, 'parser'):
+                        local.parser = c_parser.clone()
+                    return parse(local.parser, SOURCES[index % len(SOURCES)])
+
+                with ThreadPoolExecutor(THREADS) as executor:
+                    results = list(executor.map(work, range(len(SOURCES) * THREADS * ROUNDS)))
+                for index, result in enumerate(results):
+                    self.assertEqual(result, expected[index % len(SOURCES)])
+
+    def test_compilers(self):
+        compiler = Compiler(self.tables.name)
+        compiler.build_parser()
+        expected = [(result.ir, result.diagnostics) for result in map(compiler.compile, SOURCES)]
+        compilers = [compiler.clone() for _ in range(THREADS)]
+
+        def work(index):
+            result = compilers[index].compile(SOURCES[index % len(SOURCES)])
+            return result.ir, result.diagnostics
+
+        with ThreadPoolExecutor(THREADS) as executor:
+            for _ in range(ROUNDS):
+                for index, result in enumerate(executor.map(work, range(THREADS))):
+                    self.assertEqual(result, expected[index % len(SOURCES)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import tempfile
+import unittest
+from src.clexer import CLexer, Token
+from src.cparser import CParser
+
+
+class TokenBufferTest(unittest.TestCase):
+    def setUp(self):
+        self.tables = tempfile.TemporaryDirectory()
+        self.c_lexer = CLexer()
+        self.c_lexer.build(self.tables.name)
+
+    def tearDown(self):
+        self.tables.cleanup()
+
+    def test_same_tokens(self):
+        text = 'int main () {\n    float y = 1.5e2;\n    int x = 0755 + 9;\n    x = "a \\" b" && y;\n}\n'
+        self.c_lexer.input(text)
+        expected = [(token.type, token.value, token.lexpos, token.lineno, token.column) for token in self.c_lexer]
+
+        buffer = self.c_lexer.tokenize_buffer(text)
+        self.assertEqual(len(buffer), len(expected))
+        self.assertEqual([(token.type, token.value, token.lexpos, token.lineno, token.column) for token in buffer], expected)
+        self.assertEqual(buffer.position(len(buffer) - 1), (5, 1))
+        self.assertIsInstance(buffer[0], Token)
+
+    def test_lazy_values(self):
+        buffer = self.c_lexer.tokenize_buffer('x = 10 + 017;')
+        self.assertEqual(buffer.type(0), 'IDENTIFIER')
+        self.assertEqual(buffer.text(4), '017')
+        self.assertEqual(buffer.value(4), 15)
+        self.assertEqual(buffer.kinds.itemsize, 1)
+
+    def test_parse_tokens(self):
+        parser = CParser()
+        parser.build(self.tables.name)
+        text = 'int main () { int x = 5; x = x + 1; }'
+        ast = parser.parse_tokens(parser.c_lexer.tokenize_buffer(text))
+        self.assertEqual(ast.functions[0].declarations[0].id, 'x')
+        self.assertEqual(ast.functions[0].declarations[0].value.value, 5)
+        self.assertEqual(ast.functions[0].statements[0].value.op, '+')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import tempfile
+import unittest
+from src.compiler import Compiler
+from src.cparser import CParser
+from src.folding import ConstantFolder
+from src.ir import Literal, run, walk
+from src.instrumentation import count_nodes
+
+DEPTH = 5000
+
+
+class TraversalTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tables = tempfile.TemporaryDirectory()
+        cls.parser = CParser()
+        cls.parser.build(cls.tables.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tables.cleanup()
+
+    def test_walk_order(self):
+        ast = self.parser.parse('int main () { int x = 1 + 2; { x = 3; } }')
+        events = []
+        walk(ast, lambda node: events.append(('enter', type(node).__name__)), lambda node: events.append(('leave', type(node).__name__)))
+        self.assertEqual(events, [
+            ('enter', 'Program'), ('enter', 'Function'),
+            ('enter', 'Declaration'), ('enter', 'BinaryOp'), ('enter', 'Literal'), ('leave', 'Literal'),
+            ('enter', 'Literal'), ('leave', 'Literal'), ('leave', 'BinaryOp'), ('leave', 'Declaration'),
+            ('enter', 'Assignment'), ('enter', 'Literal'), ('leave', 'Literal'), ('leave', 'Assignment'),
+            ('leave', 'Function'), ('leave', 'Program'),
+        ])
+
+    def test_walk_skip(self):
+        ast = self.parser.parse('int main () { int x = 1 + 2; x = 3; }')
+        entered = []
+        walk(ast, lambda node: entered.append(type(node).__name__) or type(node).__name__ != 'Declaration')
+        self.assertEqual(entered, ['Program', 'Function', 'Declaration', 'Assignment', 'Literal'])
+
+    def test_run(self):
+        visited = []
+        blocks = []
+
+        class Collector(ConstantFolder):
+            def visit_literal(self, node):
+                visited.append(node.value)
+                self.stack.append(node)
+
+            def visit_block(self, statements):
+                blocks.append(len(statements))
+                yield from super().visit_block(statements)
+
+        run(Collector(), [Literal(1, 'INT'), [Literal(2, 'INT'), None, [Literal(3, 'INT')]], Literal(4, 'INT')])
+        self.assertEqual(visited, [1, 2, 3, 4])
+        # The list given to run() is visited in place, the lists in it are blocks
+        self.assertEqual(blocks, [3, 1])
+
+    def test_deep_trees(self):
+        sources = {
+            'else if': 'int main () { int x = 1; ' + 'if (x < 2) { x = 1; } else ' * DEPTH + 'x = 2; }',
+            'blocks': 'int main () { int x = 1; ' + '{ x = 2; ' * DEPTH + ' }' * DEPTH + ' }',
+            'expression': 'int main () { int x = 1; x = x' + ' + x * 2' * DEPTH + '; }',
+        }
+        compiler = Compiler(self.tables.name, opt_level=0)
+        compiler.build_parser()
+        for name, text in sources.items():
+            with self.subTest(name):
+                ast = self.parser.parse(text)
+                self.assertGreater(count_nodes(ast), DEPTH)
+                result = compiler.compile(text)
+                self.assertTrue(result.ok, result.diagnostics)
+
+
+if __name__ == '__main__':
+    unittest.main()